@@ -0,0 +1 @@
+"""Benchmarks del pipeline de scantotals (se ejecutan con python -m benchmarks.<módulo>)."""
@@ -0,0 +1,124 @@
+"""
+Benchmark del arranque de una ejecución programada: python -m scantotals <estación> --incremental.
+
+    python -m benchmarks.bench_arranque [--estacion pulidos] [--repeticiones 15] [--modulos 15]
+
+Cada tick del programador lanza un intérprete nuevo por estación. Con el archivo sin cambios
+desde la última ejecución, el proceso debería terminar sin conectarse a la base de datos ni
+importar mysql.connector. Sobre un directorio VISION temporal y una base SQLite (--sqlite),
+mide la mediana del tiempo de proceso de:
+  intérprete      python -c pass
+  sin cambios     la ejecución incremental con el archivo igual al del checkpoint
+  modificado      la misma ejecución con el mtime del archivo cambiado (lee y consulta la base)
+y desglosa con -X importtime los módulos que carga la ejecución sin cambios: los de mayor
+tiempo acumulado y si aparecen los pesados (mysql.connector, asyncio, pandas, ctypes, csv, calendar).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from scantotals import estaciones
+
+from .sintetico import generar_archivo
+
+AHORA = datetime(2026, 10, 16, 12, 0)
+PESADOS = ("mysql.connector", "asyncio", "pandas", "ctypes", "csv", "calendar")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en el proceso hijo: apunta DIRECTORIO_VISION al directorio temporal y llama a main.
+_LANZADOR = """
+import sys
+from scantotals import estaciones
+estaciones.DIRECTORIO_VISION = sys.argv[1]
+from scantotals.__main__ import main
+main(sys.argv[2:])
+"""
+
+
+def _entorno():
+    entorno = dict(os.environ)
+    entorno['PYTHONPATH'] = os.pathsep.join(filter(None, (RAIZ, entorno.get('PYTHONPATH'))))
+    return entorno
+
+
+def _lanzar(comando, entorno):
+    inicio = time.perf_counter()
+    proceso = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode:
+        raise RuntimeError(proceso.stderr)
+    return segundos, proceso.stderr
+
+
+def _mediana(comando, entorno, repeticiones, antes=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if antes is not None:
+            antes()
+        tiempos.append(_lanzar(comando, entorno)[0])
+    return statistics.median(tiempos)
+
+
+def desglose(salida):
+    """{módulo: (propio, acumulado, nivel)} en microsegundos, de la salida de -X importtime."""
+    modulos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        modulos[nombre.strip()] = (int(propio), int(acumulado), nivel)
+    return modulos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--estacion", default="pulidos", choices=list(estaciones.ESTACIONES))
+    parser.add_argument("--repeticiones", type=int, default=15)
+    parser.add_argument("--modulos", type=int, default=15, help="módulos del desglose")
+    args = parser.parse_args(argv)
+    estacion = estaciones.ESTACIONES[args.estacion]
+    entorno = _entorno()
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, estacion.archivo_dia)
+        generar_archivo(ruta, lineas=5000, now=AHORA, biselado=estacion.restar_inf_fails,
+                        mes_texto=estacion.regla_fecha == "mes_texto")
+        opciones = [args.estacion, "--incremental", "--silencioso", "--ahora", AHORA.isoformat(" "),
+                    "--checkpoints", os.path.join(directorio, "checkpoints.json"),
+                    "--sqlite", os.path.join(directorio, "scantotals.db"),
+                    "--metricas", os.path.join(directorio, "metricas.jsonl")]
+        ejecucion = [sys.executable, "-c", _LANZADOR, directorio] + opciones
+        # Primera ejecución: escribe la base y deja el checkpoint.
+        _lanzar(ejecucion, entorno)
+
+        def tocar():
+            os.utime(ruta, ns=(time.time_ns(), time.time_ns()))
+
+        interprete = _mediana([sys.executable, "-c", "pass"], entorno, args.repeticiones)
+        sin_cambios = _mediana(ejecucion, entorno, args.repeticiones)
+        modificado = _mediana(ejecucion, entorno, args.repeticiones, antes=tocar)
+        # Después de "modificado" el checkpoint quedó confirmado con el último mtime.
+        _, salida = _lanzar([sys.executable, "-X", "importtime"] + ejecucion[1:], entorno)
+    print(f"{args.estacion}, mediana de {args.repeticiones} procesos")
+    print(f"  intérprete   {interprete * 1000:8.1f} ms")
+    print(f"  sin cambios  {sin_cambios * 1000:8.1f} ms")
+    print(f"  modificado   {modificado * 1000:8.1f} ms")
+    modulos = desglose(salida)
+    total = sum(propio for propio, _, _ in modulos.values())
+    print(f"-X importtime sin cambios: {len(modulos)} módulos, {total / 1000:.1f} ms")
+    principales = sorted(((acumulado, nombre) for nombre, (_, acumulado, nivel) in modulos.items() if nivel <= 1),
+                         reverse=True)
+    for acumulado, nombre in principales[:args.modulos]:
+        print(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+    for nombre in PESADOS:
+        estado = f"{modulos[nombre][1] / 1000:.1f} ms" if nombre in modulos else "no se importa"
+        print(f"  {nombre:<16} {estado}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark del costo del registro por fila sobre pipeline.leer_candidatos.
+
+    python -m benchmarks.bench_logging [--lineas 200000] [--salida RUTA]
+
+Compara tres modos sobre el mismo archivo grande:
+  sincrono  traza por fila escrita directamente en la salida (equivalente a los print por fila originales)
+  cola      traza por fila con la cola de bitacora.configurar (el hilo que procesa solo encola)
+  resumen   nivel INFO por defecto: sin registro por fila, solo la línea de resumen
+
+La salida se abre con buffer de línea, como una consola; por defecto es os.devnull, así que
+los números son una cota inferior del costo en la consola de Windows. Para medir contra una
+consola real, usar --salida CON (Windows) o --salida /dev/tty.
+Contra os.devnull "cola" no gana a "sincrono" (QueueHandler formatea el mensaje en el hilo
+que registra); su ventaja aparece cuando escribir en el destino bloquea. La diferencia
+grande está en no registrar por fila.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from scantotals import bitacora
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.pipeline import leer_candidatos
+
+from .sintetico import generar_archivo
+
+
+def medir(nombre, ruta, estacion, now, salida, filas):
+    logger = logging.getLogger("scantotals")
+    if nombre == "sincrono":
+        bitacora.detener()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        handler = logging.StreamHandler(salida)
+        handler.setFormatter(logging.Formatter(bitacora.FORMATO))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    else:
+        bitacora.configurar(logging.DEBUG if nombre == "cola" else logging.INFO, stream=salida)
+    inicio = time.perf_counter()
+    candidatos = leer_candidatos(ruta, ESTACIONES[estacion], nocturno=False, contexto=crear_contexto(now))
+    procesamiento = time.perf_counter() - inicio
+    # Con la cola, el registro termina de escribirse después: se mide también el vaciado.
+    bitacora.detener()
+    total = time.perf_counter() - inicio
+    print(f"  {nombre:<9} {filas / procesamiento:>12,.0f} filas/s  procesamiento {procesamiento:.3f}s  "
+          f"con vaciado {total:.3f}s  ({len(candidatos)} aceptadas)")
+    return procesamiento
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=200_000)
+    parser.add_argument("--estacion", default="pulidos", choices=list(ESTACIONES))
+    parser.add_argument("--salida", default=os.devnull, help="destino del registro (por defecto os.devnull)")
+    args = parser.parse_args(argv)
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as directorio, open(args.salida, 'w', buffering=1) as salida:
+        ruta = os.path.join(directorio, "scantotals_bench.auto.tab")
+        # Horas diurnas de días anteriores: casi todas las filas se aceptan y generan traza.
+        filas = generar_archivo(ruta, lineas=args.lineas, dias=3, horas=set(range(7, 21)), now=now)
+        print(f"{args.estacion}, {filas} filas, salida {args.salida}")
+        tiempos = {nombre: medir(nombre, ruta, args.estacion, now, salida, filas)
+                   for nombre in ("sincrono", "cola", "resumen")}
+        print(f"  resumen vs sincrono {tiempos['sincrono'] / tiempos['resumen']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Motor mmap (mapeado.py) contra el motor por filas (pipeline.iterar_candidatos).
+
+    python -m benchmarks.bench_mapeado [--lineas 1000000] [--estacion pulidos] [--solo-verificar]
+
+Primero verifica que ambos motores generen los mismos registros en el mismo orden, los mismos
+contadores de descarte y el mismo checkpoint:
+  - con los archivos de prueba de todas las estaciones, momentos y turnos (sintetico.archivo_prueba);
+  - con variantes: saltos de línea '\\r\\n', claves con caracteres no ASCII, comillas (el motor
+    mmap pasa al de filas), sin cabecera y vacío;
+  - con checkpoint, en dos lecturas seguidas con algunas filas modificadas entre ambas.
+Después mide filas/s de cada motor sobre un archivo de `--lineas` filas con todas las horas
+del día (como los de VISION: las del otro turno se descartan), en el turno diurno.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from scantotals import mapeado
+from scantotals.checkpoint import CheckpointArchivo
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.pipeline import iterar_candidatos
+
+from .sintetico import CONTADORES, MOMENTOS, archivo_prueba, generar_archivo
+
+
+def _correr(iterar, ruta, estacion, nocturno, now, checkpoint=None):
+    metricas = MetricasEstacion(estacion.nombre, ruta)
+    registros = [c.registro(estacion) for c in iterar(ruta, estacion, nocturno, checkpoint,
+                                                       crear_contexto(now), metricas)]
+    return registros, {nombre: metricas.contadores[nombre] for nombre in CONTADORES + ("lineas_sin_cambio",)}
+
+
+def _comparar(ruta, estacion, nocturno, now, caso):
+    esperado = _correr(iterar_candidatos, ruta, estacion, nocturno, now)
+    obtenido = _correr(mapeado.iterar_candidatos, ruta, estacion, nocturno, now)
+    assert esperado == obtenido, (caso, esperado[1], obtenido[1])
+
+
+def _variantes(ruta, estacion, now):
+    """Reescribe el archivo de prueba de varias formas; genera el nombre de cada variante."""
+    archivo_prueba(ruta, estacion, now)
+    with open(ruta, newline='') as archivo:
+        original = archivo.read()
+    variantes = {
+        "crlf": original.replace("\n", "\r\n"),
+        "no ascii": original.replace("MAQ01-", "MÁQ01-").replace("002 MAQ02", "٠٠٢ MAQ02")
+                            .replace("013 MAQ13-", "013 MAQ13- "),
+        "comillas": original.replace("\tN/A\t", '\t"N/A"\t', 3),
+        "sin cabecera": original.replace("Key\t", "Clave\t"),
+        "vacío": "",
+    }
+    for nombre, texto in variantes.items():
+        with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+            archivo.write(texto)
+        yield nombre
+
+
+def _checkpoint(ruta, estacion, now):
+    """Dos lecturas con checkpoint por motor; entre ambas cambian los hits de algunas filas."""
+    resultados = []
+    for iterar in (iterar_candidatos, mapeado.iterar_candidatos):
+        archivo_prueba(ruta, estacion, now)
+        primero = CheckpointArchivo(ruta, None, {})
+        leido = _correr(iterar, ruta, estacion, False, now, primero)
+        with open(ruta, newline='') as archivo:
+            lineas = archivo.readlines()
+        for i in range(5, len(lineas), 7):
+            celdas = lineas[i].split("\t")
+            if len(celdas) > 3:
+                celdas[3] = celdas[3] + "1"
+                lineas[i] = "\t".join(celdas)
+        with open(ruta, 'w', newline='') as archivo:
+            archivo.writelines(lineas)
+        segundo = CheckpointArchivo(ruta, None, dict(primero.lineas))
+        releido = _correr(iterar, ruta, estacion, False, now, segundo)
+        resultados.append((leido, releido, primero.lineas, segundo.lineas, segundo.diferidas))
+    assert resultados[0] == resultados[1], estacion.nombre
+
+
+def verificar(directorio):
+    casos = 0
+    for estacion in ESTACIONES.values():
+        ruta = os.path.join(directorio, f"verificar_{estacion.nombre}.auto.tab")
+        for now in MOMENTOS:
+            archivo_prueba(ruta, estacion, now)
+            for nocturno in (False, True):
+                _comparar(ruta, estacion, nocturno, now, (estacion.nombre, now, nocturno))
+                casos += 1
+        for variante in _variantes(ruta, estacion, MOMENTOS[0]):
+            for nocturno in (False, True):
+                _comparar(ruta, estacion, nocturno, MOMENTOS[0], (estacion.nombre, variante, nocturno))
+                casos += 1
+        _checkpoint(ruta, estacion, MOMENTOS[0])
+        casos += 1
+    print(f"verificación: {casos} casos idénticos ({len(ESTACIONES)} estaciones)")
+
+
+def medir(nombre, iterar, ruta, estacion, now, filas):
+    """Filas/s de extremo a extremo: lectura, decodificación y registro listo para insertar."""
+    metricas = MetricasEstacion(estacion.nombre, ruta)
+    inicio = time.perf_counter()
+    aceptadas = sum(1 for c in iterar(ruta, estacion, False, None, crear_contexto(now), metricas)
+                    if c.registro(estacion))
+    segundos = time.perf_counter() - inicio
+    print(f"  {nombre:<6} {filas / segundos:>12,.0f} filas/s  ({aceptadas} aceptadas, "
+          f"{metricas.contadores['fuera_de_turno']} fuera de turno, {segundos:.2f}s; "
+          f"lectura {metricas.etapas['lectura']:.2f}s, parseo {metricas.etapas['parseo']:.2f}s)")
+    return segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=1_000_000)
+    parser.add_argument("--estacion", default="pulidos", choices=list(ESTACIONES))
+    parser.add_argument("--solo-verificar", action="store_true")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as directorio:
+        verificar(directorio)
+        if args.solo_verificar:
+            return
+        estacion = ESTACIONES[args.estacion]
+        now = datetime.now()
+        ruta = os.path.join(directorio, f"scantotals_{estacion.nombre}.auto.tab")
+        filas = generar_archivo(ruta, lineas=args.lineas, dias=7, biselado=estacion.restar_inf_fails,
+                                mes_texto=estacion.regla_fecha == "mes_texto", now=now)
+        print(f"{estacion.nombre} (diurno), {filas} filas de todas las horas")
+        filas_s = medir("filas", iterar_candidatos, ruta, estacion, now, filas)
+        mmap_s = medir("mmap", mapeado.iterar_candidatos, ruta, estacion, now, filas)
+        print(f"  mejora {filas_s / mmap_s:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
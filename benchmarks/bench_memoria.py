@@ -0,0 +1,71 @@
+"""
+Benchmark de memoria de los candidatos de un archivo leído completo (lista vs. LoteCandidatos).
+
+    python -m benchmarks.bench_memoria [--lineas 200000] [--estacion pulidos] [--motor filas]
+
+Lee el mismo archivo sintético de dos formas y reporta, por cada 100 000 filas aceptadas,
+la memoria pico durante la lectura y la que queda retenida al terminar (tracemalloc), el
+tiempo de lectura y el de armar todos los registros para executemany:
+  lista  list(iterar_candidatos): un parser.Candidato con su fila de csv por fila aceptada
+         (lo que hacía pipeline antes de columnar.py)
+  lote   columnar.LoteCandidatos, como pipeline.leer_candidatos
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from scantotals import pipeline
+from scantotals.columnar import LoteCandidatos
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+
+from .sintetico import generar_archivo
+
+
+def medir(nombre, ruta, estacion, contexto):
+    iterar = pipeline.motor_lectura()
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    candidatos = iterar(ruta, estacion, False, None, contexto, None)
+    candidatos = list(candidatos) if nombre == "lista" else LoteCandidatos(candidatos)
+    lectura = time.perf_counter() - inicio
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    inicio = time.perf_counter()
+    for candidato in candidatos:
+        candidato.registro(estacion)
+    registros = time.perf_counter() - inicio
+    escala = 100_000 / max(1, len(candidatos)) / 2**20
+    print(f"  {nombre:<6} {len(candidatos):>9} aceptadas  pico {pico * escala:>7.1f} MiB  "
+          f"retenida {retenida * escala:>7.1f} MiB  (por 100k filas)  lectura {lectura:.2f}s  "
+          f"registros {registros:.2f}s")
+    return retenida
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=200_000)
+    parser.add_argument("--estacion", default="pulidos", choices=list(ESTACIONES))
+    parser.add_argument("--motor", choices=("filas", "vectorizado", "mmap"), default=pipeline.MOTOR)
+    args = parser.parse_args(argv)
+    pipeline.MOTOR = args.motor
+    estacion = ESTACIONES[args.estacion]
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "scantotals_bench.auto.tab")
+        # Horas diurnas de días anteriores: casi todas las filas se aceptan.
+        filas = generar_archivo(ruta, lineas=args.lineas, dias=3, horas=set(range(7, 21)), now=now,
+                                biselado=estacion.restar_inf_fails, mes_texto=estacion.regla_fecha == "mes_texto")
+        print(f"{args.estacion}, {filas} filas, motor {args.motor}")
+        contexto = crear_contexto(now)
+        retenidas = {nombre: medir(nombre, ruta, estacion, contexto) for nombre in ("lista", "lote")}
+        print(f"  lista vs lote (retenida) {retenidas['lista'] / max(1, retenidas['lote']):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark del parser de filas: funciones de extraccion.py (como en los app.py originales,
+con datetime.now() y expresiones sin compilar en cada fila) contra parser.ParserClave.
+
+    python -m benchmarks.bench_parser [--lineas 100000]
+
+Además verifica que ambos caminos acepten exactamente las mismas filas con los mismos valores.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.extraccion import (
+    extract_date,
+    extract_hits,
+    extract_hour,
+    extract_num,
+    in_shift_window,
+    is_valid_time_for_processing,
+)
+from scantotals.parser import ParserClave
+
+from .sintetico import generar_archivo
+
+
+def decodificar_legado(row, estacion, nocturno, now=None):
+    name_field = row[0]
+    extracted_hour = extract_hour(name_field, estacion.regla_hora)
+    if not extracted_hour or not in_shift_window(extracted_hour, nocturno):
+        return None
+    extracted_date = extract_date(name_field, extracted_hour, estacion.regla_fecha, now)
+    if not extracted_date or not is_valid_time_for_processing(extracted_hour, extracted_date, now):
+        return None
+    current_hits = extract_hits(row, estacion)
+    if current_hits is None:
+        return None
+    return (row, name_field, extracted_date, extracted_hour, extract_num(name_field), current_hits)
+
+
+def leer_filas(ruta):
+    with open(ruta, 'r') as archivo:
+        filas = list(csv.reader(archivo, delimiter='\t'))
+    inicio = next(i for i, fila in enumerate(filas) if fila and fila[0] == 'Key') + 1
+    return [fila for fila in filas[inicio:] if fila and fila[0].strip()]
+
+
+def medir(nombre, funcion, filas):
+    inicio = time.perf_counter()
+    aceptadas = sum(1 for fila in filas if funcion(fila) is not None)
+    segundos = time.perf_counter() - inicio
+    print(f"  {nombre:<10} {len(filas) / segundos:>12,.0f} filas/s  ({aceptadas} aceptadas, {segundos:.3f}s)")
+    return segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as directorio:
+        for estacion in (ESTACIONES["generadores"], ESTACIONES["biselados"], ESTACIONES["manuales"]):
+            ruta = os.path.join(directorio, f"{estacion.nombre}.auto.tab")
+            generar_archivo(ruta, lineas=args.lineas, dias=3, biselado=estacion.restar_inf_fails,
+                            mes_texto=estacion.regla_fecha == "mes_texto", now=now)
+            filas = leer_filas(ruta)
+            for nocturno in (False, True):
+                print(f"{estacion.nombre} ({'nocturno' if nocturno else 'diurno'}), {len(filas)} filas")
+                antes = medir("antes", lambda fila: decodificar_legado(fila, estacion, nocturno), filas)
+                decodificador = ParserClave(estacion, nocturno, crear_contexto(now))
+                despues = medir("después", lambda fila: None if decodificador.decodificar(fila).__class__ is str
+                                else fila, filas)
+                print(f"  mejora     {antes / despues:>12.1f}x")
+                nuevo = ParserClave(estacion, nocturno, crear_contexto(now))
+                for fila in filas:
+                    esperado = decodificar_legado(fila, estacion, nocturno, now)
+                    obtenido = nuevo.decodificar(fila)
+                    obtenido = None if obtenido.__class__ is str else tuple(obtenido)
+                    assert esperado == obtenido, (fila, esperado, obtenido)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark del pipeline completo contra el sustituto SQLite con latencia inyectada.
+
+    python -m benchmarks.bench_pipeline [--lineas 20000] [--latencia-ms 40] [--modo upsert] [--etapas]
+
+Genera archivos sintéticos para cada estación, ejecuta tres pasadas (base vacía, mismos
+archivos sin cambios y archivos con hits distintos) y reporta filas/s, sentencias,
+viajes a la base de datos y memoria pico (con --memoria). Si alguien vuelve a consultar la base por fila,
+aparece aquí como un salto en sentencias y viajes. Con --etapas, cada pasada agrega las esperas
+de las colas entre lectura, comparación y escritura (suma de las estaciones) y su profundidad máxima.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from scantotals import db, estaciones, pipeline
+from scantotals.pipeline import ejecutar
+from scantotals.sqlite_local import SQLitePool
+
+from .sintetico import generar_archivo, parse_horas
+
+
+def generar_vision(directorio, nombres, lineas, maquinas, dias, horas, densidad_na, now, semilla):
+    """Escribe el archivo vigente (según `now`) de cada estación y devuelve el total de filas."""
+    total = 0
+    for nombre in nombres:
+        estacion = estaciones.ESTACIONES[nombre]
+        archivo = estacion.archivo_noche if estaciones.es_turno_nocturno(now) else estacion.archivo_dia
+        total += generar_archivo(
+            os.path.join(directorio, archivo), lineas=lineas, maquinas=maquinas, dias=dias, horas=horas,
+            densidad_na=densidad_na, biselado=estacion.restar_inf_fails,
+            mes_texto=estacion.regla_fecha == "mes_texto", now=now, semilla=semilla,
+        )
+    return total
+
+
+def pasada(nombre, pool, nombres, filas_archivo, workers, conexiones, memoria, now):
+    antes = pool.estadisticas.copy()
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    # La salida por fila del pipeline no interesa aquí.
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultados = ejecutar(nombres, now, workers=workers, conexiones=conexiones, pool=pool)
+    segundos = time.perf_counter() - inicio
+    pico = "-"
+    if memoria:
+        pico = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+        tracemalloc.stop()
+    delta = pool.estadisticas - antes
+    escritas = sum(r.filas for r in resultados)
+    errores = [f"{r.estacion}: {r.error}" for r in resultados if r.error]
+    print(f"{nombre:<12} {filas_archivo / segundos:>10,.0f} filas/s {segundos:>8.2f}s "
+          f"{escritas:>8} escritas {delta['sentencias']:>6} sentencias {delta['viajes']:>6} viajes "
+          f"{pico:>8} MiB pico")
+    for error in errores:
+        print(f"  error {error}")
+    if pipeline.ETAPAS:
+        esperas = Counter()
+        for resultado in resultados:
+            if resultado.metricas is not None:
+                esperas.update(resultado.metricas.etapas)
+        maximos = {cola: max((r.metricas.contadores[f'cola_{cola}_max'] for r in resultados if r.metricas), default=0)
+                   for cola in ("candidatos", "lotes")}
+        print("  esperas " + " ".join(f"{etapa[7:]} {segundos:.2f}s" for etapa, segundos in sorted(esperas.items())
+                                      if etapa.startswith("espera_"))
+              + f"; cola candidatos máx. {maximos['candidatos']}, lotes máx. {maximos['lotes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("estaciones", nargs="*", default=list(estaciones.ESTACIONES))
+    parser.add_argument("--lineas", type=int, default=20_000, help="filas aproximadas por archivo")
+    parser.add_argument("--maquinas", type=int, help="máquinas por archivo (ignora --lineas)")
+    parser.add_argument("--dias", type=int, default=2)
+    parser.add_argument("--horas", type=parse_horas, help="horas a generar, p. ej. 22-6 o 6-21 (por defecto todas)")
+    parser.add_argument("--densidad-na", type=float, default=0.05, help="proporción de celdas N/A o inf%%")
+    parser.add_argument("--latencia-ms", type=float, default=40.0, help="latencia por viaje a la base de datos")
+    parser.add_argument("--modo", choices=("auto", "upsert", "reemplazo"), default=db.MODO_ESCRITURA)
+    parser.add_argument("--memoria", action="store_true",
+                        help="medir la memoria pico con tracemalloc (hace más lenta la medición de filas/s)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="escribir mientras se lee aunque los archivos sean chicos (memoria acotada)")
+    parser.add_argument("--etapas", action="store_true",
+                        help="lectura, comparación y escritura en hilos separados (pipeline.ETAPAS)")
+    parser.add_argument("--tamano-lote", type=int, default=db.TAMANO_LOTE, help="filas por lote de INSERT")
+    parser.add_argument("--commit", choices=("lote", "transaccion"), default=db.POLITICA_COMMIT)
+    parser.add_argument("--ahora", type=datetime.fromisoformat,
+                        help="hora de referencia fija, p. ej. '2026-10-10 23:55' (por defecto la actual)")
+    parser.add_argument("--workers", type=int, default=7)
+    parser.add_argument("--conexiones", type=int, default=db.TAMANO_POOL)
+    args = parser.parse_args(argv)
+
+    db.MODO_ESCRITURA = args.modo
+    db.TAMANO_LOTE = args.tamano_lote
+    db.POLITICA_COMMIT = args.commit
+    if args.streaming:
+        pipeline.LIMITE_LECTURA_COMPLETA = 0
+    pipeline.ETAPAS = args.etapas
+    now = args.ahora or datetime.now()
+    lineas = None if args.maquinas else args.lineas
+    with tempfile.TemporaryDirectory() as directorio:
+        estaciones.DIRECTORIO_VISION = directorio
+        filas = generar_vision(directorio, args.estaciones, lineas, args.maquinas, args.dias, args.horas,
+                               args.densidad_na, now, semilla=1)
+        pool = SQLitePool(os.path.join(directorio, "bench.db"), args.conexiones, args.latencia_ms / 1000)
+        print(f"{len(args.estaciones)} estaciones, {filas} filas, latencia {args.latencia_ms} ms, modo {args.modo}, "
+              f"lotes de {args.tamano_lote} con commit por {args.commit}{', streaming' if args.streaming else ''}"
+              f"{', etapas en hilos' if args.etapas else ''}")
+        pasada("inicial", pool, args.estaciones, filas, args.workers, args.conexiones, args.memoria, now)
+        pasada("sin cambios", pool, args.estaciones, filas, args.workers, args.conexiones, args.memoria, now)
+        generar_vision(directorio, args.estaciones, lineas, args.maquinas, args.dias, args.horas,
+                       args.densidad_na, now, semilla=2)
+        pasada("con cambios", pool, args.estaciones, filas, args.workers, args.conexiones, args.memoria, now)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Motor vectorizado (vectorizado.py) contra el motor por filas (pipeline.iterar_candidatos).
+
+    python -m benchmarks.bench_vectorizado [--lineas 1000000] [--solo-verificar]
+
+Primero verifica, sobre archivos sintéticos pequeños de todas las estaciones y turnos y con
+varios momentos de referencia (23:55, 03:30, fin de mes, mediodía), que ambos motores
+generen los mismos registros en el mismo orden y los mismos contadores de descarte; los
+archivos incluyen filas con N/A, hits inválidos, horas fuera de rango y claves sin día.
+Después mide filas/s de cada motor (lectura, decodificación y armado del registro) sobre un
+archivo de `--lineas` filas. En el motor vectorizado, "lectura" es read_csv y "parseo" todo el
+trabajo por columnas; en el de filas, el registro se arma fuera de "parseo". Requiere pandas.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from scantotals import vectorizado
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.pipeline import iterar_candidatos
+
+from .sintetico import CONTADORES, MOMENTOS, archivo_prueba, generar_archivo
+
+
+def _correr(iterar, ruta, estacion, nocturno, now):
+    metricas = MetricasEstacion(estacion.nombre, ruta)
+    registros = [c.registro(estacion) for c in iterar(ruta, estacion, nocturno, contexto=crear_contexto(now),
+                                                       metricas=metricas)]
+    return registros, {nombre: metricas.contadores[nombre] for nombre in CONTADORES}
+
+
+def verificar(directorio):
+    casos = 0
+    for estacion in ESTACIONES.values():
+        for now in MOMENTOS:
+            ruta = os.path.join(directorio, f"verificar_{estacion.nombre}.auto.tab")
+            archivo_prueba(ruta, estacion, now)
+            for nocturno in (False, True):
+                esperado, contadores = _correr(iterar_candidatos, ruta, estacion, nocturno, now)
+                obtenido, contadores_v = _correr(vectorizado.iterar_candidatos, ruta, estacion, nocturno, now)
+                assert contadores == contadores_v, (estacion.nombre, now, nocturno, contadores, contadores_v)
+                for fila_esperada, fila_obtenida in zip(esperado, obtenido):
+                    assert fila_esperada == fila_obtenida, (estacion.nombre, now, nocturno, fila_esperada,
+                                                            fila_obtenida)
+                assert len(esperado) == len(obtenido)
+                casos += 1
+    print(f"verificación: {casos} casos idénticos ({len(ESTACIONES)} estaciones, {len(MOMENTOS)} momentos, 2 turnos)")
+
+
+def medir(nombre, iterar, ruta, estacion, nocturno, now, filas):
+    """Filas/s de extremo a extremo: lectura, decodificación y registro listo para insertar."""
+    metricas = MetricasEstacion(estacion.nombre, ruta)
+    inicio = time.perf_counter()
+    aceptadas = sum(1 for c in iterar(ruta, estacion, nocturno, contexto=crear_contexto(now), metricas=metricas)
+                    if c.registro(estacion))
+    segundos = time.perf_counter() - inicio
+    print(f"  {nombre:<12} {filas / segundos:>12,.0f} filas/s  ({aceptadas} aceptadas, {segundos:.2f}s; "
+          f"lectura {metricas.etapas['lectura']:.2f}s, parseo {metricas.etapas['parseo']:.2f}s)")
+    return segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=1_000_000)
+    parser.add_argument("--estacion", default="biselados", choices=list(ESTACIONES))
+    parser.add_argument("--solo-verificar", action="store_true")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as directorio:
+        verificar(directorio)
+        if args.solo_verificar:
+            return
+        estacion = ESTACIONES[args.estacion]
+        now = datetime.now()
+        ruta = os.path.join(directorio, f"scantotals_{estacion.nombre}.auto.tab")
+        # Todas las horas del turno diurno en días anteriores: casi todas las filas se aceptan.
+        filas = generar_archivo(ruta, lineas=args.lineas, dias=7, horas=set(range(7, 21)),
+                                biselado=estacion.restar_inf_fails,
+                                mes_texto=estacion.regla_fecha == "mes_texto", now=now)
+        print(f"{estacion.nombre} (diurno), {filas} filas")
+        filas_s = medir("filas", iterar_candidatos, ruta, estacion, False, now, filas)
+        vector_s = medir("vectorizado", vectorizado.iterar_candidatos, ruta, estacion, False, now, filas)
+        print(f"  mejora       {filas_s / vector_s:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Generador de archivos scantotals_*.auto.tab sintéticos.
+
+Reproduce el formato de VISION: unas líneas de encabezado, la cabecera 'Key' y una fila
+por máquina y media hora con la clave '<num> <máquina>-<día> HH:MM' (o '<num> <máquina>-<Mes>-<día> HH:MM'
+con mes_texto, como en Manuales).
+"""
+import random
+from datetime import datetime, timedelta
+
+CABECERA = ["Key", "Mean", "Median", "Hits", "Multi", "INF Fails", "Shortest", "Longest", "Total", "StdDev"]
+MESES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _valor(rnd, densidad_na, texto):
+    if rnd.random() < densidad_na:
+        return rnd.choice(("N/A", "inf%"))
+    return texto
+
+
+def parse_horas(texto):
+    """Convierte '22-6' o '6,7,8' en el conjunto de horas; los rangos pueden cruzar la medianoche."""
+    horas = set()
+    for parte in texto.split(','):
+        if '-' in parte:
+            desde, hasta = (int(x) for x in parte.split('-'))
+            hora = desde
+            while True:
+                horas.add(hora)
+                if hora == hasta:
+                    break
+                hora = (hora + 1) % 24
+        else:
+            horas.add(int(parte))
+    return horas
+
+
+def filas_sinteticas(maquinas=20, dias=2, densidad_na=0.05, biselado=False, mes_texto=False,
+                     now=None, semilla=0, horas=None):
+    """
+    Genera las filas (listas de celdas) después de la cabecera 'Key': una por máquina y media hora
+    de los últimos `dias` días, limitadas a `horas` si se indica.
+    """
+    rnd = random.Random(semilla)
+    now = now or datetime.now()
+    inicio = (now - timedelta(days=dias - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    for paso in range(dias * 48):
+        momento = inicio + timedelta(minutes=30 * paso)
+        if horas is not None and momento.hour not in horas:
+            continue
+        dia = f"{MESES[momento.month - 1]}-{momento.day:02d}" if mes_texto else f"{momento.day:02d}"
+        for maquina in range(maquinas):
+            hits = rnd.randint(0, 400)
+            inf_fails = rnd.randint(0, 5) if biselado else 0
+            mean = rnd.uniform(5, 90)
+            yield [
+                f"{maquina + 1:03d} MAQ{maquina:02d}-{dia} {momento.hour:02d}:{momento.minute:02d}",
+                _valor(rnd, densidad_na, f"{mean:.2f}"),
+                _valor(rnd, densidad_na, f"{mean * 0.9:.2f}"),
+                str(hits),
+                _valor(rnd, densidad_na, f"{rnd.uniform(0, 30):.1f}%"),
+                _valor(rnd, densidad_na, str(inf_fails)),
+                _valor(rnd, densidad_na, f"{mean * 0.2:.2f}"),
+                _valor(rnd, densidad_na, f"{mean * 3:.2f}"),
+                _valor(rnd, densidad_na, f"{mean * hits:.1f}"),
+                _valor(rnd, densidad_na, f"{rnd.uniform(0, 10):.2f}"),
+            ]
+
+
+def generar_archivo(ruta, lineas=None, **opciones):
+    """
+    Escribe un archivo sintético. Con `lineas` se ajusta la cantidad de máquinas para
+    aproximar ese número de filas de datos. Devuelve el número de filas escritas.
+    """
+    if lineas is not None:
+        medias_horas = 2 * len(opciones.get('horas') or range(24))
+        opciones['maquinas'] = max(1, lineas // (medias_horas * opciones.get('dias', 2)))
+    escritas = 0
+    with open(ruta, 'w', newline='') as archivo:
+        archivo.write("Scan Totals Report\n")
+        archivo.write(f"Generated\t{datetime.now():%m/%d/%Y %H:%M}\n\n")
+        archivo.write("\t".join(CABECERA) + "\n")
+        for fila in filas_sinteticas(**opciones):
+            archivo.write("\t".join(fila) + "\n")
+            escritas += 1
+    return escritas
+
+
+# Momentos de referencia con los que se verifica que los motores de lectura coincidan.
+MOMENTOS = (
+    datetime(2026, 10, 10, 23, 55),
+    datetime(2026, 10, 1, 3, 30),
+    datetime(2026, 10, 31, 12, 0),
+    datetime(2026, 12, 31, 23, 50),
+    datetime(2026, 3, 1, 0, 15),
+)
+CONTADORES = ("filas", "aceptadas", "futuro", "fuera_de_turno", "hora_invalida", "sin_fecha", "hits_invalidos")
+
+
+def filas_raras(now, mes_texto):
+    """Filas que ejercitan los casos límite de los motores de lectura."""
+    dia = f"{now:%b}-{now.day:02d}" if mes_texto else f"{now.day:02d}"
+    celdas = ["1.5", "N/A", "{hits}", "3.0%", "{inf}", "0:45", "", "inf%", "2.00"]
+    plantillas = [
+        ("001 MAQ01-{dia} 23:30", "12", "1"),
+        ("002 MAQ02-{dia} 23:00", "7", "N/A"),
+        ("003 MAQ03-{dia} 23:45", "9", "0"),
+        ("004 MAQ04-{dia} 24:10", "5", "0"),
+        ("005 MAQ05-{dia} 12:75", "5", "0"),
+        ("006 MAQ06-{dia} 10:00", "N/A", "0"),
+        ("007 MAQ07-{dia} 10:00", " 42 ", "x"),
+        ("MAQ08-{dia} 02:30", "3", "1"),
+        ("009 MAQ09 10:00", "3", "1"),
+        ("010 MAQ10-xx 10:00", "3", "1"),
+        ("011 MAQ11-{dia} sin hora", "3", "1"),
+        ("012 MAQ12-31 05:00", "3", "1"),
+        ("013 MAQ13-{dia} 21:45", "-4", "2"),
+    ]
+    for clave, hits, inf in plantillas:
+        fila = [clave.format(dia=dia)] + [c.format(hits=hits, inf=inf) for c in celdas]
+        yield "\t".join(fila)
+    yield "   "
+    yield "Key\tMean"
+
+
+def archivo_prueba(ruta, estacion, now):
+    """Archivo pequeño de `estacion` con filas normales y las de filas_raras, para verificar motores."""
+    mes_texto = estacion.regla_fecha == "mes_texto"
+    generar_archivo(ruta, maquinas=3, dias=3, densidad_na=0.2, biselado=estacion.restar_inf_fails,
+                    mes_texto=mes_texto, now=now)
+    with open(ruta, 'a', newline='') as archivo:
+        for linea in filas_raras(now, mes_texto):
+            archivo.write(linea + "\n")
@@ -0,0 +1,52 @@
+-- Clave única (name, fecha, hour) para las siete tablas de scantotals.
+--
+-- Requisito del modo de escritura "upsert" (INSERT ... ON DUPLICATE KEY UPDATE) de los scripts.
+-- Las columnas van en el orden (fecha, hour, name): la consulta de hits existentes de los
+-- scripts filtra por WHERE fecha IN (...) (db.sql_existentes) y usa el prefijo fecha de la clave;
+-- con name primero recorrería la tabla completa.
+-- Antes de crear la clave se eliminan los duplicados conservando, por cada (name, fecha, hour),
+-- el registro con más hits. La tabla original queda respaldada como <tabla>_respaldo_001.
+--
+-- Ejecutar en una ventana sin ingesta activa (los scripts programados detenidos).
+
+-- generadores
+CREATE TABLE generadores_dedup LIKE generadores;
+ALTER TABLE generadores_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO generadores_dedup SELECT * FROM generadores ORDER BY hits DESC;
+RENAME TABLE generadores TO generadores_respaldo_001, generadores_dedup TO generadores;
+
+-- manuales
+CREATE TABLE manuales_dedup LIKE manuales;
+ALTER TABLE manuales_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO manuales_dedup SELECT * FROM manuales ORDER BY hits DESC;
+RENAME TABLE manuales TO manuales_respaldo_001, manuales_dedup TO manuales;
+
+-- biselados
+CREATE TABLE biselados_dedup LIKE biselados;
+ALTER TABLE biselados_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO biselados_dedup SELECT * FROM biselados ORDER BY hits DESC;
+RENAME TABLE biselados TO biselados_respaldo_001, biselados_dedup TO biselados;
+
+-- pulidos
+CREATE TABLE pulidos_dedup LIKE pulidos;
+ALTER TABLE pulidos_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO pulidos_dedup SELECT * FROM pulidos ORDER BY hits DESC;
+RENAME TABLE pulidos TO pulidos_respaldo_001, pulidos_dedup TO pulidos;
+
+-- engravers
+CREATE TABLE engravers_dedup LIKE engravers;
+ALTER TABLE engravers_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO engravers_dedup SELECT * FROM engravers ORDER BY hits DESC;
+RENAME TABLE engravers TO engravers_respaldo_001, engravers_dedup TO engravers;
+
+-- bloqueo_de_tallados
+CREATE TABLE bloqueo_de_tallados_dedup LIKE bloqueo_de_tallados;
+ALTER TABLE bloqueo_de_tallados_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO bloqueo_de_tallados_dedup SELECT * FROM bloqueo_de_tallados ORDER BY hits DESC;
+RENAME TABLE bloqueo_de_tallados TO bloqueo_de_tallados_respaldo_001, bloqueo_de_tallados_dedup TO bloqueo_de_tallados;
+
+-- bloqueo_de_terminados
+CREATE TABLE bloqueo_de_terminados_dedup LIKE bloqueo_de_terminados;
+ALTER TABLE bloqueo_de_terminados_dedup ADD UNIQUE KEY uq_name_fecha_hour (fecha, hour, name);
+INSERT IGNORE INTO bloqueo_de_terminados_dedup SELECT * FROM bloqueo_de_terminados ORDER BY hits DESC;
+RENAME TABLE bloqueo_de_terminados TO bloqueo_de_terminados_respaldo_001, bloqueo_de_terminados_dedup TO bloqueo_de_terminados;
@@ -0,0 +1,31 @@
+-- Columna huella para la sincronización diferencial de las siete tablas de scantotals.
+--
+-- huella es un hash de 63 bits (db.huella) de las columnas ya limpias de la fila, salvo la clave
+-- (name, fecha, hour). Con la columna presente, los scripts la leen junto con los hits y solo
+-- escriben las filas cuya huella cambió; las filas existentes quedan con huella NULL y se
+-- reescriben una vez, la próxima vez que aparezcan en un archivo.
+--
+-- Se detecta al arrancar cada proceso (db.tiene_huella): reiniciar el modo daemon o vigilancia
+-- después de aplicarla. No requiere detener la ingesta, pero ALTER TABLE puede bloquear la tabla
+-- unos segundos en tablas grandes.
+
+-- generadores
+ALTER TABLE generadores ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- manuales
+ALTER TABLE manuales ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- biselados
+ALTER TABLE biselados ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- pulidos
+ALTER TABLE pulidos ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- engravers
+ALTER TABLE engravers ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- bloqueo_de_tallados
+ALTER TABLE bloqueo_de_tallados ADD COLUMN huella BIGINT UNSIGNED NULL;
+
+-- bloqueo_de_terminados
+ALTER TABLE bloqueo_de_terminados ADD COLUMN huella BIGINT UNSIGNED NULL;
@@ -0,0 +1,128 @@
+-- Resumen por estación, turno y hora (scantotals/resumen.py).
+--
+-- resumen_turnos guarda por (estacion, fecha, turno, hour) las filas, la suma de hits, la media
+-- ponderada por hits y el mínimo de shortest y el máximo de longest, para que los tableros no
+-- agreguen la tabla cruda en cada consulta. turno es 'DIA' (06:30 a 21:30) o 'NVO' (el resto:
+-- 22:00 a 06:00). shortest y longest son texto en la tabla cruda: se comparan como números
+-- (MIN sobre el texto daría '10.2' < '9.5'), y las horas 'H:MM' de manuales, en segundos
+-- (la misma expresión que resumen._numerico).
+--
+-- Los scripts detectan la tabla al arrancar cada proceso (resumen.disponible) y, desde entonces,
+-- recalculan en cada lote las horas que escribieron, en la misma transacción. El índice
+-- (fecha, hour) de cada tabla cruda hace que ese recálculo lea solo las filas de la hora.
+--
+-- Ejecutar en una ventana sin ingesta activa (los scripts programados detenidos): el llenado
+-- inicial agrega todo el histórico y las filas escritas entre el llenado y el reinicio de los
+-- scripts no quedarían en el resumen.
+
+CREATE TABLE resumen_turnos (
+    estacion VARCHAR(32) NOT NULL,
+    fecha DATE NOT NULL,
+    turno CHAR(3) NOT NULL,
+    hour VARCHAR(5) NOT NULL,
+    filas INT UNSIGNED NOT NULL,
+    hits BIGINT NULL,
+    mean_ponderada DOUBLE NULL,
+    shortest_min DOUBLE NULL,
+    longest_max DOUBLE NULL,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (estacion, fecha, turno, hour)
+);
+
+-- generadores
+ALTER TABLE generadores ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'generadores', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM generadores GROUP BY fecha, turno_hora, hour;
+
+-- manuales
+ALTER TABLE manuales ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'manuales', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM manuales GROUP BY fecha, turno_hora, hour;
+
+-- biselados
+ALTER TABLE biselados ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'biselados', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM biselados GROUP BY fecha, turno_hora, hour;
+
+-- pulidos
+ALTER TABLE pulidos ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'pulidos', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM pulidos GROUP BY fecha, turno_hora, hour;
+
+-- engravers
+ALTER TABLE engravers ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'engravers', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM engravers GROUP BY fecha, turno_hora, hour;
+
+-- bloqueo_de_tallados
+ALTER TABLE bloqueo_de_tallados ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'bloqueo_de_tallados', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM bloqueo_de_tallados GROUP BY fecha, turno_hora, hour;
+
+-- bloqueo_de_terminados
+ALTER TABLE bloqueo_de_terminados ADD INDEX ix_fecha_hour (fecha, hour);
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT 'bloqueo_de_terminados', fecha,
+       IF(TIME_TO_SEC(hour) BETWEEN 390 * 60 AND 1290 * 60, 'DIA', 'NVO') AS turno_hora, hour, COUNT(*), SUM(hits),
+       SUM(mean * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN(CASE WHEN INSTR(shortest, ':') > 0
+                THEN SUBSTR(shortest, 1, INSTR(shortest, ':') - 1) * 3600 + SUBSTR(shortest, INSTR(shortest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(shortest), '') + 0 END),
+       MAX(CASE WHEN INSTR(longest, ':') > 0
+                THEN SUBSTR(longest, 1, INSTR(longest, ':') - 1) * 3600 + SUBSTR(longest, INSTR(longest, ':') + 1) * 60
+                ELSE NULLIF(TRIM(longest), '') + 0 END)
+FROM bloqueo_de_terminados GROUP BY fecha, turno_hora, hour;
@@ -0,0 +1,46 @@
+-- Columna actualizado para la caché de existentes (--cache, scantotals/cache.py).
+--
+-- actualizado cambia en cada INSERT y en cada UPDATE que modifica la fila, de cualquier escritor.
+-- Con la columna presente, la caché pide por cada fecha solo las filas con actualizado reciente
+-- y el total de filas, en lugar de todas las filas de la fecha. El índice (fecha, actualizado)
+-- hace que esa consulta no recorra la fecha completa. Sin la columna, --cache no tiene efecto
+-- en la tabla.
+--
+-- Se detecta al arrancar cada proceso (db.tiene_columna): reiniciar el modo daemon o vigilancia
+-- después de aplicarla. Las filas existentes quedan con la hora de la migración. No requiere
+-- detener la ingesta, pero ALTER TABLE puede bloquear la tabla unos segundos en tablas grandes.
+
+-- generadores
+ALTER TABLE generadores
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- manuales
+ALTER TABLE manuales
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- biselados
+ALTER TABLE biselados
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- pulidos
+ALTER TABLE pulidos
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- engravers
+ALTER TABLE engravers
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- bloqueo_de_tallados
+ALTER TABLE bloqueo_de_tallados
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
+
+-- bloqueo_de_terminados
+ALTER TABLE bloqueo_de_terminados
+    ADD COLUMN actualizado TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX ix_fecha_actualizado (fecha, actualizado);
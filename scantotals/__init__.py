@@ -0,0 +1,6 @@
+"""
+Ingesta unificada de los archivos scantotals_*.auto.tab de VISION.
+
+Cada estación (generadores, pulidos, biselados, ...) se describe en estaciones.ESTACIONES;
+pipeline.ejecutar procesa cualquier subconjunto de ellas en un solo proceso y con una sola conexión.
+"""
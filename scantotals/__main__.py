@@ -0,0 +1,117 @@
+"""
+Punto de entrada: python -m scantotals [estación ...]
+
+Sin argumentos procesa las siete estaciones en paralelo, en un solo proceso.
+Para reingerir archivos archivados: python -m scantotals.backfill (ver backfill.py).
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from . import bitacora, contexto, db, pipeline
+from .cache import CACHE_PATH, CacheExistentes
+from .checkpoint import CHECKPOINT_PATH, RegistroCheckpoints
+from .daemon import INTERVALO_SEGUNDOS, ejecutar_daemon
+from .estaciones import ESTACIONES
+from .metricas import METRICAS_PATH, RegistroMetricas
+from .pipeline import MAX_WORKERS, ejecutar
+from .spool import SPOOL_PATH, Drenador, Spool
+from .vigilancia import BARRIDO_SEGUNDOS, DEBOUNCE_SEGUNDOS, SONDEO_SEGUNDOS, ejecutar_vigilancia
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="scantotals", description="Ingesta de archivos scantotals de VISION.")
+    parser.add_argument("estaciones", nargs="*", metavar="estación",
+                        help=f"estaciones a procesar (por defecto todas): {', '.join(ESTACIONES)}")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"hilos para leer y procesar archivos (por defecto {MAX_WORKERS})")
+    parser.add_argument("--conexiones", type=int, default=db.TAMANO_POOL,
+                        help=f"conexiones simultáneas a la base de datos (por defecto {db.TAMANO_POOL})")
+    parser.add_argument("--daemon", action="store_true",
+                        help="mantener el pool de conexiones y repetir la ingesta cada --intervalo segundos")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_SEGUNDOS,
+                        help=f"segundos entre ciclos en modo daemon (por defecto {INTERVALO_SEGUNDOS})")
+    parser.add_argument("--vigilar", action="store_true",
+                        help="procesar cada estación cuando su archivo cambia, en lugar de a intervalos fijos")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SEGUNDOS,
+                        help=f"segundos sin cambios antes de procesar un archivo (por defecto {DEBOUNCE_SEGUNDOS})")
+    parser.add_argument("--sondeo", type=float, default=SONDEO_SEGUNDOS,
+                        help=f"segundos entre sondeos de mtime en recursos de red (por defecto {SONDEO_SEGUNDOS})")
+    parser.add_argument("--barrido", type=float, default=BARRIDO_SEGUNDOS,
+                        help=f"segundos entre barridos completos en modo vigilancia (por defecto {BARRIDO_SEGUNDOS})")
+    parser.add_argument("--sqlite", metavar="RUTA",
+                        help="usar una base SQLite local en lugar de MySQL (pruebas)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="omitir archivos sin cambios y parsear solo las líneas nuevas o modificadas")
+    parser.add_argument("--checkpoints", metavar="RUTA", default=CHECKPOINT_PATH,
+                        help=f"archivo de checkpoints del modo incremental (por defecto {CHECKPOINT_PATH})")
+    parser.add_argument("--spool", metavar="RUTA", nargs="?", const=SPOOL_PATH,
+                        help="guardar primero las filas en un spool SQLite local y enviarlas a la base de datos "
+                             f"en segundo plano, con reintentos (por defecto {SPOOL_PATH})")
+    parser.add_argument("--cache", metavar="RUTA", nargs="?", const=CACHE_PATH,
+                        help="guardar los hits existentes de las fechas recientes en una caché SQLite local y "
+                             f"pedir a la base de datos solo los cambios; requiere la migración 004 "
+                             f"(por defecto {CACHE_PATH})")
+    parser.add_argument("--metricas", metavar="RUTA", default=METRICAS_PATH,
+                        help=f"archivo JSON lines con tiempos por etapa y contadores (por defecto {METRICAS_PATH})")
+    parser.add_argument("--sin-metricas", action="store_true", help="no escribir el archivo de métricas")
+    nivel = parser.add_mutually_exclusive_group()
+    nivel.add_argument("--traza", dest="nivel", action="store_const", const=logging.DEBUG, default=logging.INFO,
+                       help="registrar cada fila procesada u omitida (lento en archivos grandes)")
+    nivel.add_argument("--silencioso", dest="nivel", action="store_const", const=logging.WARNING,
+                       help="registrar solo advertencias y errores")
+    parser.add_argument("--etapas", action="store_true",
+                        help="leer, comparar y escribir cada estación en hilos separados, con colas acotadas")
+    parser.add_argument("--asincrono", action="store_true",
+                        help="ejecución única con el pipeline asyncio, que solapa lectura y escritura "
+                             "(requiere aiomysql salvo con --sqlite)")
+    parser.add_argument("--motor", choices=("filas", "vectorizado", "mmap"), default=pipeline.MOTOR,
+                        help="motor de lectura; 'vectorizado' requiere pandas, 'mmap' mapea el archivo "
+                             "(por defecto filas)")
+    parser.add_argument("--ahora", metavar="'AAAA-MM-DD HH:MM'", type=datetime.fromisoformat,
+                        help="fijar la hora de referencia en lugar del reloj (pruebas y reprocesos)")
+    parser.add_argument("--log", metavar="RUTA", help="copiar el registro a este archivo además de la consola")
+    args = parser.parse_args(argv)
+    desconocidas = [nombre for nombre in args.estaciones if nombre not in ESTACIONES]
+    if desconocidas:
+        parser.error(f"estación desconocida: {', '.join(desconocidas)}")
+    if args.asincrono and (args.daemon or args.vigilar or args.spool or args.cache or args.etapas):
+        parser.error("--asincrono no se combina con --daemon, --vigilar, --spool, --cache ni --etapas")
+    bitacora.configurar(args.nivel, args.log)
+    if args.ahora:
+        contexto.reloj = lambda: args.ahora
+    if args.sqlite:
+        db.SQLITE_PATH = args.sqlite
+    pipeline.MOTOR = args.motor
+    pipeline.ETAPAS = args.etapas
+    if args.cache:
+        pipeline.CACHE = CacheExistentes(args.cache)
+    checkpoints = RegistroCheckpoints(args.checkpoints) if args.incremental else None
+    metricas = None if args.sin_metricas else RegistroMetricas(args.metricas)
+    spool = Spool(args.spool) if args.spool else None
+    if args.vigilar:
+        ejecutar_vigilancia(args.estaciones or None, args.debounce, args.sondeo, args.barrido,
+                            workers=args.workers, conexiones=args.conexiones, checkpoints=checkpoints,
+                            metricas=metricas, spool=spool)
+    elif args.daemon:
+        ejecutar_daemon(args.estaciones or None, args.intervalo, workers=args.workers, conexiones=args.conexiones,
+                        checkpoints=checkpoints, metricas=metricas, spool=spool)
+    elif args.asincrono:
+        # aiomysql es opcional: solo se importa con --asincrono (y asyncio con él).
+        import asyncio
+        from . import asincrono
+        asyncio.run(asincrono.ejecutar(args.estaciones or None, conexiones=args.conexiones, checkpoints=checkpoints,
+                                       metricas=metricas))
+    elif spool is not None:
+        # Lo pendiente de ejecuciones anteriores se envía mientras se leen los archivos.
+        drenador = Drenador(spool, registro_metricas=metricas).iniciar()
+        ejecutar(args.estaciones or None, workers=args.workers, checkpoints=checkpoints, metricas=metricas,
+                 spool=spool)
+        drenador.vaciar()
+    else:
+        ejecutar(args.estaciones or None, workers=args.workers, conexiones=args.conexiones, checkpoints=checkpoints,
+                 metricas=metricas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Pipeline asíncrono (asyncio): la lectura de cada archivo se solapa con la escritura.
+
+    python -m scantotals --asincrono [estación ...]
+
+Cada estación corre en tres etapas unidas por colas acotadas:
+  1. lectura: un hilo lee y parsea el archivo (pipeline.motor_lectura) y pasa los candidatos
+     en bloques de TAMANO_BLOQUE por una cola de COLA_BLOQUES bloques;
+  2. comparación: una corrutina compara cada candidato con los hits existentes, consultados
+     por fecha como en escribir_candidatos en streaming, y arma los lotes;
+  3. escritura: otra corrutina envía los lotes (cola de COLA_LOTES lotes) con executemany,
+     recalcula resumen_turnos y confirma según db.POLITICA_COMMIT.
+Mientras un lote viaja al proxy, el hilo de lectura sigue parseando y la comparación arma el
+siguiente lote. Si la base de datos no da abasto, las colas llenas frenan la lectura y la
+memoria queda acotada.
+
+La semántica es la de pipeline.escribir_candidatos en streaming: comparación de hits o de
+huella (pipeline.comparar_candidato), duplicados dentro del archivo, upsert o reemplazo,
+política de commit y resumen. Cada estación usa una sola conexión, por turnos (un
+asyncio.Lock): una consulta de existentes nunca corre a la vez que un lote de la misma
+transacción, y antes de volver a consultar una fecha se espera a que sus lotes estén escritos.
+La caché (--cache) no se usa en este modo.
+
+El driver es aiomysql, una dependencia opcional que solo se importa en este modo; con
+db.SQLITE_PATH se usa sqlite_local en hilos, para pruebas sin MySQL.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from . import db, resumen
+from .contexto import crear_contexto
+from .estaciones import ESTACIONES, seleccionar_archivo
+from .metricas import MetricasEstacion
+from .pipeline import (FECHAS_EN_MEMORIA, ResultadoEstacion, clave_candidato, comparar_candidato,
+                       confirmar_checkpoint, motor_lectura, resumir)
+
+log = logging.getLogger(__name__)
+
+# Candidatos por bloque entre la lectura y la comparación.
+TAMANO_BLOQUE = 1000
+# Bloques leídos y lotes armados que pueden esperar en cada cola.
+COLA_BLOQUES = 8
+COLA_LOTES = 4
+
+# Errores de aiomysql; crear_pool los agrega al importarlo.
+_errores_aiomysql = ()
+
+_FIN = object()
+
+
+class _Fallo:
+    """Error de la lectura, pasado por la cola a la comparación."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _errores():
+    """Errores de base de datos: db.Error se lee al capturar, porque db.conector() lo reemplaza."""
+    return db.Error + _errores_aiomysql
+
+
+class _CursorMedido:
+    """metricas.CursorMedido para un cursor asíncrono: cuenta cada execute/executemany como una sentencia."""
+
+    def __init__(self, cursor, metricas):
+        self._cursor = cursor
+        self._metricas = metricas
+
+    async def execute(self, query, params=()):
+        self._metricas.contadores['sentencias'] += 1
+        await self._cursor.execute(query, params)
+
+    async def executemany(self, query, seq_params):
+        self._metricas.contadores['sentencias'] += 1
+        await self._cursor.executemany(query, seq_params)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class _CursorSQLite:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, query, params=()):
+        await asyncio.to_thread(self._cursor.execute, query, params)
+
+    async def executemany(self, query, seq_params):
+        await asyncio.to_thread(self._cursor.executemany, query, seq_params)
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def close(self):
+        self._cursor.close()
+
+
+class _ConexionSQLite:
+    def __init__(self, connection):
+        self._connection = connection
+
+    async def cursor(self):
+        return _CursorSQLite(self._connection.cursor())
+
+    async def ping(self, reconnect=True):
+        await asyncio.to_thread(self._connection.ping)
+
+    async def commit(self):
+        await asyncio.to_thread(self._connection.commit)
+
+    async def rollback(self):
+        await asyncio.to_thread(self._connection.rollback)
+
+
+class PoolSQLite:
+    """sqlite_local.SQLitePool con la parte de la interfaz de aiomysql que usa este módulo."""
+
+    def __init__(self, path, pool_size):
+        from .sqlite_local import SQLitePool
+        self._pool = SQLitePool(path, pool_size)
+        self._libres = asyncio.Semaphore(pool_size)
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._libres:
+            connection = self._pool.get_connection()
+            try:
+                yield _ConexionSQLite(connection)
+            finally:
+                connection.close()
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+async def crear_pool(conexiones=db.TAMANO_POOL):
+    """Pool de conexiones asíncronas: aiomysql con db.DB_CONFIG, o sqlite_local con db.SQLITE_PATH."""
+    global _errores_aiomysql
+    if db.SQLITE_PATH:
+        pool = PoolSQLite(db.SQLITE_PATH, conexiones)
+    else:
+        import aiomysql
+        _errores_aiomysql = (aiomysql.Error,)
+        config = dict(db.DB_CONFIG)
+        config['db'] = config.pop('database')
+        pool = await aiomysql.create_pool(minsize=1, maxsize=conexiones, autocommit=False, **config)
+    log.info("Pool asíncrono de %d conexiones establecido exitosamente.", conexiones)
+    return pool
+
+
+async def _preparar(cursor, tabla):
+    """Modo de escritura, columna huella, tabla de resumen y max_allowed_packet, con las cachés de db y resumen."""
+    return (await db.resolve_write_mode_async(cursor, tabla), await db.tiene_huella_async(cursor, tabla),
+            await resumen.disponible_async(cursor), await db.max_allowed_packet_async(cursor))
+
+
+class EscritorLotesAsync:
+    """
+    Versión asíncrona de db.EscritorLotes (mismos límites de filas, bytes y max_allowed_packet,
+    DELETE del modo reemplazo en el mismo lote, política de commit). agregar() arma los lotes
+    y los pasa a la corrutina de escritura por una cola de COLA_LOTES lotes; `uso` es el
+    asyncio.Lock de la conexión, compartido con las consultas de existentes.
+    """
+
+    def __init__(self, connection, cursor, uso, tabla, use_upsert, max_allowed_packet, metricas, con_huella=False,
+                 al_enviar=None, filas=None, bytes_lote=None, politica=None):
+        self.connection = connection
+        self.cursor = cursor
+        self.tabla = tabla
+        self.politica = politica or db.POLITICA_COMMIT
+        self.escritas = 0
+        self.lotes = 0
+        self._uso = uso
+        self._sql = db.sql_insert(tabla, use_upsert, con_huella)
+        self._sql_borrar = db.sql_borrar(tabla)
+        self._filas = filas or db.TAMANO_LOTE
+        limite_paquete = max_allowed_packet - len(self._sql) - 1024
+        self._bytes = max(1, min(bytes_lote or db.BYTES_LOTE, limite_paquete))
+        self._medir = metricas.medir
+        self._al_enviar = al_enviar
+        self._registros = []
+        self._borrar = []
+        self._bytes_pendientes = 0
+        self._cola = asyncio.Queue(COLA_LOTES)
+        self._error = None
+        self._tarea = asyncio.ensure_future(self._escribir())
+
+    async def agregar(self, registro, borrar=None):
+        tamano = db.bytes_registro(registro)
+        if self._registros and self._bytes_pendientes + tamano > self._bytes:
+            await self.enviar()
+        self._registros.append(registro)
+        self._bytes_pendientes += tamano
+        if borrar is not None:
+            self._borrar.append(borrar)
+        if len(self._registros) >= self._filas:
+            await self.enviar()
+
+    async def enviar(self):
+        """Pasa el lote pendiente a la escritura (espera si la cola está llena)."""
+        self._revisar()
+        if not self._registros:
+            return
+        await self._cola.put((self._registros, self._borrar))
+        self._registros = []
+        self._borrar = []
+        self._bytes_pendientes = 0
+
+    async def vaciar(self):
+        """Envía lo pendiente y espera a que todos los lotes estén escritos."""
+        await self.enviar()
+        await self._cola.join()
+        self._revisar()
+
+    async def cerrar(self):
+        """Escribe lo pendiente, confirma y devuelve el total de filas escritas."""
+        await self.vaciar()
+        await self._cola.put(_FIN)
+        await self._tarea
+        if self.politica != "lote" and self.lotes:
+            async with self._uso:
+                with self._medir('commit'):
+                    await self.connection.commit()
+        return self.escritas
+
+    def cancelar(self):
+        self._tarea.cancel()
+
+    def _revisar(self):
+        if self._error is not None:
+            raise self._error
+
+    async def _escribir(self):
+        while True:
+            lote = await self._cola.get()
+            try:
+                if lote is _FIN:
+                    return
+                # Después de un error se descartan los lotes: el que espera en la cola lo ve en _revisar().
+                if self._error is None:
+                    await self._enviar_lote(*lote)
+            except Exception as err:
+                self._error = err
+            finally:
+                self._cola.task_done()
+
+    async def _enviar_lote(self, registros, borrar):
+        async with self._uso:
+            if borrar:
+                with self._medir('borrado'):
+                    for name, fecha, hour in borrar:
+                        await self.cursor.execute(self._sql_borrar, (name.strip(), fecha, hour))
+            with self._medir('insercion'):
+                await self.cursor.executemany(self._sql, registros)
+            if self._al_enviar is not None:
+                with self._medir('resumen'):
+                    await self._al_enviar(registros)
+            self.escritas += len(registros)
+            self.lotes += 1
+            if self.politica == "lote":
+                with self._medir('commit'):
+                    await self.connection.commit()
+
+
+async def escribir_bloques(connection, estacion, bloques, metricas):
+    """
+    Etapas de comparación y escritura: recibe los candidatos por bloques (iterador asíncrono)
+    y los escribe como pipeline.escribir_candidatos en streaming. Devuelve las filas escritas.
+    """
+    contadores = metricas.contadores
+    cursor = _CursorMedido(await connection.cursor(), metricas)
+    uso = asyncio.Lock()
+    escritor = None
+    try:
+        with metricas.medir('consulta_existentes'):
+            use_upsert, con_huella, con_resumen, paquete = await _preparar(cursor, estacion.tabla)
+
+        async def resumir(registros):
+            for query, parametros, horas in resumen.sentencias(estacion, registros):
+                await cursor.execute(query, parametros)
+                contadores['horas_resumidas'] += horas
+
+        escritor = EscritorLotesAsync(connection, cursor, uso, estacion.tabla, use_upsert, paquete, metricas,
+                                      con_huella=con_huella, al_enviar=resumir if con_resumen else None)
+        por_fecha = OrderedDict()
+        consultadas = set()
+        async for bloque in bloques:
+            for candidato in bloque:
+                extracted_date, current_hits = candidato[2], candidato[5]
+                ventana = por_fecha.get(extracted_date)
+                if ventana is None:
+                    if extracted_date in consultadas:
+                        # La fecha salió de la ventana: sus lotes se escriben antes de volver a consultarla.
+                        await escritor.vaciar()
+                    with metricas.medir('consulta_existentes'):
+                        async with uso:
+                            await cursor.execute(*db.sql_existentes(estacion.tabla, {extracted_date}, con_huella))
+                            filas = await cursor.fetchall()
+                    ventana = por_fecha[extracted_date] = (db.indice_existentes(filas, con_huella), {})
+                    consultadas.add(extracted_date)
+                    if len(por_fecha) > FECHAS_EN_MEMORIA:
+                        por_fecha.popitem(last=False)
+                    contadores['consultas_por_fecha'] += 1
+                existing_index, vistos = ventana
+                clave = clave_candidato(candidato)
+                visto = vistos.get(clave)
+                if visto is not None:
+                    contadores['duplicadas'] += 1
+                    if current_hits <= visto:
+                        continue
+                vistos[clave] = current_hits
+                escritura = comparar_candidato(candidato, clave, existing_index, estacion, con_huella, use_upsert,
+                                               contadores)
+                if escritura is not None:
+                    registro, borrar = escritura
+                    if borrar is not None and visto is not None:
+                        # La fila a borrar puede ser una de este archivo aún sin escribir.
+                        await escritor.vaciar()
+                    await escritor.agregar(registro, borrar)
+        escritas = await escritor.cerrar()
+        contadores['lotes'] += escritor.lotes
+        log.debug("[%s] Filas escritas: %d en %d lotes", estacion.nombre, escritas, escritor.lotes)
+        return escritas
+    except BaseException:
+        if escritor is not None:
+            escritor.cancelar()
+        raise
+    finally:
+        await cursor.close()
+
+
+def _leer(iterar, argumentos, loop, cola, detenido, terminado):
+    """
+    Etapa de lectura, en su propio hilo: pone los candidatos en la cola por bloques y al final
+    _FIN (o el error). Con `detenido` (la comparación terminó antes) deja de esperar lugar en la cola.
+    """
+    def poner(elemento):
+        futuro = asyncio.run_coroutine_threadsafe(cola.put(elemento), loop)
+        while True:
+            try:
+                futuro.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if detenido.is_set():
+                    futuro.cancel()
+                    return False
+
+    bloque = []
+    try:
+        for candidato in iterar(*argumentos):
+            bloque.append(candidato)
+            if len(bloque) >= TAMANO_BLOQUE:
+                if not poner(bloque):
+                    return
+                bloque = []
+        if not bloque or poner(bloque):
+            poner(_FIN)
+    except Exception as err:
+        poner(_Fallo(err))
+    finally:
+        loop.call_soon_threadsafe(terminado.set_result, None)
+
+
+async def _bloques(primero, cola):
+    bloque = primero
+    while bloque is not _FIN:
+        if isinstance(bloque, _Fallo):
+            raise bloque.error
+        yield bloque
+        bloque = await cola.get()
+
+
+async def procesar_estacion(pool, estacion, input_file, checkpoints=None, registro_metricas=None, contexto=None,
+                            nocturno=None):
+    """Como pipeline.procesar_estacion (sin spool), con las tres etapas solapadas. Devuelve un ResultadoEstacion."""
+    metricas = MetricasEstacion(estacion.nombre, input_file)
+    inicio = time.perf_counter()
+    filas = 0
+    error = None
+    t_escritura = 0.0
+    loop = asyncio.get_running_loop()
+    cola = asyncio.Queue(COLA_BLOQUES)
+    detenido = threading.Event()
+    lectura = None
+    contexto = contexto or crear_contexto()
+    try:
+        if checkpoints is not None and checkpoints.sin_cambios(input_file, contexto.ahora):
+            metricas.contadores['archivo_sin_cambios'] += 1
+            return ResultadoEstacion(estacion.nombre, 0, 0.0, 0.0, time.perf_counter() - inicio, sin_cambios=True,
+                                     metricas=metricas)
+        checkpoint = checkpoints.abrir(input_file) if checkpoints is not None else None
+        # Un hilo propio y no el executor de asyncio, que usan las llamadas de PoolSQLite: los hilos
+        # de lectura bloqueados con la cola llena no deben dejarlas sin hilos.
+        lectura = loop.create_future()
+        threading.Thread(target=_leer, name=f"scantotals-lectura-{estacion.nombre}", daemon=True,
+                         args=(motor_lectura(), (input_file, estacion, nocturno, checkpoint, contexto, metricas),
+                               loop, cola, detenido, lectura)).start()
+        # La conexión se pide con el primer bloque: un archivo sin filas aceptadas no la ocupa.
+        primero = await cola.get()
+        if isinstance(primero, _Fallo):
+            raise primero.error
+        if primero is not _FIN:
+            bloques = _bloques(primero, cola)
+            async with pool.acquire() as connection:
+                inicio_escritura = time.perf_counter()
+                await connection.ping(reconnect=True)
+                try:
+                    filas = await escribir_bloques(connection, estacion, bloques, metricas)
+                except (*_errores(), OSError):
+                    await connection.rollback()
+                    raise
+                finally:
+                    t_escritura = time.perf_counter() - inicio_escritura
+        if checkpoint is not None:
+            error = confirmar_checkpoint(checkpoints, checkpoint)
+    except _errores() as err:
+        error = f"Error al ejecutar el comando SQL: {err}"
+    except OSError as err:
+        error = f"No se pudo leer el archivo: {err}"
+    finally:
+        detenido.set()
+        if lectura is not None:
+            await lectura
+    etapas = metricas.etapas
+    resultado = ResultadoEstacion(estacion.nombre, filas, etapas['lectura'] + etapas['parseo'] + etapas['validacion'],
+                                  t_escritura, time.perf_counter() - inicio, error, metricas=metricas)
+    if error:
+        metricas.contadores['errores'] += 1
+    if registro_metricas is not None:
+        registro_metricas.escribir(metricas.cerrar())
+    return resultado
+
+
+async def ejecutar(nombres=None, now=None, conexiones=db.TAMANO_POOL, checkpoints=None, metricas=None):
+    """
+    Equivalente asíncrono de pipeline.ejecutar: todas las estaciones a la vez, con hasta
+    `conexiones` conexiones (las demás esperan una libre mientras leen su archivo).
+    """
+    contexto = crear_contexto(now)
+    estaciones = [ESTACIONES[nombre] for nombre in (nombres or ESTACIONES)]
+    conexiones = max(1, min(conexiones, len(estaciones)))
+    inicio = time.perf_counter()
+    try:
+        pool = await crear_pool(conexiones)
+    except _errores() as err:
+        log.error("Error al conectar con la base de datos: %s", err)
+        return []
+    resultados = []
+    try:
+        tareas = []
+        for estacion in estaciones:
+            input_file = seleccionar_archivo(estacion, contexto.ahora)
+            log.debug("[%s] Archivo seleccionado: %s", estacion.nombre, input_file)
+            tareas.append(procesar_estacion(pool, estacion, input_file, checkpoints, metricas, contexto))
+        for tarea in asyncio.as_completed(tareas):
+            resultado = await tarea
+            resultados.append(resultado)
+            resumir(resultado)
+    finally:
+        pool.close()
+        await pool.wait_closed()
+    log.info("Carga de datos completada en %.2fs.", time.perf_counter() - inicio)
+    return resultados
@@ -0,0 +1,217 @@
+"""
+Backfill histórico: vuelve a ingerir archivos scantotals archivados.
+
+    python -m scantotals.backfill DIRECTORIO [--referencias MANIFIESTO.csv] [--referencia-mtime] [--procesos 4]
+
+Las reglas de fecha (día mayor que hoy antes de las 04:00, mes siguiente, "23:30") y el corte
+de una hora dependen de "ahora", así que cada archivo se procesa con su propio momento de
+referencia: el instante en que el archivo estaba vigente (normalmente, cuando se copió).
+El momento se toma, en este orden, de:
+  1. el manifiesto CSV (--referencias): líneas "ruta,AAAA-MM-DD HH:MM[:SS]", con rutas
+     relativas al manifiesto; las líneas vacías o que empiezan con # se ignoran;
+  2. el nombre del archivo, si contiene AAAAMMDDTHHMM[SS] (p. ej. scantotals_YVES.auto.20261010T2330.tab);
+  3. la fecha de modificación del archivo, solo con --referencia-mtime.
+Los archivos sin referencia se omiten con una advertencia. La estación y el turno se deducen
+del nombre (estaciones.identificar_archivo).
+
+Los archivos se reparten entre `procesos` procesos, cada uno con su propia conexión, y se
+escriben en streaming con el upsert por lotes. Como el upsert conserva siempre el registro
+con más hits, el orden en que se procesan los archivos no cambia el resultado.
+"""
+import argparse
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from . import bitacora, db, pipeline
+from .contexto import crear_contexto
+from .estaciones import ESTACIONES, identificar_archivo
+from .metricas import METRICAS_PATH, MetricasEstacion, RegistroMetricas
+
+# Nombre fijo: con "python -m scantotals.backfill", __name__ es "__main__" y quedaría fuera del logger del paquete.
+log = logging.getLogger("scantotals.backfill")
+
+PROCESOS = min(4, os.cpu_count() or 1)
+_FECHA_EN_NOMBRE = re.compile(r"(\d{8})T(\d{4}(?:\d{2})?)")
+
+# Estado de cada proceso trabajador (ver _iniciar_trabajador).
+_pool = None
+_limite = None
+_error_inicio = None
+
+
+def _parse_referencia(texto):
+    return datetime.fromisoformat(texto.strip())
+
+
+def leer_manifiesto(ruta):
+    """Devuelve {ruta absoluta: datetime} a partir del manifiesto CSV."""
+    base = os.path.dirname(os.path.abspath(ruta))
+    referencias = {}
+    with open(ruta, 'r', newline='', encoding='utf-8') as manifiesto:
+        for numero, fila in enumerate(csv.reader(manifiesto), 1):
+            if not fila or not fila[0].strip() or fila[0].lstrip().startswith('#'):
+                continue
+            if len(fila) < 2:
+                raise ValueError(f"{ruta}:{numero}: se esperaba 'ruta,fecha_hora'")
+            archivo = os.path.normpath(os.path.join(base, fila[0].strip()))
+            try:
+                referencias[archivo] = _parse_referencia(fila[1])
+            except ValueError:
+                raise ValueError(f"{ruta}:{numero}: fecha/hora inválida {fila[1]!r}") from None
+    return referencias
+
+
+def referencia_de_nombre(ruta):
+    match = _FECHA_EN_NOMBRE.search(os.path.basename(ruta))
+    if match is None:
+        return None
+    fecha, hora = match.groups()
+    return datetime.strptime(fecha + hora.ljust(6, '0'), "%Y%m%d%H%M%S")
+
+
+def planificar(directorio, referencias=None, usar_mtime=False):
+    """
+    Recorre el directorio (recursivamente) y devuelve la lista de tareas
+    (ruta, nombre de estación, nocturno, referencia) y la de archivos omitidos con su motivo.
+    """
+    referencias = referencias or {}
+    tareas, omitidos = [], []
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in sorted(nombres):
+            if not nombre.endswith('.tab'):
+                continue
+            ruta = os.path.normpath(os.path.join(os.path.abspath(raiz), nombre))
+            identificado = identificar_archivo(ruta)
+            if identificado is None:
+                omitidos.append((ruta, "no corresponde a ninguna estación"))
+                continue
+            estacion, nocturno = identificado
+            referencia = referencias.get(ruta) or referencia_de_nombre(ruta)
+            if referencia is None and usar_mtime:
+                referencia = datetime.fromtimestamp(os.path.getmtime(ruta))
+            if referencia is None:
+                omitidos.append((ruta, "sin momento de referencia"))
+                continue
+            tareas.append((ruta, estacion.nombre, nocturno, referencia))
+    return tareas, omitidos
+
+
+def _iniciar_trabajador(modo, sqlite_path, nivel, motor):
+    """
+    Se ejecuta una vez en cada proceso: con spawn (Windows) los módulos empiezan sin configurar.
+    Si no se puede crear el pool, el error queda en _error_inicio y cada archivo del proceso lo
+    informa (rellenar_archivo): un inicializador que lanza deja roto todo el ProcessPoolExecutor.
+    """
+    global _pool, _limite, _error_inicio
+    bitacora.configurar(nivel)
+    db.MODO_ESCRITURA = modo
+    db.SQLITE_PATH = sqlite_path
+    pipeline.MOTOR = motor
+    _limite = threading.BoundedSemaphore(1)
+    try:
+        _pool = db.crear_pool(1)
+    except db.Error as err:
+        _error_inicio = f"Error al conectar con la base de datos: {err}"
+
+
+def _fallido(nombre_estacion, ruta, error):
+    """ResultadoEstacion de un archivo que no se pudo procesar."""
+    metricas = MetricasEstacion(nombre_estacion, ruta)
+    metricas.contadores['errores'] += 1
+    return pipeline.ResultadoEstacion(nombre_estacion, 0, 0.0, 0.0, 0.0, error, metricas=metricas.cerrar())
+
+
+def rellenar_archivo(ruta, nombre_estacion, nocturno, referencia):
+    """Tarea de un proceso: ingiere un archivo con su momento de referencia."""
+    if _pool is None:
+        return _fallido(nombre_estacion, ruta, _error_inicio)
+    estacion = ESTACIONES[nombre_estacion]
+    resultado = pipeline.procesar_estacion(_pool, _limite, estacion, ruta, contexto=crear_contexto(referencia),
+                                           nocturno=nocturno)
+    resultado.metricas.cerrar()
+    return resultado
+
+
+def ejecutar_backfill(tareas, procesos=PROCESOS, modo="upsert", registro_metricas=None):
+    """Procesa las tareas de planificar() en paralelo y devuelve los ResultadoEstacion."""
+    inicio = time.perf_counter()
+    resultados = []
+    if not tareas:
+        return resultados
+    procesos = max(1, min(procesos, len(tareas)))
+    log.info("Backfill de %d archivos con %d procesos (modo %s).", len(tareas), procesos, modo)
+    nivel = logging.getLogger("scantotals").getEffectiveLevel()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=(modo, db.SQLITE_PATH, nivel, pipeline.MOTOR)) as executor:
+        futuros = {executor.submit(rellenar_archivo, *tarea): tarea for tarea in tareas}
+        for futuro in as_completed(futuros):
+            ruta, nombre, _, referencia = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except BrokenProcessPool as err:
+                # Un proceso terminó abruptamente; este archivo y los pendientes quedan sin procesar.
+                resultado = _fallido(nombre, ruta, f"El proceso trabajador terminó inesperadamente: {err}")
+            except Exception as err:
+                # Error del trabajador fuera de procesar_estacion, relanzado aquí. Su clase puede no
+                # estar en db.Error de este proceso: mysql.connector solo se importa en los trabajadores.
+                resultado = _fallido(nombre, ruta, f"Error en el proceso trabajador: {type(err).__name__}: {err}")
+            resultados.append(resultado)
+            log.info("%s (referencia %s)", ruta, referencia.isoformat(sep=' ', timespec='minutes'))
+            pipeline.resumir(resultado)
+            if registro_metricas is not None:
+                registro_metricas.escribir(resultado.metricas)
+    log.info("Backfill completado: %d filas escritas en %.2fs (%d archivos con errores).",
+             sum(r.filas for r in resultados), time.perf_counter() - inicio, sum(1 for r in resultados if r.error))
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scantotals.backfill",
+                                     description="Reingesta de archivos scantotals archivados.")
+    parser.add_argument("directorio", help="directorio con los archivos .tab archivados (se recorre recursivamente)")
+    parser.add_argument("--referencias", metavar="MANIFIESTO",
+                        help="CSV con 'ruta,fecha_hora' del momento de referencia de cada archivo")
+    parser.add_argument("--referencia-mtime", action="store_true",
+                        help="usar la fecha de modificación de los archivos sin otra referencia")
+    parser.add_argument("--procesos", type=int, default=PROCESOS,
+                        help=f"procesos en paralelo, uno por conexión (por defecto {PROCESOS})")
+    parser.add_argument("--modo", choices=("upsert", "auto", "reemplazo"), default="upsert",
+                        help="modo de escritura (por defecto upsert; requiere la migración 001)")
+    parser.add_argument("--motor", choices=("filas", "vectorizado", "mmap"), default=pipeline.MOTOR,
+                        help="motor de lectura; 'vectorizado' requiere pandas, 'mmap' mapea el archivo "
+                             "(por defecto filas)")
+    parser.add_argument("--sqlite", metavar="RUTA", help="usar una base SQLite local en lugar de MySQL (pruebas)")
+    parser.add_argument("--metricas", metavar="RUTA", default=METRICAS_PATH,
+                        help=f"archivo JSON lines de métricas (por defecto {METRICAS_PATH})")
+    parser.add_argument("--sin-metricas", action="store_true", help="no escribir el archivo de métricas")
+    parser.add_argument("--simular", action="store_true", help="solo mostrar el plan, sin escribir")
+    args = parser.parse_args(argv)
+    bitacora.configurar()
+    if args.sqlite:
+        db.SQLITE_PATH = args.sqlite
+    pipeline.MOTOR = args.motor
+    try:
+        referencias = leer_manifiesto(args.referencias) if args.referencias else None
+    except (OSError, ValueError) as err:
+        parser.error(str(err))
+    tareas, omitidos = planificar(args.directorio, referencias, args.referencia_mtime)
+    for ruta, motivo in omitidos:
+        log.warning("Se omite %s: %s", ruta, motivo)
+    if args.simular:
+        for ruta, nombre, nocturno, referencia in tareas:
+            log.info("%s -> %s (%s), referencia %s", ruta, nombre, "nocturno" if nocturno else "diurno",
+                     referencia.isoformat(sep=' ', timespec='seconds'))
+        return
+    registro = None if args.sin_metricas else RegistroMetricas(args.metricas)
+    ejecutar_backfill(tareas, args.procesos, args.modo, registro)
+
+
+if __name__ == "__main__":
+    main()
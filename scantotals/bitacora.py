@@ -0,0 +1,60 @@
+"""
+Configuración del logging del paquete.
+
+Los módulos registran con logging.getLogger(__name__) bajo el logger "scantotals":
+  INFO     una línea por estación y por ejecución (archivo, resumen de filas, tiempos)
+  DEBUG    traza por fila (filas procesadas, omitidas por horario futuro, hits inválidos)
+  WARNING  errores de conexión, de lectura y filas con hits inválidos (en el resumen)
+
+configurar() instala un QueueHandler: los hilos de trabajo solo encolan el registro y un
+único hilo (QueueListener) escribe en la consola y, opcionalmente, en un archivo. Así la
+escritura síncrona en la consola de Windows no frena el procesamiento de filas.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+FORMATO = "%(asctime)s %(levelname)s %(message)s"
+
+_listener = None
+
+
+def configurar(nivel=logging.INFO, archivo=None, stream=None):
+    """
+    Configura el logger "scantotals" con una cola y un hilo escritor. Se puede llamar
+    de nuevo para cambiar el nivel o los destinos; el escritor anterior se detiene antes.
+    """
+    global _listener
+    detener()
+    formato = logging.Formatter(FORMATO)
+    destinos = [logging.StreamHandler(stream or sys.stdout)]
+    if archivo:
+        destinos.append(logging.FileHandler(archivo, encoding='utf-8'))
+    for destino in destinos:
+        destino.setFormatter(formato)
+    cola = queue.SimpleQueue()
+    logger = logging.getLogger("scantotals")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(cola))
+    logger.setLevel(nivel)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(cola, *destinos)
+    _listener.start()
+    return logger
+
+
+def detener():
+    """Vacía la cola y cierra los destinos; se llama también al salir del intérprete."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for destino in _listener.handlers:
+        destino.close()
+    _listener = None
+
+
+atexit.register(detener)
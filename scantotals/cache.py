@@ -0,0 +1,246 @@
+"""
+Caché local y persistente de los hits existentes de las fechas recientes (--cache).
+
+La comparación de hits necesita, por cada fecha del archivo, las filas ya guardadas
+(db.prefetch_existing_hits). Casi todas las ejecuciones tocan las mismas fechas (el turno en
+curso y el anterior), así que la caché guarda en SQLite, por (tabla, fecha), las filas
+{(name, hour): (hits, huella)} y la marca: el mayor valor de la columna actualizado visto.
+En las ejecuciones siguientes, para esa fecha solo se piden a la base de datos las filas con
+actualizado >= marca - MARGEN (las que cambió cualquier escritor desde entonces) junto con el
+total de filas de la fecha, en una sola consulta.
+
+La caché sigue siendo correcta con otros escritores:
+  - toda fila insertada o modificada cambia su columna actualizado (migración 004) y vuelve
+    en la consulta de cambios; MARGEN cubre las transacciones que confirman después de la marca;
+  - si el total de filas no coincide con el de la caché (p. ej. otro proceso borró filas),
+    la fecha se vuelve a cargar completa;
+  - cada fecha se recarga completa, de todos modos, cada VERIFICACION segundos.
+Lo leído se guarda en la caché solo después del commit de la estación (guardar): una lectura
+que incluye filas propias aún sin confirmar nunca queda en disco si la transacción falla.
+
+Solo se guardan las fechas desde el día anterior a "ahora" (el turno en curso y el anterior);
+las más antiguas, p. ej. al reprocesar, se consultan directamente y se eliminan de la caché.
+Las tablas sin la columna actualizado se consultan siempre en la base de datos.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from . import contexto, db
+
+log = logging.getLogger(__name__)
+
+CACHE_PATH = os.environ.get(
+    'SCANTOTALS_CACHE', os.path.join(os.path.expanduser('~'), '.scantotals', 'cache.db')
+)
+# Segundos entre recargas completas de una fecha.
+VERIFICACION = 3600
+# Margen hacia atrás de la consulta de cambios (transacciones que confirman después de la marca).
+MARGEN = timedelta(minutes=2)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS existentes (
+    tabla TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    hits INTEGER,
+    huella INTEGER,
+    PRIMARY KEY (tabla, fecha, name, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fechas (
+    tabla TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    marca TEXT,
+    filas INTEGER NOT NULL,
+    verificado REAL NOT NULL,
+    PRIMARY KEY (tabla, fecha)
+) WITHOUT ROWID;
+"""
+
+_GUARDAR_FILA = "INSERT OR REPLACE INTO existentes (tabla, fecha, name, hour, hits, huella) VALUES (?, ?, ?, ?, ?, ?)"
+_GUARDAR_FECHA = "INSERT OR REPLACE INTO fechas (tabla, fecha, marca, filas, verificado) VALUES (?, ?, ?, ?, ?)"
+
+
+def _marca(valor):
+    """Valor de actualizado (datetime en MySQL, texto en sqlite_local) como datetime."""
+    return valor if isinstance(valor, datetime) else datetime.fromisoformat(str(valor))
+
+
+def _texto_marca(marca):
+    return None if marca is None else marca.isoformat(sep=' ', timespec='microseconds')
+
+
+class _Fecha:
+    """Estado de una fecha leído de la caché y actualizado con la consulta."""
+
+    __slots__ = ("fecha", "marca", "filas", "verificado", "existentes", "cambios", "completa")
+
+    def __init__(self, fecha, marca=None, filas=0, verificado=0.0, existentes=None, completa=False):
+        self.fecha = fecha
+        self.marca = marca
+        self.filas = filas
+        self.verificado = verificado
+        self.existentes = existentes if existentes is not None else {}
+        # Filas recibidas de la base de datos; con `completa`, reemplazan todo lo guardado.
+        self.cambios = {}
+        self.completa = completa
+
+    def aplicar(self, name, hour, hits, huella, actualizado):
+        clave = (name.strip(), hour)
+        if self.completa:
+            # Igual que prefetch_existing_hits, ante claves repetidas vale la primera.
+            if clave in self.cambios:
+                return False
+        nueva = clave not in self.existentes and clave not in self.cambios
+        self.cambios[clave] = (hits, huella)
+        if actualizado is not None:
+            actualizado = _marca(actualizado)
+            if self.marca is None or actualizado > self.marca:
+                self.marca = actualizado
+        return nueva
+
+
+class CacheExistentes:
+    """Caché de existentes compartida por los hilos de una ejecución (o del daemon)."""
+
+    def __init__(self, ruta=CACHE_PATH):
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(SCHEMA)
+        self._conexion.commit()
+
+    @staticmethod
+    def desde():
+        """Primera fecha que se guarda: el turno anterior siempre empieza el día anterior o el mismo día."""
+        return (contexto.ahora() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def _leer(self, tabla, fechas):
+        estados = {}
+        with self._lock:
+            for fecha in fechas:
+                fila = self._conexion.execute(
+                    "SELECT marca, filas, verificado FROM fechas WHERE tabla = ? AND fecha = ?", (tabla, fecha)
+                ).fetchone()
+                if fila is None:
+                    continue
+                marca, filas, verificado = fila
+                existentes = {(name, hour): (hits, huella) for name, hour, hits, huella in self._conexion.execute(
+                    "SELECT name, hour, hits, huella FROM existentes WHERE tabla = ? AND fecha = ?", (tabla, fecha))}
+                estados[fecha] = _Fecha(fecha, marca and _marca(marca), filas, verificado, existentes)
+        return estados
+
+    def consultar(self, cursor, tabla, fechas, con_huella=False, metricas=None):
+        """
+        Como db.prefetch_existing_hits, pero con la caché para las fechas recientes. Devuelve
+        (índice, pendiente); `pendiente` se pasa a guardar() después del commit.
+        """
+        desde = self.desde()
+        recientes = sorted(fecha for fecha in fechas if fecha >= desde)
+        if not recientes or not db.tiene_columna(cursor, tabla, "actualizado"):
+            return db.prefetch_existing_hits(cursor, tabla, fechas, con_huella), None
+        antiguas = set(fechas).difference(recientes)
+        existing_index = db.prefetch_existing_hits(cursor, tabla, antiguas, con_huella) if antiguas else {}
+        columna_huella = "huella" if db.tiene_huella(cursor, tabla) else "NULL"
+
+        estados = self._leer(tabla, recientes)
+        ahora = time.time()
+        vigentes = [fecha for fecha in recientes
+                    if fecha in estados and ahora - estados[fecha].verificado < VERIFICACION]
+        recargar = [fecha for fecha in recientes if fecha not in vigentes]
+        if vigentes:
+            descuadradas = self._consultar_cambios(cursor, tabla, columna_huella, [estados[f] for f in vigentes])
+            recargar += descuadradas
+            if metricas is not None:
+                metricas.contadores['cache_cambios'] += len(vigentes) - len(descuadradas)
+        if recargar:
+            for fecha in recargar:
+                estados[fecha] = _Fecha(fecha, verificado=ahora, completa=True)
+            self._recargar(cursor, tabla, columna_huella, [estados[fecha] for fecha in recargar])
+            if metricas is not None:
+                metricas.contadores['cache_recargas'] += len(recargar)
+
+        for fecha in recientes:
+            estado = estados[fecha]
+            filas = estado.cambios if estado.completa else {**estado.existentes, **estado.cambios}
+            for (name, hour), (hits, huella) in filas.items():
+                existing_index.setdefault((name, fecha, hour), (hits, huella) if con_huella else hits)
+        return existing_index, (tabla, [estados[fecha] for fecha in recientes])
+
+    def _consultar_cambios(self, cursor, tabla, columna_huella, estados):
+        """Total de filas y filas modificadas de cada fecha, en una consulta. Devuelve las fechas a recargar."""
+        filtros, parametros = [], [estado.fecha for estado in estados]
+        for estado in estados:
+            if estado.marca is None:
+                filtros.append("(fecha = %s)")
+                parametros.append(estado.fecha)
+            else:
+                filtros.append("(fecha = %s AND actualizado >= %s)")
+                parametros += (estado.fecha, _texto_marca(estado.marca - MARGEN))
+        placeholders = ", ".join(["%s"] * len(estados))
+        cursor.execute(f"""
+        SELECT fecha, NULL, NULL, COUNT(*), NULL, NULL FROM {tabla} WHERE fecha IN ({placeholders}) GROUP BY fecha
+        UNION ALL
+        SELECT fecha, name, hour, hits, {columna_huella}, actualizado FROM {tabla} WHERE {" OR ".join(filtros)}
+        """, tuple(parametros))
+        por_fecha = {estado.fecha: estado for estado in estados}
+        totales = {}
+        esperadas = {estado.fecha: estado.filas for estado in estados}
+        for fecha, name, hour, hits, huella, actualizado in cursor.fetchall():
+            fecha = str(fecha)
+            if name is None:
+                totales[fecha] = hits
+            elif por_fecha[fecha].aplicar(name, str(hour), hits, huella, actualizado):
+                esperadas[fecha] += 1
+        descuadradas = []
+        for fecha, estado in por_fecha.items():
+            # Si el total no cuadra, otro escritor borró filas (o una transacción larga quedó fuera del margen).
+            if totales.get(fecha, 0) != esperadas[fecha]:
+                descuadradas.append(fecha)
+            estado.filas = esperadas[fecha]
+        return descuadradas
+
+    def _recargar(self, cursor, tabla, columna_huella, estados):
+        placeholders = ", ".join(["%s"] * len(estados))
+        cursor.execute(f"""
+        SELECT fecha, name, hour, hits, {columna_huella}, actualizado FROM {tabla} WHERE fecha IN ({placeholders})
+        """, tuple(estado.fecha for estado in estados))
+        por_fecha = {estado.fecha: estado for estado in estados}
+        for fecha, name, hour, hits, huella, actualizado in cursor.fetchall():
+            estado = por_fecha[str(fecha)]
+            estado.filas += 1
+            estado.aplicar(name, str(hour), hits, huella, actualizado)
+
+    def guardar(self, pendientes):
+        """Guarda lo leído por consultar() (llamar después del commit) y elimina las fechas antiguas."""
+        desde = self.desde()
+        with self._lock:
+            try:
+                for tabla, estados in pendientes:
+                    for estado in estados:
+                        if estado.completa:
+                            self._conexion.execute("DELETE FROM existentes WHERE tabla = ? AND fecha = ?",
+                                                   (tabla, estado.fecha))
+                        self._conexion.executemany(_GUARDAR_FILA, [
+                            (tabla, estado.fecha, name, hour, hits, huella)
+                            for (name, hour), (hits, huella) in estado.cambios.items()])
+                        self._conexion.execute(_GUARDAR_FECHA, (tabla, estado.fecha, _texto_marca(estado.marca),
+                                                                estado.filas, estado.verificado))
+                self._conexion.execute("DELETE FROM existentes WHERE fecha < ?", (desde,))
+                self._conexion.execute("DELETE FROM fechas WHERE fecha < ?", (desde,))
+                self._conexion.commit()
+            except sqlite3.Error as err:
+                # La caché es prescindible: si no se puede escribir, la próxima ejecución consulta la base.
+                self._conexion.rollback()
+                log.warning("No se pudo actualizar la caché %s: %s", self.ruta, err)
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,152 @@
+"""
+Checkpoints por archivo para la lectura incremental.
+
+Por cada archivo se guarda su firma (inode, mtime, tamaño) y un hash por línea de datos,
+indexado por el campo Key. En la siguiente ejecución:
+  - si la firma no cambió y no quedaron filas diferidas (o ninguna es vigente todavía), el
+    archivo se omite sin abrirlo;
+  - si cambió, solo se parsean las líneas cuyo hash es distinto al guardado.
+
+VISION reescribe las filas de la hora en curso (los hits crecen), así que un simple
+desplazamiento de bytes no bastaría: por eso la comparación es por línea.
+
+Las filas omitidas por "horario futuro" no se guardan, para que se vuelvan a evaluar
+cuando pase la hora aunque la línea no cambie; el checkpoint guarda además el momento en
+que la primera de ellas pasa a ser vigente, y hasta entonces un archivo sin cambios se
+sigue omitiendo. El checkpoint solo se confirma después de que la escritura en la base de
+datos terminó bien.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+CHECKPOINT_PATH = os.environ.get(
+    'SCANTOTALS_CHECKPOINTS', os.path.join(os.path.expanduser('~'), '.scantotals', 'checkpoints.json')
+)
+
+
+def ruta_estacion(nombre, ruta=CHECKPOINT_PATH):
+    """
+    Archivo de checkpoints propio de una estación (checkpoints.json -> checkpoints_pulidos.json).
+    Los scripts de cada estación corren como procesos separados, a veces a la vez: cada uno
+    reescribe su archivo completo, así que no pueden compartir uno.
+    """
+    base, extension = os.path.splitext(ruta)
+    return f"{base}_{nombre}{extension}"
+
+
+def firma_archivo(input_file):
+    stat = os.stat(input_file)
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def hash_bytes(datos):
+    return hashlib.blake2b(datos, digest_size=8).hexdigest()
+
+
+def hash_linea(linea):
+    return hash_bytes(linea.encode('utf-8', 'surrogateescape'))
+
+
+class CheckpointArchivo:
+    """Estado de un archivo durante una ejecución: compara cada línea con el checkpoint anterior."""
+
+    def __init__(self, input_file, firma, lineas_previas):
+        self.input_file = input_file
+        self.firma = firma
+        self.lineas_previas = lineas_previas
+        self.lineas = {}
+        self.diferidas = 0
+        # Momento en que la primera fila diferida pasa a ser vigente.
+        self.proxima = None
+        self.sin_cambio = 0
+
+    def filtrar(self, lineas):
+        """
+        Deja pasar las líneas hasta la cabecera 'Key' (inclusive) y, después, solo las
+        líneas de datos nuevas o modificadas.
+        """
+        en_datos = False
+        for linea in lineas:
+            if not en_datos:
+                if linea.split('\t', 1)[0].rstrip('\r\n') == 'Key':
+                    en_datos = True
+                yield linea
+                continue
+            if not self.registrar(linea.split('\t', 1)[0], hash_linea(linea)):
+                yield linea
+
+    def registrar(self, clave, digest):
+        """Guarda el hash de una línea de datos; True si es igual al del checkpoint anterior."""
+        self.lineas[clave] = digest
+        if self.lineas_previas.get(clave) == digest:
+            self.sin_cambio += 1
+            return True
+        return False
+
+    def diferir(self, clave, elegible):
+        """Marca una fila para volver a leerla cuando sea vigente (`elegible`, ver ParserClave.elegible)."""
+        self.lineas.pop(clave, None)
+        self.diferidas += 1
+        if self.proxima is None or elegible < self.proxima:
+            self.proxima = elegible
+
+
+class RegistroCheckpoints:
+    """Checkpoints de todos los archivos, persistidos en un JSON."""
+
+    def __init__(self, ruta=CHECKPOINT_PATH):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        try:
+            with open(ruta, 'r', encoding='utf-8') as archivo:
+                self._estado = json.load(archivo)
+        except (OSError, ValueError):
+            self._estado = {}
+
+    def sin_cambios(self, input_file, now=None):
+        """
+        True si el archivo no cambió desde el último checkpoint y no tiene filas pendientes
+        que sean vigentes en `now` (sin `now`, cualquier fila diferida obliga a releerlo).
+        """
+        previo = self._estado.get(input_file)
+        if not previo:
+            return False
+        if previo['diferidas']:
+            proxima = previo.get('proxima')
+            if now is None or proxima is None or now >= datetime.fromisoformat(proxima):
+                return False
+        try:
+            return firma_archivo(input_file) == previo['firma']
+        except OSError:
+            return False
+
+    def abrir(self, input_file):
+        """La firma se toma antes de leer: si el archivo cambia durante la lectura, se releerá."""
+        previo = self._estado.get(input_file, {})
+        return CheckpointArchivo(input_file, firma_archivo(input_file), previo.get('lineas', {}))
+
+    def confirmar(self, checkpoint):
+        """Guarda el checkpoint del archivo; un OSError indica que no se pudo escribir el JSON."""
+        with self._lock:
+            self._estado[checkpoint.input_file] = {
+                'firma': checkpoint.firma,
+                'lineas': checkpoint.lineas,
+                'diferidas': checkpoint.diferidas,
+                'proxima': checkpoint.proxima.isoformat() if checkpoint.proxima is not None else None,
+            }
+            os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+            # Temporal por proceso: otro proceso con el mismo archivo no escribe sobre el mismo temporal.
+            temporal = f"{self.ruta}.{os.getpid()}.tmp"
+            try:
+                with open(temporal, 'w', encoding='utf-8') as archivo:
+                    json.dump(self._estado, archivo)
+                os.replace(temporal, self.ruta)
+            except OSError:
+                try:
+                    os.remove(temporal)
+                except OSError:
+                    pass
+                raise
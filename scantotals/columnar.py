@@ -0,0 +1,141 @@
+"""
+Candidatos de un archivo guardados por columnas (LoteCandidatos).
+
+Cuando un archivo se lee completo antes de escribir (pipeline.LIMITE_LECTURA_COMPLETA), cada
+candidato aceptado quedaba en memoria como un parser.Candidato con su fila de csv: una tupla,
+una lista y diez cadenas por fila. LoteCandidatos guarda una lista por columna y descarta la
+fila al agregar el candidato:
+  - hits en un array de enteros de 64 bits;
+  - name internado con sys.intern (la misma cadena que usa la clave de la comparación);
+  - fecha, hour, num y las columnas de valores (mean, median, multi, inf fails, shortest,
+    longest, total, stddev) como referencias a un valor compartido por texto distinto: un
+    archivo repite pocas fechas, horas y valores, y cada uno se guarda una sola vez.
+Los valores se guardan como el texto del archivo, sin convertirlos a número: la limpieza
+(extraccion.build_record) se aplica en registro(), al escribir, igual que con Candidato, así
+que la tupla que recibe executemany es la misma. Los candidatos ya limpios del motor
+vectorizado (parser.CandidatoListo) guardan sus valores limpios.
+
+Al iterar el lote se obtienen FilaLote, que se usan como Candidato y se crean de a uno.
+benchmarks/bench_memoria.py compara la memoria pico con la lista de candidatos.
+"""
+import copy
+import sys
+from array import array
+from operator import itemgetter
+from typing import NamedTuple, Optional, Tuple
+
+from .extraccion import build_record
+from .parser import CandidatoListo
+
+# Posición de las columnas de valores en la fila del archivo (Candidato.row) y en el registro
+# de build_record (CandidatoListo.fila); hits no está: se guarda aparte, ya convertido.
+_EN_FILA = (1, 2, 4, 5, 6, 7, 8, 9)
+_EN_REGISTRO = (2, 3, 5, 6, 7, 8, 9, 10)
+_valores_fila = itemgetter(*_EN_FILA)
+_valores_registro = itemgetter(*_EN_REGISTRO)
+
+
+class FilaLote(NamedTuple):
+    """Candidato de un LoteCandidatos; se desempaqueta y se escribe igual que un parser.Candidato."""
+    origen: Tuple["LoteCandidatos", int]
+    name: str
+    fecha: str
+    hour: str
+    num: Optional[str]
+    hits: int
+
+    def registro(self, estacion):
+        lote, posicion = self.origen
+        return lote.registro(posicion, estacion)
+
+
+class LoteCandidatos:
+    """Candidatos aceptados de un archivo, por columnas (ver el docstring del módulo)."""
+
+    def __init__(self, candidatos=()):
+        self.names = []
+        self.fechas = []
+        self.horas = []
+        self.nums = []
+        self.hits = array('q')
+        self.valores = [[] for _ in _EN_FILA]
+        # 1 si los valores de la fila ya están limpios (CandidatoListo).
+        self._limpios = bytearray()
+        # Filas con menos columnas de las esperadas: se guardan enteras, para que registro()
+        # falle igual que build_record.
+        self._cortas = {}
+        self._compartidos = {}
+        # Posiciones visibles (reducir()); None: todas, en orden.
+        self._posiciones = None
+        for candidato in candidatos:
+            self.agregar(candidato)
+
+    def agregar(self, candidato):
+        fila, name, fecha, hour, num, hits = candidato
+        limpio = candidato.__class__ is CandidatoListo
+        compartido = self._compartidos.setdefault
+        if len(fila) <= _EN_FILA[-1] + limpio:
+            self._cortas[len(self.hits)] = fila
+            for columna in self.valores:
+                columna.append(None)
+        elif limpio:
+            # Solo se comparte el texto: un float limpio igual a otro valor (1.0 == 1) no debe reemplazarlo.
+            for columna, valor in zip(self.valores, _valores_registro(fila)):
+                columna.append(compartido(valor, valor) if valor.__class__ is str else valor)
+        else:
+            # Las columnas del archivo son siempre texto.
+            for columna, valor in zip(self.valores, _valores_fila(fila)):
+                columna.append(compartido(valor, valor))
+        self.names.append(sys.intern(name))
+        self.fechas.append(compartido(fecha, fecha))
+        self.horas.append(compartido(hour, hour))
+        self.nums.append(compartido(num, num))
+        self.hits.append(hits)
+        self._limpios.append(limpio)
+
+    def registro(self, posicion, estacion):
+        """Tupla de build_record de la fila `posicion`, lista para executemany."""
+        name, fecha, hour, num, hits = (self.names[posicion], self.fechas[posicion], self.horas[posicion],
+                                        self.nums[posicion], self.hits[posicion])
+        if self._cortas and posicion in self._cortas:
+            fila = self._cortas[posicion]
+            return fila if self._limpios[posicion] else build_record(fila, estacion, fecha, hour, num, hits)
+        mean, median, multi, inf_fails, shortest, longest, total, stddev = [
+            columna[posicion] for columna in self.valores]
+        if self._limpios[posicion]:
+            return (name, fecha, mean, median, hits, multi, inf_fails, shortest, longest, total, stddev, hour, num)
+        # Fila con las columnas del archivo en su lugar (la 3, el texto de hits, no se usa).
+        return build_record((name, mean, median, None, multi, inf_fails, shortest, longest, total, stddev),
+                            estacion, fecha, hour, num, hits)
+
+    def _recorrido(self):
+        return range(len(self.hits)) if self._posiciones is None else self._posiciones
+
+    def __len__(self):
+        return len(self._recorrido())
+
+    def __iter__(self):
+        names, fechas, horas, nums, hits = self.names, self.fechas, self.horas, self.nums, self.hits
+        for posicion in self._recorrido():
+            yield FilaLote((self, posicion), names[posicion], fechas[posicion], horas[posicion], nums[posicion],
+                           hits[posicion])
+
+    def reducir(self, clave, metricas=None):
+        """
+        Como pipeline.reducir_duplicados: un candidato por clave(candidato), el de más hits (ante
+        empate, el primero) en el lugar de su primera aparición. Devuelve un lote que comparte
+        las columnas con este y solo recorre las filas elegidas.
+        """
+        por_clave = {}
+        hits = self.hits
+        for candidato in self:
+            llave = clave(candidato)
+            previa = por_clave.get(llave)
+            posicion = candidato.origen[1]
+            if previa is None or hits[posicion] > hits[previa]:
+                por_clave[llave] = posicion
+        if metricas is not None:
+            metricas.contadores['duplicadas'] += len(self) - len(por_clave)
+        reducido = copy.copy(self)
+        reducido._posiciones = array('q', por_clave.values())
+        return reducido
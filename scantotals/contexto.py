@@ -0,0 +1,72 @@
+"""
+Contexto de ejecución: el "ahora" de referencia y todo lo que se deriva de él.
+
+Se crea una vez por ejecución (o por archivo en el backfill) y se pasa por todo el pipeline,
+de modo que la selección de archivo, las fechas y el corte de una hora de todas las filas se
+evalúan contra el mismo instante, también en los cambios de turno (21:59 -> 22:00,
+03:59 -> 04:00).
+
+El reloj se puede reemplazar (pruebas, benchmarks, --ahora):
+
+    from scantotals import contexto
+    contexto.reloj = lambda: datetime(2026, 10, 10, 23, 55)
+"""
+import calendar
+from datetime import datetime, timedelta
+from typing import NamedTuple, Tuple
+
+from .estaciones import es_turno_nocturno
+
+# Ventanas de turno en minutos desde medianoche (desde, hasta), ambos extremos incluidos.
+# La nocturna cruza la medianoche: 22:00 a 05:00.
+VENTANA_NOCTURNA = (1320, 300)
+VENTANA_DIURNA = (390, 1290)
+
+reloj = datetime.now
+
+
+def ahora():
+    """Hora actual según el reloj del módulo."""
+    return reloj()
+
+
+def _mes(year, month):
+    return year, month, calendar.monthrange(year, month)[1]
+
+
+class ContextoEjecucion(NamedTuple):
+    ahora: datetime
+    # Las filas posteriores a este instante se omiten por horario futuro.
+    limite: datetime
+    # A partir de las 23:50 se acepta la fila de las "23:00".
+    acepta_23: bool
+    # Antes de las 04:00, a la fecha de un día mayor que hoy se le resta un día (como extract_date).
+    temprano: bool
+    hoy: int
+    # (año, mes, días del mes) del mes actual y del siguiente.
+    mes: Tuple[int, int, int]
+    mes_siguiente: Tuple[int, int, int]
+    # Turno vigente en `ahora` (elige el archivo NVO o el diurno).
+    nocturno: bool
+
+    @staticmethod
+    def en_turno(total_minutes, nocturno):
+        if nocturno:
+            return total_minutes >= VENTANA_NOCTURNA[0] or total_minutes <= VENTANA_NOCTURNA[1]
+        return VENTANA_DIURNA[0] <= total_minutes <= VENTANA_DIURNA[1]
+
+
+def crear_contexto(now=None):
+    """Congela `now` (por defecto, la hora del reloj) y precalcula los límites de la ejecución."""
+    now = now or reloj()
+    siguiente = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+    return ContextoEjecucion(
+        ahora=now,
+        limite=now - timedelta(hours=1),
+        acepta_23=(now.hour, now.minute) >= (23, 50),
+        temprano=now.hour < 4,
+        hoy=now.day,
+        mes=_mes(now.year, now.month),
+        mes_siguiente=_mes(*siguiente),
+        nocturno=es_turno_nocturno(now),
+    )
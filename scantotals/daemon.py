@@ -0,0 +1,54 @@
+"""
+Modo daemon: mantiene vivo el pool de conexiones entre ciclos de ingesta y vuelve a
+ejecutar el pipeline cada `intervalo` segundos.
+
+Evita pagar en cada ciclo el arranque del intérprete y el handshake TCP/TLS/autenticación
+con el proxy; las conexiones se validan con un ping antes de usarse (db.obtener_conexion).
+"""
+import logging
+import time
+
+from . import db
+from .pipeline import MAX_WORKERS, ejecutar
+from .spool import Drenador
+
+log = logging.getLogger(__name__)
+
+INTERVALO_SEGUNDOS = 300
+
+
+def ejecutar_daemon(nombres=None, intervalo=INTERVALO_SEGUNDOS, workers=MAX_WORKERS,
+                    conexiones=db.TAMANO_POOL, ciclos=None, checkpoints=None, metricas=None, spool=None):
+    """
+    Ejecuta el pipeline en bucle hasta Ctrl+C (o `ciclos` veces, útil para pruebas).
+    Si el pool no se puede crear se reintenta en el siguiente ciclo.
+    Con `spool` (spool.Spool) los ciclos no esperan a la base de datos: las filas van al spool
+    y un Drenador en segundo plano las envía con su propia conexión.
+    """
+    pool = None
+    ciclo = 0
+    drenador = Drenador(spool, registro_metricas=metricas).iniciar() if spool is not None else None
+    try:
+        while ciclos is None or ciclo < ciclos:
+            ciclo += 1
+            inicio = time.monotonic()
+            if pool is None and spool is None:
+                try:
+                    pool = db.crear_pool(conexiones)
+                except db.Error as err:
+                    log.error("Error al conectar con la base de datos: %s", err)
+            if pool is not None or spool is not None:
+                log.info("Ciclo %d", ciclo)
+                ejecutar(nombres, workers=workers, conexiones=conexiones, pool=pool, checkpoints=checkpoints,
+                         metricas=metricas, spool=spool)
+                if drenador is not None:
+                    drenador.avisar()
+            if ciclos is not None and ciclo >= ciclos:
+                break
+            # El intervalo se mide desde el inicio del ciclo, no desde su final.
+            time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+    except KeyboardInterrupt:
+        log.info("Daemon detenido.")
+    finally:
+        if drenador is not None:
+            drenador.vaciar()
@@ -0,0 +1,380 @@
+"""
+Acceso a la base de datos compartido por todas las estaciones.
+
+mysql.connector se importa aquí, al abrir la primera conexión (conector()): una ejecución
+incremental sin archivos cambiados o con --sqlite no lo carga. Las consultas reciben el
+nombre de la tabla desde la definición de la estación. Las variables SCANTOTALS_DB_*
+permiten apuntar a un MySQL/MariaDB local y SCANTOTALS_SQLITE al sustituto de sqlite_local.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+from contextlib import nullcontext
+
+log = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    'host': os.environ.get('SCANTOTALS_DB_HOST', 'autorack.proxy.rlwy.net'),
+    'port': int(os.environ.get('SCANTOTALS_DB_PORT', 22723)),
+    'user': os.environ.get('SCANTOTALS_DB_USER', 'root'),
+    'password': os.environ.get('SCANTOTALS_DB_PASSWORD', 'zsulNCCrYFSfBqIxwwIXIKqLQKFJWwbw'),
+    'database': os.environ.get('SCANTOTALS_DB_NAME', 'railway'),
+}
+
+# Ruta de una base SQLite a usar en lugar de MySQL (ver sqlite_local); None usa DB_CONFIG.
+SQLITE_PATH = os.environ.get('SCANTOTALS_SQLITE')
+
+# Errores de base de datos; conector() agrega los de mysql.connector al importarlo (antes no
+# puede haberlos).
+Error = (sqlite3.Error,)
+
+# Modo de escritura:
+#   "upsert"    -> un INSERT ... ON DUPLICATE KEY UPDATE por lote (requiere la clave única de migraciones/).
+#   "reemplazo" -> DELETE del registro anterior + INSERT (comportamiento original).
+#   "auto"      -> usa "upsert" solo si la tabla ya tiene la clave única uq_name_fecha_hour.
+MODO_ESCRITURA = "auto"
+# Un lote se envía al llegar a TAMANO_LOTE filas o BYTES_LOTE bytes estimados, lo que ocurra primero;
+# el tamaño en bytes además se limita a max_allowed_packet del servidor.
+TAMANO_LOTE = 500
+BYTES_LOTE = 1 << 20
+# "lote": commit después de cada lote (un error tardío solo pierde el lote en curso).
+# "transaccion": un solo commit al final (todo o nada).
+POLITICA_COMMIT = "lote"
+# Conexiones simultáneas contra el proxy remoto durante una ejecución en paralelo.
+TAMANO_POOL = 3
+
+COLUMNAS = "name, fecha, mean, median, hits, multi, `inf fails`, shortest, longest, total, stddev, hour, num"
+
+# Se conserva el registro con más hits: las columnas solo se reemplazan si el nuevo valor de hits es mayor.
+# "hits" va al final porque MySQL evalúa las asignaciones en orden.
+UPSERT_CLAUSE = """
+        ON DUPLICATE KEY UPDATE
+            mean = IF(VALUES(hits) > hits, VALUES(mean), mean),
+            median = IF(VALUES(hits) > hits, VALUES(median), median),
+            multi = IF(VALUES(hits) > hits, VALUES(multi), multi),
+            `inf fails` = IF(VALUES(hits) > hits, VALUES(`inf fails`), `inf fails`),
+            shortest = IF(VALUES(hits) > hits, VALUES(shortest), shortest),
+            longest = IF(VALUES(hits) > hits, VALUES(longest), longest),
+            total = IF(VALUES(hits) > hits, VALUES(total), total),
+            stddev = IF(VALUES(hits) > hits, VALUES(stddev), stddev),
+            num = IF(VALUES(hits) > hits, VALUES(num), num),
+            hits = GREATEST(hits, VALUES(hits))
+        """
+
+# Variante con la columna huella (migración 002): la fila solo se envía si su huella cambió, así
+# que a igualdad de hits también se reemplazan los valores (p. ej. mean o stddev corregidos).
+UPSERT_CLAUSE_HUELLA = """
+        ON DUPLICATE KEY UPDATE
+            mean = IF(VALUES(hits) >= hits, VALUES(mean), mean),
+            median = IF(VALUES(hits) >= hits, VALUES(median), median),
+            multi = IF(VALUES(hits) >= hits, VALUES(multi), multi),
+            `inf fails` = IF(VALUES(hits) >= hits, VALUES(`inf fails`), `inf fails`),
+            shortest = IF(VALUES(hits) >= hits, VALUES(shortest), shortest),
+            longest = IF(VALUES(hits) >= hits, VALUES(longest), longest),
+            total = IF(VALUES(hits) >= hits, VALUES(total), total),
+            stddev = IF(VALUES(hits) >= hits, VALUES(stddev), stddev),
+            num = IF(VALUES(hits) >= hits, VALUES(num), num),
+            huella = IF(VALUES(hits) >= hits, VALUES(huella), huella),
+            hits = GREATEST(hits, VALUES(hits))
+        """
+# Posiciones de build_record que entran en la huella: todo salvo la clave (name, fecha, hour).
+_CAMPOS_HUELLA = (2, 3, 4, 5, 6, 7, 8, 9, 10, 12)
+
+
+def conector():
+    """Importa mysql.connector la primera vez que se necesita y lo devuelve."""
+    global Error
+    import mysql.connector
+    Error = (mysql.connector.Error, sqlite3.Error)
+    return mysql.connector
+
+
+def conectar():
+    connection = conector().connect(**DB_CONFIG)
+    if connection.is_connected():
+        log.info("Conexión establecida exitosamente.")
+    return connection
+
+
+def crear_pool(pool_size=TAMANO_POOL):
+    """Crea un pool de conexiones; get_connection() entrega una y close() la devuelve al pool."""
+    if SQLITE_PATH:
+        from .sqlite_local import SQLitePool
+        pool = SQLitePool(SQLITE_PATH, pool_size)
+    else:
+        conector()
+        from mysql.connector import pooling
+        pool = pooling.MySQLConnectionPool(pool_name="scantotals", pool_size=pool_size, **DB_CONFIG)
+    log.info("Pool de %d conexiones establecido exitosamente.", pool_size)
+    return pool
+
+
+def obtener_conexion(pool):
+    """
+    Toma una conexión del pool y la valida con un ping (un solo viaje, sin volver a autenticar).
+    Si el proxy cerró la conexión mientras estaba libre, ping(reconnect=True) la reabre.
+    """
+    connection = pool.get_connection()
+    try:
+        connection.ping(reconnect=True, attempts=2, delay=1)
+    except Error:
+        connection.close()
+        raise
+    return connection
+
+
+def huella(registro):
+    """
+    Huella de 63 bits (cabe en BIGINT con o sin signo, también en SQLite) de las columnas ya
+    limpias de un registro de build_record, salvo la clave.
+    """
+    texto = "\x1f".join([repr(registro[i]) for i in _CAMPOS_HUELLA])
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8', 'surrogatepass'), digest_size=8).digest(),
+                          'big') >> 1
+
+
+def prefetch_existing_hits(cursor, tabla, fechas, con_huella=False):
+    """
+    Carga en una sola consulta los hits existentes de todas las fechas presentes en el archivo.
+    Devuelve un índice {(name, fecha, hour): hits} para comparar sin consultar la base de datos por fila;
+    con `con_huella`, los valores son (hits, huella).
+    """
+    if not fechas:
+        return {}
+    cursor.execute(*sql_existentes(tabla, fechas, con_huella))
+    return indice_existentes(cursor.fetchall(), con_huella)
+
+
+def sql_existentes(tabla, fechas, con_huella=False):
+    """Consulta y parámetros de prefetch_existing_hits."""
+    fechas = sorted(fechas)
+    placeholders = ", ".join(["%s"] * len(fechas))
+    query = f"""
+    SELECT name, fecha, hour, hits{", huella" if con_huella else ""} FROM {tabla} WHERE fecha IN ({placeholders})
+    """
+    return query, tuple(fechas)
+
+
+def indice_existentes(filas, con_huella=False):
+    """Índice de prefetch_existing_hits a partir de las filas de sql_existentes."""
+    existing_index = {}
+    if con_huella:
+        for name, fecha, hour, hits, huella_existente in filas:
+            existing_index.setdefault((name.strip(), str(fecha), str(hour)), (hits, huella_existente))
+    else:
+        for name, fecha, hour, hits in filas:
+            existing_index.setdefault((name.strip(), str(fecha), str(hour)), hits)
+    return existing_index
+
+
+def sql_borrar(tabla):
+    return f"""
+    DELETE FROM {tabla} WHERE name = %s AND fecha = %s AND hour = %s
+    """
+
+
+def delete_existing_record(cursor, tabla, name, fecha, hour):
+    cursor.execute(sql_borrar(tabla), (name.strip(), fecha, hour))
+
+
+def sql_clave_unica(tabla):
+    """Consulta y parámetros que devuelven la clave única uq_name_fecha_hour, si la tabla la tiene."""
+    return f"SHOW INDEX FROM {tabla} WHERE Key_name = %s", ("uq_name_fecha_hour",)
+
+
+# Por tabla, si tiene la clave única; como las columnas, se consulta una vez por proceso.
+_claves_unicas = {}
+
+
+def resolve_write_mode(cursor, tabla):
+    """
+    Indica si la escritura debe hacerse con upsert según MODO_ESCRITURA.
+    En modo "auto" se verifica que exista la clave única uq_name_fecha_hour en la tabla.
+    """
+    if MODO_ESCRITURA != "auto":
+        return MODO_ESCRITURA == "upsert"
+    if tabla not in _claves_unicas:
+        cursor.execute(*sql_clave_unica(tabla))
+        _claves_unicas[tabla] = bool(cursor.fetchall())
+    return _claves_unicas[tabla]
+
+
+async def resolve_write_mode_async(cursor, tabla):
+    """resolve_write_mode con un cursor asíncrono (asincrono.py); comparte la caché por proceso."""
+    if MODO_ESCRITURA != "auto":
+        return MODO_ESCRITURA == "upsert"
+    if tabla not in _claves_unicas:
+        await cursor.execute(*sql_clave_unica(tabla))
+        _claves_unicas[tabla] = bool(await cursor.fetchall())
+    return _claves_unicas[tabla]
+
+
+_columnas = {}
+
+
+def sql_columna(tabla, columna):
+    return f"SHOW COLUMNS FROM {tabla} LIKE %s", (columna,)
+
+
+def tiene_columna(cursor, tabla, columna):
+    """Indica si la tabla tiene la columna; se consulta una vez por tabla, columna y proceso."""
+    if (tabla, columna) not in _columnas:
+        cursor.execute(*sql_columna(tabla, columna))
+        _columnas[tabla, columna] = bool(cursor.fetchall())
+    return _columnas[tabla, columna]
+
+
+async def tiene_columna_async(cursor, tabla, columna):
+    """tiene_columna con un cursor asíncrono; comparte la caché por proceso."""
+    if (tabla, columna) not in _columnas:
+        await cursor.execute(*sql_columna(tabla, columna))
+        _columnas[tabla, columna] = bool(await cursor.fetchall())
+    return _columnas[tabla, columna]
+
+
+def tiene_huella(cursor, tabla):
+    """Indica si la tabla tiene la columna huella (migración 002)."""
+    return tiene_columna(cursor, tabla, "huella")
+
+
+async def tiene_huella_async(cursor, tabla):
+    return await tiene_columna_async(cursor, tabla, "huella")
+
+
+def sql_insert(tabla, use_upsert, con_huella=False):
+    """
+    INSERT de una fila; executemany de mysql.connector lo reescribe como un solo INSERT
+    de varias filas (también con la cláusula ON DUPLICATE KEY UPDATE).
+    Con `con_huella`, cada registro lleva la huella como columna 14.
+    """
+    if con_huella:
+        sql = f"""
+        INSERT INTO {tabla} ({COLUMNAS}, huella)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        return sql + UPSERT_CLAUSE_HUELLA if use_upsert else sql
+    sql = f"""
+        INSERT INTO {tabla} ({COLUMNAS})
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+    return sql + UPSERT_CLAUSE if use_upsert else sql
+
+
+_max_allowed_packet = None
+SQL_MAX_ALLOWED_PACKET = "SELECT @@max_allowed_packet"
+
+
+def max_allowed_packet(cursor):
+    """max_allowed_packet del servidor, consultado una vez por proceso."""
+    global _max_allowed_packet
+    if _max_allowed_packet is None:
+        cursor.execute(SQL_MAX_ALLOWED_PACKET)
+        _max_allowed_packet = int(cursor.fetchone()[0])
+    return _max_allowed_packet
+
+
+async def max_allowed_packet_async(cursor):
+    """max_allowed_packet con un cursor asíncrono; comparte la caché por proceso."""
+    global _max_allowed_packet
+    if _max_allowed_packet is None:
+        await cursor.execute(SQL_MAX_ALLOWED_PACKET)
+        _max_allowed_packet = int((await cursor.fetchall())[0][0])
+    return _max_allowed_packet
+
+
+def bytes_registro(registro):
+    # Estimación del tamaño de la fila en el INSERT: texto, números (~12 caracteres), comillas y comas.
+    return sum(len(valor) if valor.__class__ is str else 12 for valor in registro) + 3 * len(registro)
+
+
+class EscritorLotes:
+    """
+    Escribe registros a medida que llegan, sin acumular el archivo completo en memoria.
+
+    Los registros se agrupan hasta `filas` filas o `bytes_lote` bytes estimados (sin pasar de
+    max_allowed_packet) y cada lote se envía con un executemany. En modo reemplazo, los DELETE
+    de las filas del lote se ejecutan justo antes de su INSERT, para que queden en la misma
+    transacción. Con la política "lote" se confirma después de cada lote; con "transaccion",
+    solo en cerrar(). `al_enviar(registros)`, si se indica, se llama con cada lote después del
+    INSERT y antes del commit (p. ej. resumen.actualizar).
+    """
+
+    def __init__(self, connection, cursor, tabla, use_upsert, filas=None, bytes_lote=None, politica=None,
+                 metricas=None, con_huella=False, al_enviar=None):
+        self.connection = connection
+        self.cursor = cursor
+        self.tabla = tabla
+        self.politica = politica or POLITICA_COMMIT
+        self.escritas = 0
+        self.lotes = 0
+        self._sql = sql_insert(tabla, use_upsert, con_huella)
+        self._filas = filas or TAMANO_LOTE
+        # Margen para la sentencia y la cláusula de upsert, que se envían una vez por lote.
+        limite_paquete = max_allowed_packet(cursor) - len(self._sql) - 1024
+        self._bytes = max(1, min(bytes_lote or BYTES_LOTE, limite_paquete))
+        self._medir = metricas.medir if metricas is not None else (lambda etapa: nullcontext())
+        self._al_enviar = al_enviar
+        self._registros = []
+        self._borrar = []
+        self._bytes_pendientes = 0
+
+    def agregar(self, registro, borrar=None):
+        """Agrega un registro; `borrar` = (name, fecha, hour) del registro anterior a eliminar (modo reemplazo)."""
+        tamano = bytes_registro(registro)
+        if self._registros and self._bytes_pendientes + tamano > self._bytes:
+            self.enviar()
+        self._registros.append(registro)
+        self._bytes_pendientes += tamano
+        if borrar is not None:
+            self._borrar.append(borrar)
+        if len(self._registros) >= self._filas:
+            self.enviar()
+
+    def enviar(self):
+        """Envía el lote pendiente (y lo confirma con la política "lote")."""
+        if not self._registros:
+            return
+        registros, borrar = self._registros, self._borrar
+        self._registros = []
+        self._borrar = []
+        self._bytes_pendientes = 0
+        self._enviar_lote(registros, borrar)
+
+    def _enviar_lote(self, registros, borrar):
+        if borrar:
+            with self._medir('borrado'):
+                for name, fecha, hour in borrar:
+                    delete_existing_record(self.cursor, self.tabla, name, fecha, hour)
+        with self._medir('insercion'):
+            self.cursor.executemany(self._sql, registros)
+        if self._al_enviar is not None:
+            with self._medir('resumen'):
+                self._al_enviar(registros)
+        self.escritas += len(registros)
+        self.lotes += 1
+        if self.politica == "lote":
+            with self._medir('commit'):
+                self.connection.commit()
+
+    def vaciar(self):
+        """Envía el lote pendiente y vuelve cuando quedó escrito (aquí, lo mismo que enviar)."""
+        self.enviar()
+
+    def conexion(self):
+        """Contexto para usar la conexión fuera del escritor (p. ej. consultas); aquí no hay nada que esperar."""
+        return nullcontext()
+
+    def cancelar(self):
+        """Descarta lo pendiente después de un error; la transacción se deshace aparte."""
+        self._registros = []
+        self._borrar = []
+        self._bytes_pendientes = 0
+
+    def cerrar(self):
+        """Envía lo pendiente, confirma y devuelve el total de filas escritas."""
+        self.enviar()
+        if self.politica != "lote" and self.lotes:
+            with self._medir('commit'):
+                self.connection.commit()
+        return self.escritas
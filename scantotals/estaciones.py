@@ -0,0 +1,85 @@
+"""
+Tabla de definición de estaciones.
+
+Las siete variantes de app.py solo difieren en la tabla destino, los archivos de entrada,
+la regla de redondeo de la hora, la forma de extraer la fecha, la limpieza de valores y,
+en Biselado, el ajuste "Hits - INF Fails". Todo eso queda descrito aquí.
+"""
+import os
+from datetime import time
+from typing import NamedTuple
+
+DIRECTORIO_VISION = 'I:/VISION'
+
+# El turno nocturno va de 22:00 a 06:30; fuera de ese rango se usa el archivo diurno.
+HORA_NOCHE = time(22, 0)
+HORA_MANANA = time(6, 30)
+
+
+class Estacion(NamedTuple):
+    nombre: str
+    tabla: str
+    archivo_noche: str
+    archivo_dia: str
+    # "cruda": la hora tal cual aparece; "redondeo_23": desde las 23:00 se redondea a la hora en punto;
+    # "redondeo_nocturno": entre 22:00 y 05:59 se redondea a la hora en punto.
+    regla_hora: str = "cruda"
+    # "simple": día del mes actual; "mes_siguiente": si el día no existe en el mes actual se usa el siguiente;
+    # "mes_texto": admite claves con el mes en texto (NOMBRE-Mes-DD).
+    regla_fecha: str = "simple"
+    # Convierte mean, median, etc. a float (Manuales) en lugar de dejarlos como texto.
+    limpieza_numerica: bool = False
+    # Biselado guarda "Hits - INF Fails" en la columna hits.
+    restar_inf_fails: bool = False
+
+
+ESTACIONES = {e.nombre: e for e in (
+    Estacion("generadores", "generadores", "scantotals_GENNVO.auto.tab", "scantotals_YVES.auto.tab",
+             regla_hora="redondeo_23", regla_fecha="mes_siguiente"),
+    Estacion("pulidos", "pulidos", "scantotals_PULNVO.auto.tab", "scantotals_YVES1.auto.tab"),
+    Estacion("bloqueo_de_tallados", "bloqueo_de_tallados", "scantotals_BLQTNVO.auto.tab", "scantotals_YVES2.auto.tab",
+             regla_hora="redondeo_nocturno", regla_fecha="mes_siguiente"),
+    Estacion("bloqueo_de_terminados", "bloqueo_de_terminados", "scantotals_BLQTENVO.auto.tab", "scantotals_YVES3.auto.tab",
+             regla_fecha="mes_siguiente"),
+    Estacion("engravers", "engravers", "scantotals_ENGRNVO.auto.tab", "scantotals_YVES4.auto.tab",
+             regla_fecha="mes_siguiente"),
+    Estacion("biselados", "biselados", "scantotals_BISNVO.auto.tab", "scantotals_YVES5.auto.tab",
+             restar_inf_fails=True),
+    Estacion("manuales", "manuales", "scantotals_OTRNVO.auto.tab", "scantotals_YVES6.auto.tab",
+             regla_fecha="mes_texto", limpieza_numerica=True),
+)}
+
+
+def es_turno_nocturno(now):
+    """Indica si a la hora de `now` corresponde procesar el archivo nocturno (NVO)."""
+    current_time = now.time()
+    return current_time >= HORA_NOCHE or current_time < HORA_MANANA
+
+
+def _ruta(nombre):
+    return os.path.join(DIRECTORIO_VISION, nombre).replace('\\', '/')
+
+
+def seleccionar_archivo(estacion, now):
+    """Devuelve la ruta del archivo que corresponde a la estación según la hora actual."""
+    return _ruta(estacion.archivo_noche if es_turno_nocturno(now) else estacion.archivo_dia)
+
+
+def identificar_archivo(ruta):
+    """
+    Devuelve (estación, nocturno) según el nombre del archivo, o None si no es de ninguna estación.
+    Se compara la parte anterior al primer punto, así que también se reconocen copias archivadas
+    como scantotals_YVES.auto.20261010T2330.tab.
+    """
+    base = os.path.basename(ruta).split('.', 1)[0]
+    for estacion in ESTACIONES.values():
+        if base == estacion.archivo_noche.split('.', 1)[0]:
+            return estacion, True
+        if base == estacion.archivo_dia.split('.', 1)[0]:
+            return estacion, False
+    return None
+
+
+def rutas_estacion(estacion):
+    """Rutas de los dos archivos de la estación (nocturno y diurno)."""
+    return _ruta(estacion.archivo_noche), _ruta(estacion.archivo_dia)
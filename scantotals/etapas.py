@@ -0,0 +1,218 @@
+"""
+Pipeline por etapas en hilos (--etapas): lectura, comparación y escritura de una estación
+a la vez, unidas por colas acotadas.
+
+  lectura      hilo propio: recorre el generador del motor (lectura, parseo y validación del
+               archivo) y entrega los candidatos por bloques de TAMANO_BLOQUE en la cola
+               "candidatos" (COLA_BLOQUES bloques como máximo);
+  comparación  el hilo de la estación: escribir_candidatos (consulta de existentes, colapso
+               de duplicados y comparación de hits) y arma los lotes, que pone en la cola
+               "lotes" (COLA_LOTES como máximo);
+  escritura    hilo propio: envía cada lote (DELETE, INSERT, resumen y commit) como
+               db.EscritorLotes.
+
+Mientras un lote está en viaje a la base de datos, la comparación arma el siguiente y la
+lectura sigue parseando. Si la base es lenta, las colas se llenan y cada etapa espera a la
+siguiente: la memoria queda acotada por el tamaño de las colas.
+
+Escritura y consultas comparten la conexión de la estación: la comparación la toma con
+EscritorEnHilo.conexion(), que espera a que termine el lote en curso. Los lotes se escriben
+en orden, así que un DELETE nunca se adelanta al INSERT de la fila que borra; cuando la
+comparación necesita ver lo escrito (una fecha que vuelve a consultarse) usa vaciar().
+
+Cada cola deja en las métricas de la estación cuánto esperó cada lado ("espera_lectura" y
+"espera_candidatos" en la cola de candidatos, "espera_comparacion" y "espera_escritura" en la
+de lotes, y "espera_conexion" para las consultas), su profundidad máxima (contador
+"cola_<nombre>_max") y cuántas veces se encontró llena ("cola_<nombre>_llena"). Cada clave de
+las métricas la escribe un solo hilo.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from . import db
+
+# Candidatos por bloque de la cola de lectura y bloques que esperan como máximo.
+TAMANO_BLOQUE = 1000
+COLA_BLOQUES = 8
+# Lotes armados que esperan a la escritura como máximo.
+COLA_LOTES = 2
+
+_FIN = object()
+
+
+class _Fallo:
+    """Error de la lectura, que se vuelve a lanzar en el hilo que consume los candidatos."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class ColaMedida:
+    """
+    queue.Queue acotada que registra en `metricas` las esperas del productor y del
+    consumidor y la profundidad de la cola.
+    """
+
+    def __init__(self, nombre, tamano, metricas, espera_productor, espera_consumidor):
+        self.nombre = nombre
+        self._cola = queue.Queue(tamano)
+        self._metricas = metricas
+        self._espera_productor = espera_productor
+        self._espera_consumidor = espera_consumidor
+
+    def poner(self, elemento, detenido=None):
+        """Pone el elemento, esperando lugar si hace falta; con `detenido` activado deja de esperar y devuelve False."""
+        contadores = self._metricas.contadores
+        try:
+            self._cola.put_nowait(elemento)
+        except queue.Full:
+            contadores[f'cola_{self.nombre}_llena'] += 1
+            inicio = time.perf_counter()
+            try:
+                while True:
+                    try:
+                        self._cola.put(elemento, timeout=0.1)
+                        break
+                    except queue.Full:
+                        if detenido is not None and detenido.is_set():
+                            return False
+            finally:
+                self._metricas.etapas[self._espera_productor] += time.perf_counter() - inicio
+        profundidad = self._cola.qsize()
+        if profundidad > contadores[f'cola_{self.nombre}_max']:
+            contadores[f'cola_{self.nombre}_max'] = profundidad
+        return True
+
+    def tomar(self):
+        try:
+            return self._cola.get_nowait()
+        except queue.Empty:
+            inicio = time.perf_counter()
+            elemento = self._cola.get()
+            self._metricas.etapas[self._espera_consumidor] += time.perf_counter() - inicio
+            return elemento
+
+    def listo(self):
+        """Marca como procesado el último elemento tomado (ver esperar)."""
+        self._cola.task_done()
+
+    def esperar(self):
+        """Espera a que se procesen todos los elementos puestos."""
+        self._cola.join()
+
+
+class LecturaEnHilo:
+    """
+    Etapa de lectura: recorre `candidatos` (el generador del motor) en un hilo propio.
+    Al iterarla se obtienen los mismos candidatos, en el mismo orden; cerrar() detiene el hilo
+    si el consumidor terminó antes (p. ej. por un error de la base de datos).
+    """
+
+    def __init__(self, candidatos, metricas, nombre):
+        self._cola = ColaMedida("candidatos", COLA_BLOQUES, metricas, 'espera_lectura', 'espera_candidatos')
+        self._detenido = threading.Event()
+        self._hilo = threading.Thread(target=self._leer, args=(candidatos,), name=f"scantotals-lectura-{nombre}",
+                                      daemon=True)
+        self._hilo.start()
+
+    def _leer(self, candidatos):
+        bloque = []
+        try:
+            for candidato in candidatos:
+                bloque.append(candidato)
+                if len(bloque) >= TAMANO_BLOQUE:
+                    if not self._cola.poner(bloque, self._detenido):
+                        return
+                    bloque = []
+            if not bloque or self._cola.poner(bloque, self._detenido):
+                self._cola.poner(_FIN, self._detenido)
+        except Exception as err:
+            self._cola.poner(_Fallo(err), self._detenido)
+        finally:
+            candidatos.close()
+
+    def __iter__(self):
+        while True:
+            bloque = self._cola.tomar()
+            if bloque is _FIN:
+                return
+            if bloque.__class__ is _Fallo:
+                raise bloque.error
+            yield from bloque
+
+    def cerrar(self):
+        self._detenido.set()
+        self._hilo.join()
+
+
+class EscritorEnHilo(db.EscritorLotes):
+    """
+    db.EscritorLotes con los envíos en un hilo propio: enviar() pone el lote en la cola y
+    vuelve enseguida. Un error de escritura se vuelve a lanzar en la siguiente llamada del hilo
+    de comparación; los lotes que quedaban en la cola se descartan.
+    """
+
+    def __init__(self, connection, cursor, tabla, use_upsert, metricas, **opciones):
+        super().__init__(connection, cursor, tabla, use_upsert, metricas=metricas, **opciones)
+        self._metricas = metricas
+        self._uso = threading.Lock()
+        self._cola = ColaMedida("lotes", COLA_LOTES, metricas, 'espera_comparacion', 'espera_escritura')
+        self._error = None
+        self._descartar = False
+        self._terminado = False
+        self._hilo = threading.Thread(target=self._escribir, name=f"scantotals-escritura-{tabla}", daemon=True)
+        self._hilo.start()
+
+    def _escribir(self):
+        while True:
+            lote = self._cola.tomar()
+            try:
+                if lote is _FIN:
+                    return
+                if self._error is None and not self._descartar:
+                    with self._uso:
+                        super()._enviar_lote(*lote)
+            except Exception as err:
+                self._error = err
+            finally:
+                self._cola.listo()
+
+    def _revisar(self):
+        if self._error is not None:
+            raise self._error
+
+    def _enviar_lote(self, registros, borrar):
+        self._revisar()
+        self._cola.poner((registros, borrar))
+
+    def vaciar(self):
+        self.enviar()
+        self._cola.esperar()
+        self._revisar()
+
+    @contextmanager
+    def conexion(self):
+        """Toma la conexión para una consulta del hilo de comparación, entre un lote y el siguiente."""
+        inicio = time.perf_counter()
+        with self._uso:
+            self._metricas.etapas['espera_conexion'] += time.perf_counter() - inicio
+            yield
+
+    def _terminar(self):
+        if not self._terminado:
+            self._terminado = True
+            self._cola.poner(_FIN)
+            self._hilo.join()
+
+    def cerrar(self):
+        self.enviar()
+        self._terminar()
+        self._revisar()
+        return super().cerrar()
+
+    def cancelar(self):
+        super().cancelar()
+        self._descartar = True
+        self._terminar()
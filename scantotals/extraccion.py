@@ -0,0 +1,188 @@
+"""
+Funciones de extracción y limpieza de los campos de una fila de scantotals.
+
+Reúnen las variantes que antes estaban copiadas en cada app.py; la variante a usar
+se elige con los campos regla_hora, regla_fecha y limpieza_numerica de la estación.
+"""
+import re
+import calendar
+from datetime import datetime, timedelta
+
+from .contexto import ContextoEjecucion, ahora
+
+VALORES_NULOS = ('N/A', 'inf%')
+_HORA_VALOR = re.compile(r"^\d{1,2}:\d{2}$")
+
+
+def extract_hour(field_name, regla="cruda"):
+    """
+    Extrae la hora del campo.
+    Con las reglas de redondeo, las horas nocturnas con minutos >= 30 pasan a la hora siguiente
+    y se formatean como 'HH:00'.
+    """
+    hour_match = re.search(r"(\d{1,2}):(\d{2})", field_name)
+    if not hour_match:
+        return ""
+    if regla == "cruda":
+        return f"{hour_match.group(1)}:{hour_match.group(2)}"
+    hour = int(hour_match.group(1))
+    minute = int(hour_match.group(2))
+    if regla == "redondeo_23":
+        nocturna = hour > 22
+    else:
+        nocturna = hour >= 22 or hour < 6
+    if nocturna:
+        if minute >= 30:
+            hour += 1
+        return f"{hour:02d}:00"
+    return f"{hour:02d}:{minute:02d}"
+
+
+def extract_num(field_name):
+    """Extrae un número al inicio del campo (si existe)."""
+    num_match = re.search(r"^(\d+)", field_name)
+    return num_match.group(1) if num_match else None
+
+
+def _parse_day(day_part):
+    day_match = re.match(r"\s*(\d+)", day_part)
+    return int(day_match.group(1)) if day_match else None
+
+
+def extract_date(field_name, extracted_hour, regla="simple", now=None):
+    """
+    Extrae la fecha a partir de field_name.
+    Se asume que el campo contiene un guión '-' y que la parte siguiente empieza con el día.
+    Antes de las 04:00, un día mayor que el actual pertenece al día anterior, y la hora "23:30"
+    resta un día adicional. Devuelve None si el día no se puede interpretar.
+    """
+    parts = field_name.split('-')
+    if len(parts) < 2:
+        return None
+    if regla == "mes_texto" and len(parts) >= 3 and parts[1].isalpha():
+        day_part = parts[2][:2]
+    else:
+        day_part = parts[1]
+    day = _parse_day(day_part)
+    if not day:
+        return None
+    now = now or ahora()
+    current_year = now.year
+    current_month = now.month
+    if regla == "mes_siguiente":
+        # Si el día no existe en el mes actual, se asume que corresponde al siguiente mes.
+        max_day = calendar.monthrange(current_year, current_month)[1]
+        if day > max_day:
+            if current_month == 12:
+                current_year += 1
+                current_month = 1
+            else:
+                current_month += 1
+            max_day = calendar.monthrange(current_year, current_month)[1]
+            if day > max_day:
+                day = max_day
+    try:
+        extracted_date = datetime(current_year, current_month, day)
+    except ValueError:
+        return None
+    if now.hour < 4 and day > now.day:
+        extracted_date -= timedelta(days=1)
+    if extracted_hour == "23:30":
+        extracted_date -= timedelta(days=1)
+    return extracted_date.strftime("%Y-%m-%d")
+
+
+def clean_value(value):
+    return None if value in VALORES_NULOS else value
+
+
+def clean_numeric_value(value):
+    """
+    Variante de Manuales: las horas 'H:MM' se conservan como texto y el resto se convierte a float.
+    """
+    if value in VALORES_NULOS:
+        return None
+    if _HORA_VALOR.match(value):
+        hours, minutes = map(int, value.split(':'))
+        if minutes >= 60:
+            return None
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def clean_percentage(value):
+    if value in VALORES_NULOS:
+        return None
+    if isinstance(value, str) and value.endswith('%'):
+        return float(value.strip('%')) / 100
+    return float(value)
+
+
+def in_shift_window(extracted_hour, nocturno):
+    """
+    Filtra según el turno del archivo (ventanas de contexto.py):
+    nocturno entre 22:00 (1320 min) y 05:00 (300 min), diurno entre 06:30 (390 min) y 21:30 (1290 min).
+    """
+    try:
+        h, m = map(int, extracted_hour.split(':'))
+    except ValueError:
+        return False
+    return ContextoEjecucion.en_turno(h * 60 + m, nocturno)
+
+
+def is_valid_time_for_processing(extracted_hour, extracted_date, now=None):
+    """Valida que la fecha/hora extraídas sean anteriores a (ahora - 1 hora)."""
+    now = now or ahora()
+    try:
+        extracted_datetime = datetime.strptime(f"{extracted_date} {extracted_hour}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return False
+    # Excepción para registros con hora "23:00": se aceptan a partir de las 23:50.
+    if extracted_hour == "23:00" and (now.hour, now.minute) >= (23, 50):
+        return True
+    return extracted_datetime <= now - timedelta(hours=1)
+
+
+def extract_hits(row, estacion, hits_index=3, inf_fails_index=5):
+    """
+    Devuelve los hits de la fila como entero, o None si no se pueden convertir.
+    En Biselado se resta el valor de INF Fails (si no se puede convertir se asume 0).
+    """
+    try:
+        current_hits = int(row[hits_index])
+    except (ValueError, IndexError):
+        return None
+    if estacion.restar_inf_fails:
+        inf_fails_value = clean_value(row[inf_fails_index])
+        if inf_fails_value is not None:
+            try:
+                current_hits -= int(inf_fails_value)
+            except ValueError:
+                pass
+    return current_hits
+
+
+def build_record(row, estacion, extracted_date, extracted_hour, extracted_num, current_hits):
+    """
+    Arma la tupla en el orden de las columnas de la tabla:
+    (name, fecha, mean, median, hits, multi, `inf fails`, shortest, longest, total, stddev, hour, num)
+    """
+    clean = clean_numeric_value if estacion.limpieza_numerica else clean_value
+    return (
+        row[0],                     # name
+        extracted_date,             # fecha
+        clean(row[1]),              # mean
+        clean(row[2]),              # median
+        current_hits,               # hits
+        clean_percentage(row[4]),   # multi
+        clean(row[5]),              # inf fails
+        clean(row[6]),              # shortest
+        clean(row[7]),              # longest
+        clean(row[8]),              # total
+        clean(row[9]),              # stddev
+        extracted_hour,             # hour
+        extracted_num,              # num
+    )
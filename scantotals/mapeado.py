@@ -0,0 +1,169 @@
+"""
+Motor de lectura sobre el archivo mapeado en memoria (mmap): "--motor mmap".
+
+El motor por filas abre el archivo en modo texto y pasa cada línea por csv.reader: toda fila
+se decodifica y se parte en columnas, aunque la mayoría quede fuera de la ventana del turno
+(22:00 a 06:00 o 06:30 a 21:30) y se descarte enseguida. Este motor mapea el archivo y
+trabaja sobre los bytes:
+  - la cabecera 'Key' se busca con una expresión regular sobre el mapa, y las líneas se
+    separan por bloques de TAMANO_BLOQUE bytes, sin copiar el archivo entero;
+  - de cada línea solo se miran los bytes de la hora, al final de la clave ('... HH:MM' antes
+    del primer tabulador). La decisión de la ventana se memoriza por esos bytes, así que una
+    fila fuera de turno se cuenta y se saltea sin decodificarla ni partirla;
+  - las demás se decodifican, se parten por tabuladores y siguen por ParserClave.decodificar,
+    igual que en el motor por filas.
+
+Candidatos, contadores de descarte, filas diferidas y checkpoint son idénticos a los de
+pipeline.iterar_candidatos; benchmarks/bench_mapeado.py lo verifica. Si el archivo tiene
+comillas, bytes NUL o saltos de línea '\\r' sueltos (casos en los que csv.reader y el modo texto
+no equivalen a partir por bytes), se lee con el motor por filas. Las filas salteadas por la
+hora no se decodifican, así que un byte inválido en ellas no produce error.
+
+Mientras dura la lectura el archivo queda mapeado: en Windows, VISION no puede truncarlo en
+ese intervalo, y en POSIX truncarlo hace fallar el proceso (SIGBUS) al tocar la parte perdida.
+Por eso es un motor opcional y no reemplaza al de filas.
+"""
+import locale
+import logging
+import mmap
+import re
+import time
+
+from . import pipeline
+from .checkpoint import hash_bytes, hash_linea
+from .metricas import MetricasEstacion
+from .parser import FUERA_DE_TURNO, FUTURO, HITS_INVALIDOS, ParserClave
+
+log = logging.getLogger(__name__)
+
+# Bytes por bloque del mapa que se copian y se parten en líneas de una vez (el último corte
+# se mueve al salto de línea siguiente).
+TAMANO_BLOQUE = 4 * 2**20
+
+# Un '\r' que no es parte de '\r\n' (el modo texto lo toma como salto de línea).
+_CR_SUELTO = re.compile(rb'\r(?!\n)')
+_CABECERA = re.compile(rb'^Key(?=\t|\r?\n|\Z)', re.MULTILINE)
+
+
+def _sin_cambio(checkpoint, linea, codificacion):
+    """Registra la línea (con su '\n', como la ve CheckpointArchivo.filtrar); True si no cambió."""
+    if linea.isascii():
+        tabulador = linea.find(b'\t')
+        clave = linea if tabulador == -1 else linea[:tabulador]
+        return checkpoint.registrar(clave.decode('ascii'), hash_bytes(linea))
+    texto = linea.decode(codificacion)
+    return checkpoint.registrar(texto.split('\t', 1)[0], hash_linea(texto))
+
+
+def _bloques(datos, posicion, metricas):
+    """Líneas del mapa desde `posicion`, por bloques, cada una con su '\n' (salvo la última del archivo)."""
+    total = len(datos)
+    crlf = datos.find(b'\r', posicion) != -1
+    etapas = metricas.etapas
+    while posicion < total:
+        inicio = time.perf_counter()
+        corte = datos.rfind(b'\n', posicion, posicion + TAMANO_BLOQUE) + 1
+        if corte == 0:
+            corte = datos.find(b'\n', posicion + TAMANO_BLOQUE) + 1 or total
+        bloque = datos[posicion:corte]
+        if crlf:
+            bloque = bloque.replace(b'\r\n', b'\n')
+        lineas = bloque.splitlines(keepends=True)
+        posicion = corte
+        etapas['lectura'] += time.perf_counter() - inicio
+        yield lineas
+
+
+def iterar_candidatos(input_file, estacion, nocturno=None, checkpoint=None, contexto=None, metricas=None):
+    """Como pipeline.iterar_candidatos (mismos candidatos y contadores), leyendo el archivo mapeado."""
+    if nocturno is None:
+        nocturno = "NVO" in input_file
+    if metricas is None:
+        metricas = MetricasEstacion(estacion.nombre, input_file)
+    with open(input_file, 'rb') as archivo:
+        inicio = time.perf_counter()
+        try:
+            datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Un archivo vacío no se puede mapear; tampoco tiene cabecera.
+            datos = None
+        # Comillas, NUL o '\r' sueltos: csv.reader y el modo texto no equivalen a partir por bytes.
+        if datos is None or datos.find(b'"') != -1 or datos.find(b'\x00') != -1 or _CR_SUELTO.search(datos):
+            metricas.etapas['lectura'] += time.perf_counter() - inicio
+            if datos is not None:
+                datos.close()
+            yield from pipeline.iterar_candidatos(input_file, estacion, nocturno, checkpoint, contexto, metricas)
+            return
+        with datos:
+            cabecera = _CABECERA.search(datos)
+            metricas.etapas['lectura'] += time.perf_counter() - inicio
+            if cabecera is not None:
+                yield from _recorrer(datos, cabecera.end(), estacion, nocturno, checkpoint, contexto, metricas)
+            elif checkpoint is not None:
+                metricas.contadores['lineas_sin_cambio'] += checkpoint.sin_cambio
+
+
+def _recorrer(datos, posicion, estacion, nocturno, checkpoint, contexto, metricas):
+    contadores = metricas.contadores
+    traza = log.isEnabledFor(logging.DEBUG)
+    parser = ParserClave(estacion, nocturno, contexto, metricas)
+    # La misma codificación con la que el motor por filas abre el archivo en modo texto.
+    codificacion = locale.getpreferredencoding(False)
+    # Por los 5 bytes previos al primer tabulador ("22:30", " 7:05"): True si la fila queda fuera
+    # de turno. Si son el único ':' de la clave, determinan la hora que encontraría parser._HORA
+    # (hasta dos dígitos antes del ':' y dos después) sin decodificar la línea.
+    fuera_de_turno = {}
+    filas = descartadas = aceptadas = 0
+    pausa = 0.0
+    inicio = time.perf_counter()
+    previas = metricas.etapas['lectura'] + metricas.etapas['validacion']
+    # Los datos empiezan en la línea siguiente a la cabecera.
+    salto = datos.find(b'\n', posicion)
+    for lineas in _bloques(datos, len(datos) if salto == -1 else salto + 1, metricas):
+        for linea in lineas:
+            if checkpoint is not None and _sin_cambio(checkpoint, linea, codificacion):
+                continue
+            tabulador = linea.find(b'\t')
+            if tabulador >= 5 and linea.find(b':', 0, tabulador) == tabulador - 3:
+                cola = linea[tabulador - 5:tabulador]
+                fuera = fuera_de_turno.get(cola)
+                if fuera is None:
+                    # Con bytes no ASCII la hora se decide sobre la línea decodificada (\d de una
+                    # cadena también acepta dígitos no ASCII).
+                    fuera = fuera_de_turno[cola] = (
+                        cola.isascii() and parser.decodificar_clave(cola.decode('ascii')) == FUERA_DE_TURNO)
+                if fuera:
+                    filas += 1
+                    descartadas += 1
+                    continue
+            row = linea.rstrip(b'\n').decode(codificacion).split('\t')
+            # Otra cabecera, una línea vacía o una clave en blanco: el motor por filas tampoco las cuenta.
+            if row[0] == 'Key' or not row[0].strip():
+                continue
+            filas += 1
+            resultado = parser.decodificar(row)
+            if resultado.__class__ is str:
+                contadores[resultado] += 1
+                if resultado == FUTURO:
+                    if traza:
+                        log.debug("[%s] Registro omitido por horario futuro: %s", estacion.nombre, row[0])
+                    if checkpoint is not None:
+                        checkpoint.diferir(row[0], parser.elegible)
+                elif resultado == HITS_INVALIDOS and traza:
+                    log.debug("[%s] Error al convertir hits a entero: %s", estacion.nombre,
+                              row[3] if len(row) > 3 else row)
+                continue
+            if traza:
+                log.debug("[%s] Procesando fila: %s", estacion.nombre, row)
+            aceptadas += 1
+            entrega = time.perf_counter()
+            yield resultado
+            pausa += time.perf_counter() - entrega
+    contadores['filas'] += filas
+    contadores[FUERA_DE_TURNO] += descartadas
+    contadores['aceptadas'] += aceptadas
+    if checkpoint is not None:
+        contadores['lineas_sin_cambio'] += checkpoint.sin_cambio
+    # Como en el motor por filas: el parseo es el recorrido menos lectura, validación y pausas.
+    metricas.etapas['parseo'] += (time.perf_counter() - inicio - pausa
+                                  - (metricas.etapas['lectura'] + metricas.etapas['validacion'] - previas))
@@ -0,0 +1,141 @@
+"""
+Métricas por ejecución y estación, en JSON lines.
+
+Cada estación procesada agrega una línea al archivo de métricas con el tiempo de cada
+etapa (segundos) y los contadores de filas y sentencias SQL, por ejemplo:
+
+    {"fecha_hora": "2026-10-17T14:05:00", "estacion": "pulidos", "archivo": "...",
+     "total": 1.92, "etapas": {"lectura": 0.01, "parseo": 0.08, "validacion": 0.0,
+     "consulta_existentes": 0.41, "borrado": 0.0, "insercion": 1.2, "commit": 0.2},
+     "contadores": {"filas": 5120, "aceptadas": 300, "futuro": 12, "fuera_de_turno": 4800,
+     "nuevas": 20, "actualizadas": 8, "sin_cambio": 272, "sentencias": 4}}
+
+Etapas:
+  lectura              lectura de líneas del archivo (incluye el filtro del modo incremental)
+  parseo               separación de columnas y decodificación de la fila
+  validacion           comparación fecha/hora contra "ahora - 1 hora" (is_valid_time_for_processing)
+  consulta_existentes  SELECT de los hits ya guardados (o de los cambios, con --cache)
+  borrado / insercion / commit
+  resumen              recálculo de las horas escritas en resumen_turnos (migración 003)
+  spool                escritura en el spool local (--spool); el Drenador registra sus lotes aparte,
+                       con el spool como "archivo"
+  espera_*             con --etapas, tiempo que cada etapa estuvo detenida por la otra (ver etapas.py):
+                       espera_lectura (cola de candidatos llena), espera_candidatos (vacía),
+                       espera_comparacion (cola de lotes llena), espera_escritura (vacía) y
+                       espera_conexion (consultas que esperaron el lote en curso)
+Contadores: "filas" leídas después de la cabecera, "aceptadas" y un contador por cada motivo
+de descarte de parser (futuro, fuera_de_turno, hora_invalida, sin_fecha, hits_invalidos);
+de las aceptadas, "duplicadas" (misma clave que otra fila del archivo, colapsadas conservando
+la de más hits), "nuevas", "actualizadas" (más hits que en la base) y "sin_cambio", o
+"en_spool" si se guardaron en el spool; "valores_invalidos" son las aceptadas que se omitieron
+porque un valor no se puede limpiar (p. ej. Multi "abc"); "horas_resumidas" son las horas (fecha, hour)
+recalculadas en resumen_turnos; con --cache, "cache_cambios" son las fechas resueltas con la
+caché y la consulta de cambios y "cache_recargas" las que se leyeron completas;
+"sentencias" son las sentencias SQL ejecutadas por la estación; con --etapas,
+"cola_candidatos_max" y "cola_lotes_max" son la profundidad máxima de cada cola y
+"cola_candidatos_llena" y "cola_lotes_llena" las veces que el productor la encontró llena.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+METRICAS_PATH = os.environ.get(
+    'SCANTOTALS_METRICAS', os.path.join(os.path.expanduser('~'), '.scantotals', 'metricas.jsonl')
+)
+
+
+class CursorMedido:
+    """Envuelve un cursor y cuenta cada execute/executemany como una sentencia."""
+
+    def __init__(self, cursor, metricas):
+        self._cursor = cursor
+        self._metricas = metricas
+
+    def execute(self, query, params=()):
+        self._metricas.contadores['sentencias'] += 1
+        return self._cursor.execute(query, params)
+
+    def executemany(self, query, seq_params):
+        self._metricas.contadores['sentencias'] += 1
+        return self._cursor.executemany(query, seq_params)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class MetricasEstacion:
+    """
+    Tiempos por etapa y contadores de una estación durante una ejecución. Con --etapas la
+    usan varios hilos, pero cada etapa y cada contador lo actualiza uno solo.
+    """
+
+    def __init__(self, estacion, input_file=None):
+        self.estacion = estacion
+        self.archivo = input_file
+        self.etapas = defaultdict(float)
+        self.contadores = Counter()
+        self._inicio = time.perf_counter()
+        self.total = 0.0
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[etapa] += time.perf_counter() - inicio
+
+    def leer(self, lineas):
+        """Itera las líneas acumulando en "lectura" el tiempo de obtener cada una."""
+        iterador = iter(lineas)
+        reloj = time.perf_counter
+        while True:
+            inicio = reloj()
+            linea = next(iterador, None)
+            self.etapas['lectura'] += reloj() - inicio
+            if linea is None:
+                return
+            yield linea
+
+    def cursor(self, cursor):
+        return CursorMedido(cursor, self)
+
+    def cerrar(self):
+        self.total = time.perf_counter() - self._inicio
+        return self
+
+    def como_dict(self):
+        return {
+            'fecha_hora': datetime.now().isoformat(timespec='seconds'),
+            'estacion': self.estacion,
+            'archivo': self.archivo,
+            'total': round(self.total, 6),
+            'etapas': {etapa: round(segundos, 6) for etapa, segundos in self.etapas.items()},
+            'contadores': dict(self.contadores),
+        }
+
+
+class RegistroMetricas:
+    """Agrega una línea JSON por estación al archivo de métricas; lo comparten todos los hilos."""
+
+    def __init__(self, ruta=METRICAS_PATH):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def escribir(self, metricas):
+        linea = json.dumps(metricas.como_dict(), ensure_ascii=False)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+                with open(self.ruta, 'a', encoding='utf-8') as archivo:
+                    archivo.write(linea + '\n')
+            except OSError as err:
+                # Las métricas no deben detener la ingesta.
+                log.warning("No se pudieron escribir las métricas en %s: %s", self.ruta, err)
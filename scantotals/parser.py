@@ -0,0 +1,215 @@
+"""
+Parser de filas de scantotals con los patrones compilados una sola vez.
+
+ParserClave se crea una vez por archivo con el contexto de la ejecución (contexto.py: "ahora",
+el límite de una hora, la ventana del turno y los días del mes en ese momento) y memoriza la
+fecha resuelta para cada (día, hora == "23:30"). Así, por fila solo quedan un split, dos
+búsquedas con expresiones ya compiladas y consultas a diccionarios. El resultado es idéntico al
+de las funciones de extraccion.py.
+"""
+import re
+import time
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from .contexto import crear_contexto
+from .extraccion import build_record
+
+_HORA = re.compile(r"(\d{1,2}):(\d{2})")
+_NUM = re.compile(r"^(\d+)")
+_DIA = re.compile(r"\s*(\d+)")
+
+# Motivos por los que decodificar() descarta una fila.
+FUERA_DE_TURNO = "fuera_de_turno"
+HORA_INVALIDA = "hora_invalida"
+SIN_FECHA = "sin_fecha"
+FUTURO = "futuro"
+HITS_INVALIDOS = "hits_invalidos"
+# Al armar el registro (build_record): un valor que no se puede limpiar, p. ej. Multi "abc".
+VALORES_INVALIDOS = "valores_invalidos"
+
+
+class Candidato(NamedTuple):
+    row: List[str]
+    name: str
+    fecha: str
+    hour: str
+    num: Optional[str]
+    hits: int
+
+    def registro(self, estacion):
+        """Tupla lista para insertar (extraccion.build_record)."""
+        return build_record(self.row, estacion, self.fecha, self.hour, self.num, self.hits)
+
+
+class CandidatoListo(NamedTuple):
+    """Candidato con el registro ya limpio (motor vectorizado, spool); se escribe igual que un Candidato."""
+    fila: Tuple
+    name: str
+    fecha: str
+    hour: str
+    num: Optional[str]
+    hits: int
+
+    def registro(self, estacion):
+        return self.fila
+
+    @classmethod
+    def desde_registro(cls, registro):
+        """Reconstruye el candidato a partir de la tupla de build_record."""
+        return cls(registro, registro[0], registro[1], registro[11], registro[12], registro[4])
+
+
+class ParserClave:
+    """Decodifica las filas de un archivo de la estación contra un contexto.ContextoEjecucion."""
+
+    def __init__(self, estacion, nocturno, contexto=None, metricas=None):
+        contexto = contexto or crear_contexto()
+        self.estacion = estacion
+        self.nocturno = nocturno
+        self.contexto = contexto
+        self._limite = contexto.limite
+        self._acepta_23 = contexto.acepta_23
+        self._temprano = contexto.temprano
+        self._hoy = contexto.hoy
+        self._mes = contexto.mes
+        self._mes_siguiente = contexto.mes_siguiente
+        self._texto = estacion.regla_fecha == "mes_texto"
+        self._hora = {
+            "cruda": self._hora_cruda,
+            "redondeo_23": self._hora_redondeo_23,
+            "redondeo_nocturno": self._hora_redondeo_nocturno,
+        }[estacion.regla_hora]
+        self._fechas = {}
+        self._vigentes = {}
+        self._turno = {}
+        # Con métricas (metricas.MetricasEstacion) se acumula el tiempo de validación en "validacion".
+        self._metricas = metricas
+        # Momento en que la última fila devuelta como FUTURO pasa a ser vigente (checkpoint.diferir).
+        self.elegible = None
+
+    @staticmethod
+    def _hora_cruda(match):
+        return f"{match.group(1)}:{match.group(2)}", int(match.group(1)), int(match.group(2))
+
+    @staticmethod
+    def _hora_redondeo_23(match):
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour > 22:
+            return f"{hour + (minute >= 30):02d}:00", hour + (minute >= 30), 0
+        return f"{hour:02d}:{minute:02d}", hour, minute
+
+    @staticmethod
+    def _hora_redondeo_nocturno(match):
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour >= 22 or hour < 6:
+            return f"{hour + (minute >= 30):02d}:00", hour + (minute >= 30), 0
+        return f"{hour:02d}:{minute:02d}", hour, minute
+
+    def _en_turno(self, total_minutes):
+        return self.contexto.en_turno(total_minutes, self.nocturno)
+
+    def _resolver_fecha(self, day, es_2330):
+        """Misma lógica que extraccion.extract_date, calculada una vez por (día, es_2330)."""
+        year, month, max_day = self._mes
+        if day > max_day and self.estacion.regla_fecha == "mes_siguiente":
+            year, month, max_day = self._mes_siguiente
+            day = min(day, max_day)
+        try:
+            fecha = datetime(year, month, day)
+        except ValueError:
+            return None
+        if self._temprano and day > self._hoy:
+            fecha -= timedelta(days=1)
+        if es_2330:
+            fecha -= timedelta(days=1)
+        return fecha
+
+    def fecha(self, day, es_2330):
+        """(datetime, 'AAAA-MM-DD') del día, memorizado por (día, es_2330); None si el día no es válido."""
+        clave_fecha = (day, es_2330)
+        fecha = self._fechas.get(clave_fecha, False)
+        if fecha is False:
+            fecha = self._resolver_fecha(day, es_2330) if day else None
+            # Se guarda también el texto para no llamar a strftime en cada fila.
+            fecha = self._fechas[clave_fecha] = (fecha, fecha.strftime("%Y-%m-%d")) if fecha else None
+        return fecha
+
+    def _vigente(self, fecha, hour, minute):
+        """Equivalente a extraccion.is_valid_time_for_processing con el "ahora" fijado."""
+        if hour == 23 and minute == 0 and self._acepta_23:
+            return True
+        return fecha.replace(hour=hour, minute=minute) <= self._limite
+
+    def _elegible(self, fecha, hour, minute):
+        """Primer "ahora" en que _vigente(fecha, hour, minute) es verdadero."""
+        momento = fecha.replace(hour=hour, minute=minute) + timedelta(hours=1)
+        if hour == 23 and minute == 0:
+            # La fila de las "23:00" también se acepta desde las 23:50 del día de referencia.
+            momento = min(momento, self.contexto.ahora.replace(hour=23, minute=50, second=0, microsecond=0))
+        return momento
+
+    def decodificar_clave(self, name_field):
+        """
+        Reglas que dependen solo de la clave: devuelve (fecha 'AAAA-MM-DD', hora) o el motivo
+        de descarte. El motor vectorizado la usa una vez por clave distinta.
+        """
+        match = _HORA.search(name_field)
+        if match is None:
+            return FUERA_DE_TURNO
+        extracted_hour, hour, minute = self._hora(match)
+        en_turno = self._turno.get(extracted_hour)
+        if en_turno is None:
+            en_turno = self._turno[extracted_hour] = self._en_turno(hour * 60 + minute)
+        if not en_turno:
+            return FUERA_DE_TURNO
+        # Con el redondeo, 23:30 o más pasa a "24:00": no es una hora válida y nunca llegará a serlo.
+        if hour > 23 or minute > 59:
+            return HORA_INVALIDA
+        parts = name_field.split('-', 3)
+        if len(parts) < 2:
+            return SIN_FECHA
+        day_part = parts[2][:2] if self._texto and len(parts) >= 3 and parts[1].isalpha() else parts[1]
+        day_match = _DIA.match(day_part)
+        if day_match is None:
+            return SIN_FECHA
+        clave_fecha = (int(day_match.group(1)), extracted_hour == "23:30")
+        fecha = self._fechas.get(clave_fecha, False)
+        if fecha is False:
+            fecha = self.fecha(*clave_fecha)
+        if fecha is None:
+            return SIN_FECHA
+        fecha, extracted_date = fecha
+        clave_vigente = (fecha, extracted_hour)
+        vigente = self._vigentes.get(clave_vigente)
+        if vigente is None:
+            inicio = time.perf_counter()
+            vigente = self._vigentes[clave_vigente] = self._vigente(fecha, hour, minute)
+            if self._metricas is not None:
+                self._metricas.etapas['validacion'] += time.perf_counter() - inicio
+        if not vigente:
+            self.elegible = self._elegible(fecha, hour, minute)
+            return FUTURO
+        return extracted_date, extracted_hour
+
+    def decodificar(self, row):
+        """Devuelve un Candidato o, si la fila se descarta, el motivo (FUERA_DE_TURNO, FUTURO, ...)."""
+        name_field = row[0]
+        clave = self.decodificar_clave(name_field)
+        if clave.__class__ is str:
+            return clave
+        extracted_date, extracted_hour = clave
+        try:
+            current_hits = int(row[3])
+        except (ValueError, IndexError):
+            return HITS_INVALIDOS
+        if self.estacion.restar_inf_fails and len(row) > 5:
+            inf_fails = row[5]
+            if inf_fails not in ('N/A', 'inf%'):
+                try:
+                    current_hits -= int(inf_fails)
+                except ValueError:
+                    pass
+        num_match = _NUM.match(name_field)
+        return Candidato(row, name_field, extracted_date, extracted_hour,
+                         num_match.group(1) if num_match else None, current_hits)
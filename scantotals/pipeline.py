@@ -0,0 +1,495 @@
+"""
+Pipeline de ingesta: lee el archivo de una estación, filtra las filas del turno y escribe
+en su tabla. ejecutar() procesa varias estaciones en paralelo con un pool de conexiones.
+"""
+import csv
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from . import db, etapas, resumen
+from .columnar import LoteCandidatos
+from .contexto import crear_contexto
+from .estaciones import ESTACIONES, seleccionar_archivo
+from .metricas import MetricasEstacion
+from .parser import FUERA_DE_TURNO, FUTURO, HITS_INVALIDOS, VALORES_INVALIDOS, ParserClave
+
+log = logging.getLogger(__name__)
+
+# Hilos para leer y procesar archivos; la escritura queda limitada por el tamaño del pool de conexiones.
+MAX_WORKERS = 7
+# Archivos de hasta este tamaño se leen completos antes de pedir conexión; los más grandes
+# (p. ej. archivos de varios días) se escriben a medida que se leen, con memoria acotada.
+LIMITE_LECTURA_COMPLETA = 8 * 2**20
+# En streaming, fechas cuyos hits existentes se mantienen en memoria a la vez.
+FECHAS_EN_MEMORIA = 2
+# Motor de lectura: "filas" (ParserClave, fila por fila), "vectorizado" (pandas, ver vectorizado.py)
+# o "mmap" (archivo mapeado, filas fuera de turno salteadas sobre los bytes; ver mapeado.py).
+MOTOR = "filas"
+# cache.CacheExistentes para consultar los hits existentes de las fechas recientes (--cache);
+# None los consulta siempre en la base de datos.
+CACHE = None
+# Con True, cada estación lee, compara y escribe en hilos separados unidos por colas acotadas
+# (ver etapas.py); con False, todo ocurre en el hilo de la estación.
+ETAPAS = False
+
+
+class ResultadoEstacion(NamedTuple):
+    estacion: str
+    filas: int
+    lectura: float
+    escritura: float
+    total: float
+    error: Optional[str] = None
+    sin_cambios: bool = False
+    metricas: Optional[MetricasEstacion] = None
+
+
+def iterar_candidatos(input_file, estacion, nocturno=None, checkpoint=None, contexto=None, metricas=None):
+    """
+    Lee el archivo desde la cabecera 'Key' y genera las filas aceptadas como
+    parser.Candidato (row, name, fecha, hour, num, hits), una a una.
+    Con un checkpoint solo se parsean las líneas nuevas o modificadas.
+    `contexto` (contexto.ContextoEjecucion) fija el "ahora" de referencia; por defecto se crea con el reloj.
+    Con `metricas` se registran los tiempos de lectura, parseo y validación y los descartes por motivo.
+    No consulta la base de datos.
+    """
+    if nocturno is None:
+        nocturno = "NVO" in input_file
+    if metricas is None:
+        metricas = MetricasEstacion(estacion.nombre, input_file)
+    contadores = metricas.contadores
+    # La traza por fila se decide una vez por archivo: sin DEBUG el bucle no llama al logging.
+    traza = log.isEnabledFor(logging.DEBUG)
+    parser = ParserClave(estacion, nocturno, contexto, metricas)
+    start_processing = False
+    aceptadas = 0
+    # Tiempo fuera del generador (quien consume los candidatos): no cuenta como parseo.
+    pausa = 0.0
+    inicio = time.perf_counter()
+    previas = metricas.etapas['lectura'] + metricas.etapas['validacion']
+    with open(input_file, 'r') as original_file:
+        lineas = original_file if checkpoint is None else checkpoint.filtrar(original_file)
+        reader = csv.reader(metricas.leer(lineas), delimiter='\t')
+        for row in reader:
+            if row and row[0] == 'Key':
+                start_processing = True
+                continue
+            if not (start_processing and row and row[0].strip()):
+                continue
+            contadores['filas'] += 1
+            resultado = parser.decodificar(row)
+            if resultado.__class__ is str:
+                contadores[resultado] += 1
+                if resultado == FUTURO:
+                    if traza:
+                        log.debug("[%s] Registro omitido por horario futuro: %s", estacion.nombre, row[0])
+                    if checkpoint is not None:
+                        checkpoint.diferir(row[0], parser.elegible)
+                elif resultado == HITS_INVALIDOS and traza:
+                    log.debug("[%s] Error al convertir hits a entero: %s", estacion.nombre,
+                              row[3] if len(row) > 3 else row)
+                continue
+            if traza:
+                log.debug("[%s] Procesando fila: %s", estacion.nombre, row)
+            aceptadas += 1
+            entrega = time.perf_counter()
+            yield resultado
+            pausa += time.perf_counter() - entrega
+    contadores['aceptadas'] += aceptadas
+    if checkpoint is not None:
+        contadores['lineas_sin_cambio'] += checkpoint.sin_cambio
+    # El parseo es lo que queda del recorrido después de descontar lectura, validación y pausas.
+    metricas.etapas['parseo'] += (time.perf_counter() - inicio - pausa
+                                  - (metricas.etapas['lectura'] + metricas.etapas['validacion'] - previas))
+
+
+def leer_candidatos(input_file, estacion, nocturno=None, checkpoint=None, contexto=None, metricas=None):
+    """Como iterar_candidatos, pero devuelve todos los candidatos en un columnar.LoteCandidatos."""
+    return LoteCandidatos(iterar_candidatos(input_file, estacion, nocturno, checkpoint, contexto, metricas))
+
+
+def clave_candidato(candidato):
+    # Cadenas internadas: las claves repetidas comparten la misma cadena en todos los índices.
+    return sys.intern(candidato.name.strip()), sys.intern(candidato.fecha), sys.intern(candidato.hour)
+
+
+def reducir_duplicados(candidatos, metricas=None):
+    """
+    Deja un candidato por (name, fecha, hour): el de más hits (ante empate, el primero), en el
+    lugar de su primera aparición. Los colapsados se cuentan en el contador "duplicadas".
+    Con un LoteCandidatos devuelve otro lote (LoteCandidatos.reducir); con una lista, una lista.
+    """
+    if isinstance(candidatos, LoteCandidatos):
+        return candidatos.reducir(clave_candidato, metricas)
+    por_clave = {}
+    for candidato in candidatos:
+        clave = clave_candidato(candidato)
+        previo = por_clave.get(clave)
+        if previo is None or candidato.hits > previo.hits:
+            por_clave[clave] = candidato
+    if metricas is not None:
+        metricas.contadores['duplicadas'] += len(candidatos) - len(por_clave)
+    return list(por_clave.values())
+
+
+def registro_candidato(candidato, estacion, contadores):
+    """
+    Registro de build_record del candidato, o None si alguno de sus valores no se puede limpiar
+    (p. ej. Multi "abc") o a la fila le faltan columnas: se cuenta en VALORES_INVALIDOS y se
+    omite, como una fila con hits inválidos, sin detener el archivo.
+    """
+    try:
+        return candidato.registro(estacion)
+    except (ValueError, IndexError) as err:
+        contadores[VALORES_INVALIDOS] += 1
+        log.debug("[%s] Valores inválidos en la fila %s: %s", estacion.nombre, candidato.name, err)
+        return None
+
+
+def comparar_candidato(candidato, clave, existing_index, estacion, con_huella, use_upsert, contadores):
+    """
+    Compara un candidato con la fila guardada (existing_index[clave]). Si hay que escribirlo
+    devuelve (registro, borrar) y actualiza existing_index; si no, None. El registro lleva la
+    huella como columna 14 con `con_huella`; `borrar` es (name, fecha, hour) en modo
+    reemplazo cuando la fila ya existe. Cuenta las nuevas, actualizadas y sin_cambio; una fila
+    con valores que no se pueden limpiar se omite (registro_candidato).
+    """
+    _, name_field, extracted_date, extracted_hour, _, current_hits = candidato
+    existing_hits = existing_index.get(clave)
+    if con_huella:
+        existing_hits, huella_existente = existing_hits or (None, None)
+        if existing_hits is not None and current_hits < existing_hits:
+            contadores['sin_cambio'] += 1
+            return None
+        registro = registro_candidato(candidato, estacion, contadores)
+        if registro is None:
+            return None
+        huella = db.huella(registro)
+        if huella == huella_existente:
+            contadores['sin_cambio'] += 1
+            return None
+        registro += (huella,)
+        existing_index[clave] = (current_hits, huella)
+    else:
+        if existing_hits is not None and current_hits <= existing_hits:
+            contadores['sin_cambio'] += 1
+            return None
+        registro = registro_candidato(candidato, estacion, contadores)
+        if registro is None:
+            return None
+        existing_index[clave] = current_hits
+    contadores['nuevas' if existing_hits is None else 'actualizadas'] += 1
+    # Con upsert no hace falta borrar: el INSERT ... ON DUPLICATE KEY UPDATE reemplaza la fila.
+    if existing_hits is None or use_upsert:
+        return registro, None
+    return registro, (name_field, extracted_date, extracted_hour)
+
+
+def escribir_candidatos(connection, estacion, candidatos, metricas=None):
+    """
+    Compara los candidatos con la base de datos y escribe, por lotes, los que crecieron.
+    Si la tabla tiene la columna huella (migración 002), se escriben los que no tienen menos
+    hits que la fila guardada y cuya huella (db.huella, sobre todas las columnas limpias)
+    cambió: una fila sin cambios no genera ninguna escritura, aunque sus hits sean iguales.
+    `candidatos` puede ser una lista o un columnar.LoteCandidatos (se reduce a un candidato por
+    clave con reducir_duplicados y se hace una sola consulta con todas sus fechas) o un
+    iterador (se consulta cada fecha al aparecer y solo se conservan las FECHAS_EN_MEMORIA más
+    recientes, sin cargar el archivo ni la tabla en memoria; los duplicados se colapsan dentro
+    de esa ventana).
+    Si existe la tabla resumen_turnos (migración 003), cada lote recalcula sus horas en el resumen.
+    Con CACHE, los hits existentes de las fechas recientes salen de la caché local y solo se
+    piden a la base de datos las filas que cambiaron; lo leído se guarda después del commit.
+    Con ETAPAS, los lotes se envían en un hilo aparte (etapas.EscritorEnHilo) mientras se
+    sigue comparando.
+    Devuelve las filas escritas.
+    """
+    if metricas is None:
+        metricas = MetricasEstacion(estacion.nombre)
+    contadores = metricas.contadores
+    cursor = metricas.cursor(connection.cursor())
+    cache = CACHE
+    pendientes_cache = []
+    escritor = None
+
+    def consultar_existentes(fechas):
+        if cache is None:
+            return db.prefetch_existing_hits(cursor, estacion.tabla, fechas, con_huella)
+        indice, pendiente = cache.consultar(cursor, estacion.tabla, fechas, con_huella, metricas)
+        if pendiente is not None:
+            pendientes_cache.append(pendiente)
+        return indice
+
+    try:
+        streaming = not isinstance(candidatos, (list, LoteCandidatos))
+        with metricas.medir('consulta_existentes'):
+            use_upsert = db.resolve_write_mode(cursor, estacion.tabla)
+            con_huella = db.tiene_huella(cursor, estacion.tabla)
+            con_resumen = resumen.disponible(cursor)
+            if not streaming:
+                candidatos = reducir_duplicados(candidatos, metricas)
+                # Una sola consulta trae los hits existentes de todas las fechas del archivo.
+                existing_index = consultar_existentes({c[2] for c in candidatos})
+        # Hits del mejor candidato ya visto por clave en este archivo (en streaming, por fecha).
+        vistos = {}
+        por_fecha = OrderedDict()
+        consultadas = set()
+
+        def resumir(registros):
+            contadores['horas_resumidas'] += resumen.actualizar(cursor, estacion, registros)
+
+        clase_escritor = etapas.EscritorEnHilo if ETAPAS else db.EscritorLotes
+        escritor = clase_escritor(connection, cursor, estacion.tabla, use_upsert, metricas=metricas,
+                                  con_huella=con_huella, al_enviar=resumir if con_resumen else None)
+        for candidato in candidatos:
+            _, name_field, extracted_date, extracted_hour, _, current_hits = candidato
+            if streaming:
+                # Las filas vienen ordenadas por hora: casi siempre la fecha es la última consultada.
+                ventana = por_fecha.get(extracted_date)
+                if ventana is None:
+                    if extracted_date in consultadas:
+                        # La fecha salió de la ventana: lo pendiente se escribe para que la consulta lo vea.
+                        escritor.vaciar()
+                    with escritor.conexion(), metricas.medir('consulta_existentes'):
+                        ventana = (consultar_existentes({extracted_date}), {})
+                    por_fecha[extracted_date] = ventana
+                    consultadas.add(extracted_date)
+                    if len(por_fecha) > FECHAS_EN_MEMORIA:
+                        por_fecha.popitem(last=False)
+                    contadores['consultas_por_fecha'] += 1
+                existing_index, vistos = ventana
+                clave = clave_candidato(candidato)
+                visto = vistos.get(clave)
+                if visto is not None:
+                    contadores['duplicadas'] += 1
+                    if current_hits <= visto:
+                        continue
+                vistos[clave] = current_hits
+            else:
+                clave = (name_field.strip(), extracted_date, extracted_hour)
+                visto = None
+            escritura = comparar_candidato(candidato, clave, existing_index, estacion, con_huella, use_upsert,
+                                           contadores)
+            if escritura is not None:
+                registro, borrar = escritura
+                if borrar is not None and visto is not None:
+                    # La fila a borrar puede ser una de este archivo aún en el lote: se envía antes.
+                    escritor.enviar()
+                escritor.agregar(registro, borrar)
+        escritas = escritor.cerrar()
+        if pendientes_cache:
+            cache.guardar(pendientes_cache)
+        contadores['lotes'] += escritor.lotes
+        log.debug("[%s] Filas escritas: %d en %d lotes", estacion.nombre, escritas, escritor.lotes)
+        return escritas
+    finally:
+        if escritor is not None:
+            # Después de un error: detiene el hilo de escritura (con ETAPAS) y descarta lo pendiente.
+            escritor.cancelar()
+        cursor.close()
+
+
+def procesar_estacion(pool, limite_conexiones, estacion, input_file, checkpoints=None, registro_metricas=None,
+                      contexto=None, nocturno=None, spool=None):
+    """
+    Tarea de un trabajador: lee el archivo sin ocupar conexión y luego escribe con una
+    conexión del pool. limite_conexiones evita pedir más conexiones de las que tiene el pool.
+    Los archivos mayores que LIMITE_LECTURA_COMPLETA se escriben mientras se leen; con ETAPAS,
+    la lectura sigue en su propio hilo (etapas.LecturaEnHilo) mientras se compara y se escribe.
+    Con `checkpoints` (modo incremental) se omiten los archivos sin cambios y las líneas ya procesadas.
+    Con `registro_metricas` (metricas.RegistroMetricas) se agrega la línea de métricas de la estación.
+    `contexto` y `nocturno` fijan el momento de referencia y el turno (por defecto, el reloj y según el nombre).
+    Con `spool` (spool.Spool) las filas aceptadas se guardan en el spool local en lugar de
+    escribirse en la base de datos; no se usa el pool.
+    Devuelve un ResultadoEstacion con los tiempos de cada etapa.
+    """
+    metricas = MetricasEstacion(estacion.nombre, input_file)
+    resultado = _procesar_estacion(pool, limite_conexiones, estacion, input_file, checkpoints, metricas, contexto,
+                                   nocturno, spool)
+    if resultado.error:
+        metricas.contadores['errores'] += 1
+    if registro_metricas is not None:
+        registro_metricas.escribir(metricas.cerrar())
+    return resultado
+
+
+def motor_lectura():
+    """iterar_candidatos del motor elegido en MOTOR."""
+    if MOTOR == "vectorizado":
+        # pandas es opcional: solo se importa si se elige este motor.
+        from . import vectorizado
+        return vectorizado.iterar_candidatos
+    if MOTOR == "mmap":
+        from . import mapeado
+        return mapeado.iterar_candidatos
+    return iterar_candidatos
+
+
+def _tiempo_lectura(metricas):
+    etapas = metricas.etapas
+    return etapas['lectura'] + etapas['parseo'] + etapas['validacion']
+
+
+def _lectura_en_escritura(metricas, lectura):
+    """Lectura que transcurre dentro de la escritura; con la lectura en su hilo, solo la espera de candidatos."""
+    return metricas.etapas['espera_candidatos'] if lectura is not None else _tiempo_lectura(metricas)
+
+
+def _sin_cambios(estacion, metricas, inicio):
+    metricas.contadores['archivo_sin_cambios'] += 1
+    return ResultadoEstacion(estacion.nombre, 0, 0.0, 0.0, time.perf_counter() - inicio, sin_cambios=True,
+                             metricas=metricas)
+
+
+def _procesar_estacion(pool, limite_conexiones, estacion, input_file, checkpoints, metricas, contexto, nocturno,
+                       spool):
+    inicio = time.perf_counter()
+    filas = 0
+    error = None
+    t_lectura = t_escritura = 0.0
+    lectura = None
+    contexto = contexto or crear_contexto()
+    try:
+        if checkpoints is not None and checkpoints.sin_cambios(input_file, contexto.ahora):
+            return _sin_cambios(estacion, metricas, inicio)
+        checkpoint = checkpoints.abrir(input_file) if checkpoints is not None else None
+        candidatos = motor_lectura()(input_file, estacion, nocturno, checkpoint, contexto, metricas)
+        if os.path.getsize(input_file) <= LIMITE_LECTURA_COMPLETA:
+            candidatos = LoteCandidatos(candidatos)
+            hay_candidatos = bool(candidatos)
+        else:
+            if ETAPAS:
+                lectura = etapas.LecturaEnHilo(candidatos, metricas, estacion.nombre)
+                candidatos = iter(lectura)
+            primero = next(candidatos, None)
+            hay_candidatos = primero is not None
+            candidatos = itertools.chain([primero], candidatos)
+        t_lectura = _tiempo_lectura(metricas)
+        leido = _lectura_en_escritura(metricas, lectura)
+        if hay_candidatos and spool is not None:
+            inicio_escritura = time.perf_counter()
+            with metricas.medir('spool'):
+                filas = spool.encolar(estacion, candidatos, metricas)
+            t_escritura = time.perf_counter() - inicio_escritura - (_lectura_en_escritura(metricas, lectura) - leido)
+            t_lectura = _tiempo_lectura(metricas)
+        elif hay_candidatos:
+            with limite_conexiones:
+                inicio_escritura = time.perf_counter()
+                connection = db.obtener_conexion(pool)
+                try:
+                    filas = escribir_candidatos(connection, estacion, candidatos, metricas)
+                except (*db.Error, OSError):
+                    # Con lectura en streaming, un error de lectura también deja un lote sin confirmar.
+                    connection.rollback()
+                    raise
+                finally:
+                    # En un pool, close() devuelve la conexión en lugar de cerrarla.
+                    connection.close()
+                # En streaming, la lectura ocurre dentro de la escritura: se descuenta.
+                t_escritura = (time.perf_counter() - inicio_escritura
+                               - (_lectura_en_escritura(metricas, lectura) - leido))
+                t_lectura = _tiempo_lectura(metricas)
+        if checkpoint is not None:
+            error = confirmar_checkpoint(checkpoints, checkpoint)
+    except db.Error as err:
+        error = f"Error al ejecutar el comando SQL: {err}"
+    except OSError as err:
+        error = f"No se pudo leer el archivo: {err}"
+    finally:
+        if lectura is not None:
+            lectura.cerrar()
+    return ResultadoEstacion(estacion.nombre, filas, t_lectura, t_escritura, time.perf_counter() - inicio, error,
+                             metricas=metricas)
+
+
+def confirmar_checkpoint(checkpoints, checkpoint):
+    """
+    Confirma el checkpoint de un archivo ya escrito. Devuelve el mensaje de error si no se pudo
+    guardar: las filas ya están en la base de datos y la próxima ejecución solo vuelve a leerlas.
+    """
+    try:
+        checkpoints.confirmar(checkpoint)
+    except OSError as err:
+        return f"No se pudo guardar el checkpoint: {err}"
+    return None
+
+
+def resumir(resultado):
+    """Registra la línea de resumen de una estación (nivel INFO; WARNING si hubo errores o filas inválidas)."""
+    if resultado.error:
+        log.warning("[%s] %s", resultado.estacion, resultado.error)
+    if resultado.sin_cambios:
+        log.info("[%s] Archivo sin cambios desde la última ejecución.", resultado.estacion)
+        return
+    contadores = resultado.metricas.contadores if resultado.metricas is not None else {}
+    destino = "en el spool" if 'en_spool' in contadores else "escritas"
+    log.info("[%s] %d filas %s de %d aceptadas (%d leídas, %d futuras, %d fuera de turno) en %.2fs "
+             "(lectura %.2fs, %s %.2fs)", resultado.estacion, resultado.filas, destino,
+             contadores.get('aceptadas', 0), contadores.get('filas', 0), contadores.get(FUTURO, 0),
+             contadores.get(FUERA_DE_TURNO, 0), resultado.total, resultado.lectura,
+             "spool" if 'en_spool' in contadores else "base de datos", resultado.escritura)
+    if contadores.get(HITS_INVALIDOS):
+        log.warning("[%s] %d filas con hits inválidos (detalle con --traza).", resultado.estacion,
+                    contadores[HITS_INVALIDOS])
+    if contadores.get(VALORES_INVALIDOS):
+        log.warning("[%s] %d filas omitidas por valores inválidos (detalle con --traza).", resultado.estacion,
+                    contadores[VALORES_INVALIDOS])
+
+
+def ejecutar(nombres=None, now=None, workers=MAX_WORKERS, conexiones=db.TAMANO_POOL, pool=None,
+             checkpoints=None, metricas=None, spool=None):
+    """
+    Procesa las estaciones indicadas (todas si nombres es None) en paralelo.
+    `now` fija el momento de referencia de toda la ejecución (por defecto, contexto.reloj).
+    La lectura de archivos usa hasta `workers` hilos y la escritura un pool de `conexiones` conexiones.
+    Si se pasa `pool` (modo daemon) se reutiliza en lugar de abrir uno nuevo.
+    Con `checkpoints` (checkpoint.RegistroCheckpoints) la lectura es incremental.
+    Con `metricas` (metricas.RegistroMetricas) se agrega una línea JSON por estación al archivo de métricas.
+    Con `spool` (spool.Spool) las filas van al spool local y no se abre el pool; las envía un spool.Drenador.
+    Un error en una estación no detiene a las demás.
+    """
+    contexto = crear_contexto(now)
+    estaciones = [ESTACIONES[nombre] for nombre in (nombres or ESTACIONES)]
+    conexiones = max(1, min(conexiones, len(estaciones)))
+    inicio = time.perf_counter()
+    archivos = [seleccionar_archivo(estacion, contexto.ahora) for estacion in estaciones]
+    if checkpoints is not None and all(checkpoints.sin_cambios(archivo, contexto.ahora) for archivo in archivos):
+        # Modo incremental sin archivos cambiados: termina sin abrir el pool, es decir, sin
+        # conectarse a la base de datos ni importar mysql.connector (db.conector).
+        resultados = []
+        for estacion, input_file in zip(estaciones, archivos):
+            resultado = _sin_cambios(estacion, MetricasEstacion(estacion.nombre, input_file), inicio)
+            if metricas is not None:
+                metricas.escribir(resultado.metricas.cerrar())
+            resultados.append(resultado)
+            resumir(resultado)
+        log.info("Carga de datos completada en %.2fs.", time.perf_counter() - inicio)
+        return resultados
+    if pool is None and spool is None:
+        try:
+            pool = db.crear_pool(conexiones)
+        except db.Error as err:
+            log.error("Error al conectar con la base de datos: %s", err)
+            return []
+    limite_conexiones = threading.BoundedSemaphore(conexiones)
+    resultados = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futuros = []
+        for estacion, input_file in zip(estaciones, archivos):
+            log.debug("[%s] Archivo seleccionado: %s", estacion.nombre, input_file)
+            futuros.append(
+                executor.submit(procesar_estacion, pool, limite_conexiones, estacion, input_file, checkpoints,
+                                metricas, contexto, spool=spool)
+            )
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            resumir(resultado)
+    log.info("Carga de datos completada en %.2fs.", time.perf_counter() - inicio)
+    return resultados
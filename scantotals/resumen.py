@@ -0,0 +1,118 @@
+"""
+Resumen por estación, turno y hora (tabla resumen_turnos, migración 003).
+
+Por cada (estacion, fecha, turno, hour) guarda las filas, la suma de hits, la media ponderada
+por hits (SUM(mean * hits) / SUM(hits) de las filas con mean), el mínimo de shortest y el
+máximo de longest, comparados como números (las horas 'H:MM' de manuales, en segundos).
+Los tableros leen esta tabla en lugar de agregar la tabla cruda:
+
+    SELECT turno, SUM(hits) FROM resumen_turnos WHERE estacion = 'pulidos' AND fecha = '2026-10-16'
+    GROUP BY turno
+
+El turno se deduce de la hora: "DIA" si cae en la ventana diurna (06:30 a 21:30) y "NVO" en
+otro caso (22:00 a 06:00, incluidas las horas redondeadas como "24:00" o "06:00"). La fecha
+es la de la tabla cruda, así que un turno nocturno se reparte en dos fechas.
+
+El pipeline lo mantiene al escribir: en cada lote de EscritorLotes, antes del commit, se
+recalculan desde la tabla cruda las horas (fecha, hour) que el lote tocó. Recalcular la hora
+completa, en lugar de sumar diferencias, resuelve las filas actualizadas (sus valores
+anteriores no se conocen) y el mínimo y el máximo; con el índice (fecha, hour) de la
+migración cada recálculo lee solo las filas de esa hora. Como va en la misma transacción
+que el lote, el resumen nunca queda atrás de lo confirmado.
+"""
+from .contexto import ContextoEjecucion
+
+TABLA = "resumen_turnos"
+NOCTURNO = "NVO"
+DIURNO = "DIA"
+
+
+
+def _numerico(columna):
+    """
+    Expresión SQL (MySQL y SQLite) con el valor numérico de una columna de texto de la tabla
+    cruda: las horas 'H:MM' (manuales) en segundos, el texto vacío como NULL y el resto como
+    número. MIN y MAX sobre el texto compararían '10.2' < '9.5'.
+    """
+    separador = f"INSTR({columna}, ':')"
+    return (f"CASE WHEN {separador} > 0 THEN SUBSTR({columna}, 1, {separador} - 1) * 3600"
+            f" + SUBSTR({columna}, {separador} + 1) * 60 ELSE NULLIF(TRIM({columna}), '') + 0 END")
+
+
+# Columnas agregadas; mean * 1.0 evita la división entera de SQLite cuando mean es entero.
+_ACTUALIZAR = """
+INSERT INTO resumen_turnos (estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max)
+SELECT %s, fecha, %s, hour, COUNT(*), SUM(hits),
+       SUM(mean * 1.0 * hits) / SUM(CASE WHEN mean IS NOT NULL THEN hits END),
+       MIN({shortest}), MAX({longest})
+FROM {tabla} WHERE {filtro} GROUP BY fecha, hour
+ON DUPLICATE KEY UPDATE
+    filas = VALUES(filas),
+    hits = VALUES(hits),
+    mean_ponderada = VALUES(mean_ponderada),
+    shortest_min = VALUES(shortest_min),
+    longest_max = VALUES(longest_max)
+"""
+
+_SQL_DISPONIBLE = ("SHOW TABLES LIKE %s", (TABLA,))
+_SHORTEST = _numerico("shortest")
+_LONGEST = _numerico("longest")
+
+_turnos = {}
+_disponible = None
+
+
+def turno(hour):
+    """Turno ("NVO" o "DIA") de una hora 'H:MM' o 'HH:MM' de la tabla cruda."""
+    resultado = _turnos.get(hour)
+    if resultado is None:
+        horas, minutos = hour.split(':')
+        total = int(horas) * 60 + int(minutos)
+        resultado = _turnos[hour] = DIURNO if ContextoEjecucion.en_turno(total, False) else NOCTURNO
+    return resultado
+
+
+def disponible(cursor):
+    """Indica si existe la tabla resumen_turnos (migración 003); se consulta una vez por proceso."""
+    global _disponible
+    if _disponible is None:
+        cursor.execute(*_SQL_DISPONIBLE)
+        _disponible = bool(cursor.fetchall())
+    return _disponible
+
+
+async def disponible_async(cursor):
+    """disponible con un cursor asíncrono (asincrono.py); comparte la caché por proceso."""
+    global _disponible
+    if _disponible is None:
+        await cursor.execute(*_SQL_DISPONIBLE)
+        _disponible = bool(await cursor.fetchall())
+    return _disponible
+
+
+def sentencias(estacion, registros):
+    """(consulta, parámetros, horas) que recalculan el resumen de las horas de `registros`, una por turno."""
+    por_turno = {}
+    for registro in registros:
+        fecha, hour = registro[1], registro[11]
+        por_turno.setdefault(turno(hour), set()).add((fecha, hour))
+    for nombre_turno, horas in por_turno.items():
+        horas = sorted(horas)
+        filtro = " OR ".join(["(fecha = %s AND hour = %s)"] * len(horas))
+        parametros = [estacion.nombre, nombre_turno]
+        for fecha, hour in horas:
+            parametros += (fecha, hour)
+        yield (_ACTUALIZAR.format(tabla=estacion.tabla, filtro=filtro, shortest=_SHORTEST, longest=_LONGEST),
+               tuple(parametros), len(horas))
+
+
+def actualizar(cursor, estacion, registros):
+    """
+    Recalcula el resumen de las horas (fecha, hour) de `registros` (registros de build_record
+    ya escritos). Devuelve las horas recalculadas.
+    """
+    horas = 0
+    for query, parametros, cantidad in sentencias(estacion, registros):
+        cursor.execute(query, parametros)
+        horas += cantidad
+    return horas
@@ -0,0 +1,231 @@
+"""
+Spool local (write-ahead) de filas aceptadas: la ingesta no depende de que la base remota responda.
+
+Con --spool, cada estación guarda sus filas aceptadas en una base SQLite local (una
+transacción por archivo) y el checkpoint se confirma sin esperar a MySQL. Un Drenador las
+envía después por lotes con pipeline.escribir_candidatos (misma comparación de hits, upsert
+y política de commit) y las borra del spool solo cuando el lote quedó confirmado. Si el
+proxy no responde, las filas quedan en disco y el Drenador reintenta con espera exponencial
+(BACKOFF_INICIAL, el doble en cada fallo, hasta BACKOFF_MAXIMO).
+
+El spool guarda una fila por (estación, name, fecha, hour) y, como el upsert, se queda con la
+de más hits, o con la última si los hits son iguales y cambió algún otro valor (como la
+columna huella en la tabla): durante una caída larga no crece con cada ciclo, y al volver la
+conexión se drena a velocidad de lote. Cada actualización incrementa la versión de la fila, así que una
+fila que cambió mientras se enviaba no se borra y sale en la siguiente pasada.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from . import db
+from .estaciones import ESTACIONES
+from .metricas import MetricasEstacion
+from .parser import CandidatoListo
+from .pipeline import escribir_candidatos, registro_candidato
+
+log = logging.getLogger(__name__)
+
+SPOOL_PATH = os.environ.get(
+    'SCANTOTALS_SPOOL', os.path.join(os.path.expanduser('~'), '.scantotals', 'spool.db')
+)
+# Filas por lote del Drenador (cada lote es una consulta de existentes y un escribir_candidatos).
+FILAS_DRENADO = 5000
+BACKOFF_INICIAL = 1.0
+BACKOFF_MAXIMO = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    estacion TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    registro TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (estacion, name, fecha, hour)
+)
+"""
+
+_ENCOLAR = """
+INSERT INTO spool (estacion, name, fecha, hour, hits, registro) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (estacion, name, fecha, hour) DO UPDATE SET
+    hits = excluded.hits, registro = excluded.registro, version = version + 1
+WHERE excluded.hits > hits OR (excluded.hits = hits AND excluded.registro <> registro)
+"""
+_TOMAR = """
+SELECT name, fecha, hour, version, registro FROM spool WHERE estacion = ? ORDER BY fecha, hour LIMIT ?
+"""
+_DESCARTAR = "DELETE FROM spool WHERE estacion = ? AND name = ? AND fecha = ? AND hour = ? AND version = ?"
+
+
+class Spool:
+    """Filas pendientes de enviar, en SQLite; la comparten los hilos de ingesta y el Drenador."""
+
+    def __init__(self, ruta=SPOOL_PATH):
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        # WAL: las escrituras no bloquean las lecturas y cada commit es un append al log.
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(SCHEMA)
+        self._conexion.commit()
+
+    def encolar(self, estacion, candidatos, metricas=None, filas_por_lote=FILAS_DRENADO):
+        """
+        Guarda los candidatos de una estación en una sola transacción. Devuelve cuántos se encolaron.
+        Los que tienen valores que no se pueden limpiar se omiten (pipeline.registro_candidato).
+        """
+        if metricas is None:
+            metricas = MetricasEstacion(estacion.nombre)
+        total = 0
+        lote = []
+        with self._lock:
+            try:
+                for candidato in candidatos:
+                    registro = registro_candidato(candidato, estacion, metricas.contadores)
+                    if registro is None:
+                        continue
+                    lote.append((estacion.nombre, candidato.name, candidato.fecha, candidato.hour, candidato.hits,
+                                 json.dumps(registro)))
+                    if len(lote) >= filas_por_lote:
+                        self._conexion.executemany(_ENCOLAR, lote)
+                        total += len(lote)
+                        lote = []
+                if lote:
+                    self._conexion.executemany(_ENCOLAR, lote)
+                    total += len(lote)
+                self._conexion.commit()
+            except BaseException:
+                self._conexion.rollback()
+                raise
+        metricas.contadores['en_spool'] += total
+        return total
+
+    def pendientes(self, estacion=None):
+        with self._lock:
+            if estacion is None:
+                return self._conexion.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+            return self._conexion.execute("SELECT COUNT(*) FROM spool WHERE estacion = ?", (estacion,)).fetchone()[0]
+
+    def estaciones_pendientes(self):
+        with self._lock:
+            return [nombre for (nombre,) in self._conexion.execute("SELECT DISTINCT estacion FROM spool")]
+
+    def tomar(self, estacion, limite=FILAS_DRENADO):
+        """Devuelve hasta `limite` filas de la estación como [(clave con versión, CandidatoListo)], por fecha y hora."""
+        with self._lock:
+            filas = self._conexion.execute(_TOMAR, (estacion, limite)).fetchall()
+        return [((estacion, name, fecha, hour, version), CandidatoListo.desde_registro(tuple(json.loads(registro))))
+                for name, fecha, hour, version, registro in filas]
+
+    def descartar(self, claves):
+        """Borra las filas enviadas, salvo las que se actualizaron después de tomarlas."""
+        with self._lock:
+            self._conexion.executemany(_DESCARTAR, claves)
+            self._conexion.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+class Drenador:
+    """
+    Envía el contenido del spool a la base de datos. drenar() hace una pasada completa en el
+    hilo que la llama; iniciar() la repite en un hilo de fondo cada vez que se llama a avisar(),
+    con espera exponencial después de un error.
+    """
+
+    def __init__(self, spool, pool=None, conexiones=1, filas=FILAS_DRENADO, registro_metricas=None):
+        self.spool = spool
+        self.filas = filas
+        self.registro_metricas = registro_metricas
+        self._pool = pool
+        self._conexiones = conexiones
+        self._avisado = threading.Event()
+        self._detenido = threading.Event()
+        self._hilo = None
+
+    def _obtener_pool(self):
+        if self._pool is None:
+            self._pool = db.crear_pool(self._conexiones)
+        return self._pool
+
+    def drenar(self):
+        """Envía todo lo pendiente y devuelve las filas enviadas; un db.Error interrumpe la pasada."""
+        enviadas = 0
+        for nombre in self.spool.estaciones_pendientes():
+            estacion = ESTACIONES[nombre]
+            while not self._detenido.is_set():
+                lote = self.spool.tomar(nombre, self.filas)
+                if not lote:
+                    break
+                metricas = MetricasEstacion(nombre, self.spool.ruta)
+                connection = db.obtener_conexion(self._obtener_pool())
+                try:
+                    escritas = escribir_candidatos(connection, estacion, [candidato for _, candidato in lote], metricas)
+                except db.Error:
+                    connection.rollback()
+                    raise
+                finally:
+                    connection.close()
+                self.spool.descartar([clave for clave, _ in lote])
+                enviadas += len(lote)
+                log.info("[%s] Spool: %d filas enviadas, %d escritas.", nombre, len(lote), escritas)
+                if self.registro_metricas is not None:
+                    self.registro_metricas.escribir(metricas.cerrar())
+                if len(lote) < self.filas:
+                    break
+        return enviadas
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name="scantotals-drenador", daemon=True)
+        self._hilo.start()
+        # Lo que quedó de ejecuciones anteriores se envía sin esperar al primer aviso.
+        self.avisar()
+        return self
+
+    def avisar(self):
+        """Indica que hay filas nuevas en el spool."""
+        self._avisado.set()
+
+    def detener(self, timeout=None):
+        self._detenido.set()
+        self._avisado.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def _bucle(self):
+        espera = 0.0
+        while not self._detenido.is_set():
+            if espera:
+                # Durante la espera los avisos se ignoran: no tiene sentido insistir antes de tiempo.
+                if self._detenido.wait(espera):
+                    break
+            else:
+                self._avisado.wait()
+            self._avisado.clear()
+            if self._detenido.is_set():
+                break
+            try:
+                self.drenar()
+                espera = 0.0
+            except db.Error as err:
+                espera = min(BACKOFF_MAXIMO, max(BACKOFF_INICIAL, espera * 2))
+                log.warning("No se pudo vaciar el spool (%s); %d filas pendientes, nuevo intento en %.0fs.",
+                            err, self.spool.pendientes(), espera)
+
+    def vaciar(self):
+        """Última pasada al terminar: detiene el hilo y drena lo que quede; si falla, las filas siguen en el spool."""
+        self.detener()
+        self._detenido.clear()
+        try:
+            self.drenar()
+        except db.Error as err:
+            log.warning("No se pudo vaciar el spool (%s); %d filas quedan pendientes en %s.",
+                        err, self.spool.pendientes(), self.spool.ruta)
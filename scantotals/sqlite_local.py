@@ -0,0 +1,210 @@
+"""
+Sustituto local de MySQL basado en sqlite3, para probar el pipeline y el modo daemon
+sin acceso al proxy remoto.
+
+Expone la misma interfaz que usa el pipeline de mysql.connector (pool.get_connection(),
+connection.cursor(), commit, rollback, ping, close) y traduce las pocas sentencias que
+genera db.py: parámetros %s, nombres con comillas invertidas, SHOW INDEX, SHOW COLUMNS,
+SHOW TABLES, SELECT @@max_allowed_packet y el ON DUPLICATE KEY UPDATE del modo upsert y del
+resumen por turno.
+
+Para los benchmarks, `latencia` agrega una espera por viaje a la base de datos (imitando
+al proxy remoto) y el pool cuenta sentencias y viajes en `estadisticas`.
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from .estaciones import ESTACIONES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {tabla} (
+    name TEXT, fecha TEXT, mean, median, hits INTEGER, multi REAL, "inf fails", shortest, longest,
+    total, stddev, hour TEXT, num TEXT, huella INTEGER,
+    actualizado TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_name_fecha_hour_{tabla} ON {tabla} (fecha, hour, name);
+CREATE INDEX IF NOT EXISTS ix_fecha_hour_{tabla} ON {tabla} (fecha, hour);
+CREATE INDEX IF NOT EXISTS ix_fecha_actualizado_{tabla} ON {tabla} (fecha, actualizado);
+-- Equivalente de ON UPDATE CURRENT_TIMESTAMP (migración 004); sin recursive_triggers no se dispara a sí mismo.
+CREATE TRIGGER IF NOT EXISTS actualizado_{tabla} AFTER UPDATE ON {tabla} BEGIN
+    UPDATE {tabla} SET actualizado = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE rowid = NEW.rowid;
+END;
+"""
+
+SCHEMA_RESUMEN = """
+CREATE TABLE IF NOT EXISTS resumen_turnos (
+    estacion TEXT NOT NULL, fecha TEXT NOT NULL, turno TEXT NOT NULL, hour TEXT NOT NULL,
+    filas INTEGER NOT NULL, hits INTEGER, mean_ponderada REAL, shortest_min, longest_max,
+    PRIMARY KEY (estacion, fecha, turno, hour)
+);
+"""
+
+# Equivalente de db.UPSERT_CLAUSE. En SQLite todas las asignaciones ven los valores anteriores,
+# por lo que hits puede ir en cualquier posición.
+UPSERT_SQLITE = """
+ON CONFLICT (name, fecha, hour) DO UPDATE SET
+    mean = CASE WHEN excluded.hits > hits THEN excluded.mean ELSE mean END,
+    median = CASE WHEN excluded.hits > hits THEN excluded.median ELSE median END,
+    multi = CASE WHEN excluded.hits > hits THEN excluded.multi ELSE multi END,
+    "inf fails" = CASE WHEN excluded.hits > hits THEN excluded."inf fails" ELSE "inf fails" END,
+    shortest = CASE WHEN excluded.hits > hits THEN excluded.shortest ELSE shortest END,
+    longest = CASE WHEN excluded.hits > hits THEN excluded.longest ELSE longest END,
+    total = CASE WHEN excluded.hits > hits THEN excluded.total ELSE total END,
+    stddev = CASE WHEN excluded.hits > hits THEN excluded.stddev ELSE stddev END,
+    num = CASE WHEN excluded.hits > hits THEN excluded.num ELSE num END,
+    hits = MAX(hits, excluded.hits)
+"""
+
+# Equivalente de db.UPSERT_CLAUSE_HUELLA.
+UPSERT_SQLITE_HUELLA = """
+ON CONFLICT (name, fecha, hour) DO UPDATE SET
+    mean = CASE WHEN excluded.hits >= hits THEN excluded.mean ELSE mean END,
+    median = CASE WHEN excluded.hits >= hits THEN excluded.median ELSE median END,
+    multi = CASE WHEN excluded.hits >= hits THEN excluded.multi ELSE multi END,
+    "inf fails" = CASE WHEN excluded.hits >= hits THEN excluded."inf fails" ELSE "inf fails" END,
+    shortest = CASE WHEN excluded.hits >= hits THEN excluded.shortest ELSE shortest END,
+    longest = CASE WHEN excluded.hits >= hits THEN excluded.longest ELSE longest END,
+    total = CASE WHEN excluded.hits >= hits THEN excluded.total ELSE total END,
+    stddev = CASE WHEN excluded.hits >= hits THEN excluded.stddev ELSE stddev END,
+    num = CASE WHEN excluded.hits >= hits THEN excluded.num ELSE num END,
+    huella = CASE WHEN excluded.hits >= hits THEN excluded.huella ELSE huella END,
+    hits = MAX(hits, excluded.hits)
+"""
+
+_SHOW_INDEX = re.compile(r"SHOW INDEX FROM (\w+) WHERE Key_name = %s")
+_SHOW_COLUMNS = re.compile(r"SHOW COLUMNS FROM (\w+) LIKE %s")
+_SHOW_TABLES = "SHOW TABLES LIKE %s"
+_RESUMEN = "INSERT INTO resumen_turnos"
+_ON_DUPLICATE = re.compile(r"ON DUPLICATE KEY UPDATE.*", re.S)
+# Valor por defecto de max_allowed_packet en MySQL 8.
+MAX_ALLOWED_PACKET = 64 * 2**20
+
+
+class Error(sqlite3.Error):
+    pass
+
+
+def traducir(query):
+    """Convierte una sentencia generada para MySQL a su equivalente en SQLite."""
+    if _RESUMEN in query:
+        # Resumen: todas las columnas se reemplazan; VALUES(c) equivale a excluded.c.
+        query = query.replace("ON DUPLICATE KEY UPDATE",
+                              "ON CONFLICT (estacion, fecha, turno, hour) DO UPDATE SET")
+        query = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", query)
+    else:
+        upsert = UPSERT_SQLITE_HUELLA if "VALUES(huella)" in query else UPSERT_SQLITE
+        query = _ON_DUPLICATE.sub(lambda _: upsert, query)
+    return query.replace('%s', '?').replace('`', '"')
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection._db.cursor()
+
+    def execute(self, query, params=()):
+        self._connection._pool._viaje("sentencias")
+        show_index = _SHOW_INDEX.search(query)
+        if show_index:
+            # Solo se consulta la clave única del modo upsert: se busca su índice equivalente.
+            tabla = show_index.group(1)
+            query = "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?"
+            params = (f"{params[0]}_{tabla}",)
+        elif _SHOW_COLUMNS.search(query):
+            query = f"SELECT name FROM pragma_table_info('{_SHOW_COLUMNS.search(query).group(1)}') WHERE name = %s"
+        elif query == _SHOW_TABLES:
+            query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s"
+        elif "@@max_allowed_packet" in query:
+            query = f"SELECT {MAX_ALLOWED_PACKET}"
+        self._cursor.execute(traducir(query), params)
+
+    def executemany(self, query, seq_params):
+        # mysql.connector reescribe un executemany de INSERT como un solo INSERT de varias filas.
+        self._connection._pool._viaje("sentencias")
+        self._cursor.executemany(traducir(query), seq_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, pool, db):
+        self._pool = pool
+        self._db = db
+
+    def cursor(self):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self._pool._viaje("commits")
+        self._db.commit()
+
+    def rollback(self):
+        self._pool._viaje("rollbacks")
+        self._db.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._pool._viaje("pings")
+        self._db.execute("SELECT 1")
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        # Igual que en mysql.connector.pooling: close() devuelve la conexión al pool.
+        self._pool._devolver(self)
+
+
+class SQLitePool:
+    """Pool de conexiones sqlite3 sobre un mismo archivo (o una base en memoria compartida)."""
+
+    def __init__(self, path, pool_size=3, latencia=0.0):
+        self.latencia = latencia
+        self.estadisticas = Counter()
+        self._lock_estadisticas = threading.Lock()
+        if path == ":memory:":
+            # Cada conexión a ":memory:" sería una base distinta; se usa una en memoria compartida.
+            path, uri = f"file:scantotals_{id(self)}?mode=memory&cache=shared", True
+        else:
+            uri = False
+        self._libres = []
+        self._lock = threading.Lock()
+        self._conexiones = [
+            sqlite3.connect(path, uri=uri, check_same_thread=False, timeout=30) for _ in range(pool_size)
+        ]
+        with self._conexiones[0] as db:
+            for estacion in ESTACIONES.values():
+                db.executescript(SCHEMA.format(tabla=estacion.tabla))
+            db.executescript(SCHEMA_RESUMEN)
+        self._libres = [SQLiteConnection(self, db) for db in self._conexiones]
+
+    def get_connection(self):
+        with self._lock:
+            if not self._libres:
+                raise Error("Failed getting connection; pool exhausted")
+            return self._libres.pop()
+
+    def _devolver(self, connection):
+        with self._lock:
+            self._libres.append(connection)
+
+    def _viaje(self, tipo):
+        """Registra un viaje a la base de datos y simula la latencia del proxy."""
+        with self._lock_estadisticas:
+            self.estadisticas[tipo] += 1
+            self.estadisticas["viajes"] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
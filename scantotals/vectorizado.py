@@ -0,0 +1,238 @@
+"""
+Motor vectorizado (pandas/NumPy) para archivos grandes: estaciones de alto volumen y backfill.
+
+Lee la sección posterior a la cabecera 'Key' con read_csv (por bloques de FILAS_POR_BLOQUE
+filas, para acotar la memoria) y decodifica cada bloque por columnas:
+  - la clave se parte en el primer '-' (máquina / día y hora) con np.strings; cada parte
+    tiene pocos valores distintos, así que ParserClave.decodificar_clave (hora, ventana del
+    turno, fecha y corte de horario futuro) se evalúa una vez por combinación distinta y el
+    resultado se reparte a las filas con índices, sin duplicar las reglas;
+  - hits e INF Fails se convierten una vez por valor distinto;
+  - clean_value, clean_numeric_value y clean_percentage se aplican por columna.
+
+El resultado (filas aceptadas, registros, motivos de descarte y filas diferidas) es idéntico
+al de pipeline.iterar_candidatos; benchmarks/bench_vectorizado.py lo verifica sobre archivos
+sintéticos y mide el rendimiento. La traza por fila (--traza) no está disponible en este motor.
+
+pandas y NumPy 2 son dependencias opcionales: solo se importan al elegir este motor (pipeline.MOTOR).
+"""
+import io
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .contexto import crear_contexto
+from .extraccion import VALORES_NULOS
+from .metricas import MetricasEstacion
+from .parser import FUTURO, HITS_INVALIDOS, CandidatoListo, ParserClave
+
+FILAS_POR_BLOQUE = 200_000
+
+_COLUMNAS = list(range(10))
+_ACEPTADA = ""
+_HORA = re.compile(r"(\d{1,2}):(\d{2})")
+_NUM = re.compile(r"^(\d+)")
+_HORA_VALOR = re.compile(r"^\d{1,2}:\d{2}$")
+
+
+def _por_valor(columna, funcion):
+    """Aplica `funcion` una vez por valor distinto de la columna y reparte el resultado."""
+    codigos, unicos = pd.factorize(columna)
+    return np.array([funcion(valor) for valor in unicos] + [None], dtype=object)[:-1][codigos]
+
+
+def _entero(texto):
+    try:
+        return int(texto)
+    except ValueError:
+        return None
+
+
+def _hits(bloque, estacion):
+    """Hits por fila (como en ParserClave.decodificar) y máscara de los que son válidos."""
+    hits = _por_valor(bloque[3].to_numpy(dtype=object), _entero)
+    validos = np.not_equal(hits, None)
+    if estacion.restar_inf_fails:
+        restar = _por_valor(bloque[5].to_numpy(dtype=object),
+                            lambda texto: 0 if texto in VALORES_NULOS else (_entero(texto) or 0))
+        hits[validos] = hits[validos] - restar[validos]
+    return hits, validos
+
+
+def _a_float(valores):
+    """float() de Python por valor (mismo redondeo); None si no se puede convertir."""
+    try:
+        return valores.astype(float).tolist()
+    except ValueError:
+        salida = []
+        for texto in valores:
+            try:
+                salida.append(float(texto))
+            except ValueError:
+                salida.append(None)
+        return salida
+
+
+def _limpiar(columna):
+    """clean_value por columna."""
+    valores = columna.to_numpy(dtype=object)
+    valores[np.isin(valores, VALORES_NULOS)] = None
+    return valores.tolist()
+
+
+def _limpiar_numerico(columna):
+    """clean_numeric_value por columna: horas 'H:MM' como texto, el resto a float."""
+    valores = columna.to_numpy(dtype=object)
+    salida = np.full(len(valores), None, dtype=object)
+    nulos = np.isin(valores, VALORES_NULOS)
+    # Solo las celdas con ':' pueden ser horas; a esas se les aplica la expresión de extraccion.py.
+    con_hora = ~nulos & (np.strings.find(valores.astype(str), ':') >= 0)
+    for posicion in np.flatnonzero(con_hora):
+        texto = valores[posicion]
+        if _HORA_VALOR.match(texto):
+            if int(texto.split(':')[1]) < 60:
+                salida[posicion] = texto
+        else:
+            salida[posicion] = _a_float(valores[posicion:posicion + 1])[0]
+    resto = ~nulos & ~con_hora
+    if resto.any():
+        salida[resto] = _a_float(valores[resto])
+    return salida.tolist()
+
+
+def _limpiar_porcentaje(columna):
+    """clean_percentage por columna."""
+    valores = columna.to_numpy(dtype=object)
+    salida = np.full(len(valores), None, dtype=object)
+    nulos = np.isin(valores, VALORES_NULOS)
+    porcentaje = ~nulos & np.strings.endswith(valores.astype(str), '%')
+    if porcentaje.any():
+        # Igual que clean_percentage, un valor que no es número ni porcentaje es un error (ValueError).
+        sin_signo = np.strings.strip(valores[porcentaje].astype(str), '%').astype(object)
+        salida[porcentaje] = (sin_signo.astype(float) / 100).tolist()
+    resto = ~nulos & ~porcentaje
+    if resto.any():
+        salida[resto] = valores[resto].astype(float).tolist()
+    return salida.tolist()
+
+
+def decodificar_bloque(bloque, parser):
+    """
+    Decodifica un bloque (DataFrame con las columnas 0-9 como texto). Devuelve
+    (motivo por fila: "" si se acepta, columnas de las aceptadas: name/fecha/hour/num/hits).
+    Las columnas son arrays de NumPy de tipo object y no un DataFrame, que convertiría None en NaN.
+    """
+    nombres = bloque[0].to_numpy(dtype=object)
+    prefijo, guion, resto = np.strings.partition(nombres.astype(str), '-')
+    codigo_prefijo, prefijos = pd.factorize(prefijo)
+    codigo_cola, colas = pd.factorize(np.strings.add(guion, resto))
+
+    # La hora se busca en toda la clave y el patrón no contiene '-': si el prefijo (máquina)
+    # tiene una hora, esa es la que vale; si no, la clave equivale a '' + '-' + resto.
+    # El número depende solo del prefijo.
+    prefijo_con_hora = np.array([_HORA.search(p) is not None for p in prefijos], dtype=bool)
+    nums = np.array([m.group(1) if (m := _NUM.match(p)) else None for p in prefijos] + [None], dtype=object)[:-1]
+    combinada = np.where(prefijo_con_hora[codigo_prefijo], codigo_prefijo + 1, 0) * len(colas) + codigo_cola
+    codigo_clave, claves = pd.factorize(combinada)
+    motivos = np.empty(len(claves), dtype=object)
+    fechas = np.full(len(claves), None, dtype=object)
+    horas = np.full(len(claves), None, dtype=object)
+    for i, clave in enumerate(claves.tolist()):
+        indice_prefijo, indice_cola = divmod(clave, len(colas))
+        texto = (prefijos[indice_prefijo - 1] if indice_prefijo else '') + colas[indice_cola]
+        resultado = parser.decodificar_clave(texto)
+        if resultado.__class__ is str:
+            motivos[i] = resultado
+        else:
+            motivos[i] = _ACEPTADA
+            fechas[i], horas[i] = resultado
+    motivo = motivos[codigo_clave]
+
+    hits, hits_validos = _hits(bloque, parser.estacion)
+    motivo[(motivo == _ACEPTADA) & ~hits_validos] = HITS_INVALIDOS
+    aceptadas = motivo == _ACEPTADA
+    return motivo, {
+        "name": nombres[aceptadas],
+        "fecha": fechas[codigo_clave[aceptadas]],
+        "hour": horas[codigo_clave[aceptadas]],
+        "num": nums[codigo_prefijo[aceptadas]],
+        "hits": hits[aceptadas],
+    }
+
+
+def registros_bloque(bloque, aceptadas, estacion):
+    """Arma los registros de las filas aceptadas en el orden de build_record, limpiando por columna."""
+    limpiar = _limpiar_numerico if estacion.limpieza_numerica else _limpiar
+    columnas = [
+        aceptadas["name"].tolist(),
+        aceptadas["fecha"].tolist(),
+        limpiar(bloque[1]),
+        limpiar(bloque[2]),
+        aceptadas["hits"].tolist(),
+        _limpiar_porcentaje(bloque[4]),
+        limpiar(bloque[5]),
+        limpiar(bloque[6]),
+        limpiar(bloque[7]),
+        limpiar(bloque[8]),
+        limpiar(bloque[9]),
+        aceptadas["hour"].tolist(),
+        aceptadas["num"].tolist(),
+    ]
+    return list(zip(*columnas))
+
+
+def _leer_bloques(archivo, filas_por_bloque):
+    return pd.read_csv(archivo, sep='\t', header=None, names=_COLUMNAS, usecols=_COLUMNAS, dtype=str,
+                       na_filter=False, keep_default_na=False, chunksize=filas_por_bloque)
+
+
+def iterar_candidatos(input_file, estacion, nocturno=None, checkpoint=None, contexto=None, metricas=None,
+                      filas_por_bloque=FILAS_POR_BLOQUE):
+    """Misma interfaz y resultado que pipeline.iterar_candidatos; genera CandidatoListo."""
+    if nocturno is None:
+        nocturno = "NVO" in input_file
+    if metricas is None:
+        metricas = MetricasEstacion(estacion.nombre, input_file)
+    contadores = metricas.contadores
+    parser = ParserClave(estacion, nocturno, contexto or crear_contexto(), metricas)
+    with open(input_file, 'r') as original_file:
+        with metricas.medir('lectura'):
+            lineas = original_file if checkpoint is None else checkpoint.filtrar(original_file)
+            for linea in lineas:
+                if linea.split('\t', 1)[0].rstrip('\r\n') == 'Key':
+                    break
+            else:
+                return
+            # Con checkpoint, las líneas pasan por el filtro; sin él, read_csv sigue leyendo el archivo.
+            datos = original_file if checkpoint is None else io.StringIO(''.join(lineas))
+            bloques = _leer_bloques(datos, filas_por_bloque)
+        while True:
+            with metricas.medir('lectura'):
+                bloque = next(bloques, None)
+            if bloque is None:
+                break
+            inicio = time.perf_counter()
+            nombres = bloque[0].to_numpy(dtype=object)
+            validas = (np.strings.strip(nombres.astype(str)) != "") & (nombres != "Key")
+            if not validas.all():
+                bloque = bloque[validas].reset_index(drop=True)
+            contadores['filas'] += len(bloque)
+            motivo, aceptadas = decodificar_bloque(bloque, parser)
+            for razon, cantidad in zip(*np.unique(motivo[motivo != _ACEPTADA].astype(str), return_counts=True)):
+                contadores[str(razon)] += int(cantidad)
+            if checkpoint is not None:
+                for clave in bloque[0][motivo == FUTURO]:
+                    # Las filas futuras son pocas: se vuelve a decodificar la clave (memorizada) por su momento.
+                    parser.decodificar_clave(clave)
+                    checkpoint.diferir(clave, parser.elegible)
+            registros = registros_bloque(bloque[motivo == _ACEPTADA].reset_index(drop=True), aceptadas, estacion)
+            contadores['aceptadas'] += len(registros)
+            metricas.etapas['parseo'] += time.perf_counter() - inicio
+            for registro, name, fecha, hour, num, hits in zip(
+                    registros, aceptadas["name"].tolist(), aceptadas["fecha"].tolist(), aceptadas["hour"].tolist(),
+                    aceptadas["num"].tolist(), aceptadas["hits"].tolist()):
+                yield CandidatoListo(registro, name, fecha, hour, num, hits)
+    if checkpoint is not None:
+        contadores['lineas_sin_cambio'] += checkpoint.sin_cambio
@@ -0,0 +1,197 @@
+"""
+Modo vigilancia: ingesta disparada por cambios en los archivos scantotals_*.auto.tab.
+
+En lugar de procesar a hora fija, se observan los archivos de las estaciones y solo se
+ingieren las estaciones cuyo archivo vigente (según la hora, ver seleccionar_archivo)
+cambió. Las reescrituras seguidas se agrupan: una estación se procesa cuando su archivo
+lleva `debounce` segundos sin cambiar.
+
+Se usa inotify (Linux, disco local) cuando está disponible; en Windows y en recursos de red
+(donde inotify no ve las escrituras de otros equipos) se sondea mtime y tamaño.
+Cada `barrido` segundos se procesan todas las estaciones, para recoger las filas que
+se omitieron por horario futuro aunque el archivo no haya vuelto a cambiar.
+"""
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from . import db
+from .contexto import ahora
+from .estaciones import ESTACIONES, rutas_estacion, seleccionar_archivo
+from .pipeline import MAX_WORKERS, ejecutar
+from .spool import Drenador
+
+DEBOUNCE_SEGUNDOS = 2.0
+SONDEO_SEGUNDOS = 5.0
+BARRIDO_SEGUNDOS = 900
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_EVENTO = struct.Struct('iIII')
+_FS_DE_RED = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p'}
+
+log = logging.getLogger(__name__)
+
+
+class ObservadorSondeo:
+    """Detecta cambios comparando (mtime, tamaño) cada `intervalo` segundos."""
+
+    def __init__(self, rutas, intervalo=SONDEO_SEGUNDOS):
+        self._intervalo = intervalo
+        self._firmas = {ruta: self._firma(ruta) for ruta in rutas}
+        self._proximo = time.monotonic() + intervalo
+
+    @staticmethod
+    def _firma(ruta):
+        try:
+            stat = os.stat(ruta)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def esperar(self, timeout):
+        """Espera hasta `timeout` segundos y devuelve las rutas que cambiaron."""
+        time.sleep(max(0.0, min(timeout, self._proximo - time.monotonic())))
+        cambios = set()
+        if time.monotonic() < self._proximo:
+            return cambios
+        self._proximo = time.monotonic() + self._intervalo
+        for ruta, firma in self._firmas.items():
+            actual = self._firma(ruta)
+            if actual != firma:
+                self._firmas[ruta] = actual
+                cambios.add(ruta)
+        return cambios
+
+    def cerrar(self):
+        pass
+
+
+class ObservadorInotify:
+    """Detecta cambios con inotify sobre los directorios de los archivos (sobrevive a reemplazos)."""
+
+    def __init__(self, rutas):
+        # ctypes solo se importa con inotify: el arranque de una ejecución única no lo carga.
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._rutas = {os.path.abspath(ruta): ruta for ruta in rutas}
+        self._directorios = {}
+        mascara = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        for directorio in {os.path.dirname(ruta) for ruta in self._rutas}:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directorio), mascara)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {directorio}")
+            self._directorios[wd] = directorio
+
+    def esperar(self, timeout):
+        listos, _, _ = select.select([self._fd], [], [], timeout)
+        cambios = set()
+        if not listos:
+            return cambios
+        try:
+            datos = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return cambios
+        offset = 0
+        while offset < len(datos):
+            wd, _, _, longitud = _EVENTO.unpack_from(datos, offset)
+            offset += _EVENTO.size
+            nombre = os.fsdecode(datos[offset:offset + longitud].rstrip(b'\0'))
+            offset += longitud
+            ruta = self._rutas.get(os.path.join(self._directorios.get(wd, ''), nombre))
+            if ruta is not None:
+                cambios.add(ruta)
+        return cambios
+
+    def cerrar(self):
+        os.close(self._fd)
+
+
+def _es_recurso_de_red(ruta):
+    """Rutas de Windows, UNC o montajes de red en Linux: inotify no es confiable ahí."""
+    if not sys.platform.startswith('linux') or ruta.startswith(('//', '\\\\')) or ruta[1:2] == ':':
+        return True
+    ruta = os.path.realpath(ruta)
+    tipo, mejor = None, ''
+    try:
+        with open('/proc/mounts', 'r') as montajes:
+            for linea in montajes:
+                partes = linea.split()
+                if len(partes) >= 3 and ruta.startswith(partes[1]) and len(partes[1]) > len(mejor):
+                    tipo, mejor = partes[2], partes[1]
+    except OSError:
+        return True
+    return tipo in _FS_DE_RED
+
+
+def crear_observador(rutas, intervalo_sondeo=SONDEO_SEGUNDOS):
+    if not any(_es_recurso_de_red(ruta) for ruta in rutas):
+        try:
+            return ObservadorInotify(rutas)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return ObservadorSondeo(rutas, intervalo_sondeo)
+
+
+def ejecutar_vigilancia(nombres=None, debounce=DEBOUNCE_SEGUNDOS, intervalo_sondeo=SONDEO_SEGUNDOS,
+                        barrido=BARRIDO_SEGUNDOS, workers=MAX_WORKERS, conexiones=db.TAMANO_POOL,
+                        checkpoints=None, metricas=None, spool=None):
+    """
+    Vigila los archivos hasta Ctrl+C; el pool de conexiones se mantiene abierto todo el tiempo.
+    Con `spool` (spool.Spool) las filas van al spool y un Drenador en segundo plano las envía.
+    """
+    estaciones = [ESTACIONES[nombre] for nombre in (nombres or ESTACIONES)]
+    por_ruta = {ruta: estacion for estacion in estaciones for ruta in rutas_estacion(estacion)}
+    observador = crear_observador(list(por_ruta), intervalo_sondeo)
+    log.info("Vigilando %d archivos con %s.", len(por_ruta), type(observador).__name__)
+    pool = None
+    drenador = Drenador(spool, registro_metricas=metricas).iniciar() if spool is not None else None
+    pendientes = {}
+    ultimo_barrido = None
+    try:
+        while True:
+            if pool is None and spool is None:
+                try:
+                    pool = db.crear_pool(conexiones)
+                except db.Error as err:
+                    log.error("Error al conectar con la base de datos: %s", err)
+            # Instante monotónico del ciclo; ahora() es la hora de referencia (contexto.reloj).
+            momento = time.monotonic()
+            listo = pool is not None or spool is not None
+            if listo and (ultimo_barrido is None or momento - ultimo_barrido >= barrido):
+                ejecutar([e.nombre for e in estaciones], workers=workers, conexiones=conexiones, pool=pool,
+                         checkpoints=checkpoints, metricas=metricas, spool=spool)
+                if drenador is not None:
+                    drenador.avisar()
+                ultimo_barrido = momento
+                pendientes.clear()
+            listas = [nombre for nombre, cambio in pendientes.items() if momento - cambio >= debounce]
+            if listo and listas:
+                for nombre in listas:
+                    del pendientes[nombre]
+                ejecutar(listas, workers=workers, conexiones=conexiones, pool=pool, checkpoints=checkpoints,
+                         metricas=metricas, spool=spool)
+                if drenador is not None:
+                    drenador.avisar()
+            espera = min([debounce - (time.monotonic() - cambio) for cambio in pendientes.values()] + [1.0])
+            for ruta in observador.esperar(max(0.05, espera)):
+                estacion = por_ruta[ruta]
+                # Solo interesa el archivo que corresponde al turno actual.
+                if seleccionar_archivo(estacion, ahora()) == ruta:
+                    pendientes[estacion.nombre] = time.monotonic()
+    except KeyboardInterrupt:
+        log.info("Vigilancia detenida.")
+    finally:
+        observador.cerrar()
+        if drenador is not None:
+            drenador.vaciar()
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+# Las pruebas importan el paquete desde el repositorio, igual que los app.py de cada estación.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scantotals import db, estaciones, resumen  # noqa: E402
+from scantotals.sqlite_local import SQLitePool  # noqa: E402
+
+
+@pytest.fixture
+def base_sqlite(tmp_path, monkeypatch):
+    """Ruta de una base SQLite nueva en db.SQLITE_PATH, sin lo memorizado por proceso en db y resumen."""
+    ruta = str(tmp_path / "scantotals.db")
+    monkeypatch.setattr(db, "SQLITE_PATH", ruta)
+    monkeypatch.setattr(db, "_columnas", {})
+    monkeypatch.setattr(db, "_claves_unicas", {})
+    monkeypatch.setattr(db, "_max_allowed_packet", None)
+    monkeypatch.setattr(resumen, "_disponible", None)
+    return ruta
+
+
+@pytest.fixture
+def pool(base_sqlite):
+    return SQLitePool(base_sqlite, 2)
+
+
+@pytest.fixture
+def leer_tabla(pool):
+    """Función que devuelve las filas de una tabla en el orden de build_record, ordenadas por clave."""
+    def leer(tabla):
+        connection = pool.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT {db.COLUMNAS} FROM {tabla} ORDER BY name, fecha, hour")
+            return cursor.fetchall()
+        finally:
+            connection.close()
+    return leer
+
+
+CABECERA = "Key\tMean\tMedian\tHits\tMulti\tINF Fails\tShortest\tLongest\tTotal\tStdDev"
+
+
+@pytest.fixture
+def vision(tmp_path, monkeypatch):
+    """Directorio VISION temporal (estaciones.DIRECTORIO_VISION)."""
+    directorio = tmp_path / "vision"
+    directorio.mkdir()
+    monkeypatch.setattr(estaciones, "DIRECTORIO_VISION", str(directorio))
+    return directorio
+
+
+@pytest.fixture
+def archivo_vision(vision):
+    """Función que escribe el archivo .tab de una estación (filas como listas de celdas) y devuelve su ruta."""
+    def escribir(estacion, filas, nocturno=False):
+        ruta = vision / (estacion.archivo_noche if nocturno else estacion.archivo_dia)
+        with open(ruta, 'w', newline='') as archivo:
+            archivo.write("Scan Totals Report\n\n" + CABECERA + "\n")
+            for fila in filas:
+                archivo.write("\t".join(fila) + "\n")
+        return str(ruta)
+    return escribir
+
@@ -0,0 +1,112 @@
+"""asincrono.ejecutar sobre el sustituto SQLite (PoolSQLite) y con una conexión asíncrona simulada."""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+from scantotals import asincrono, db, pipeline
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+
+NOW = datetime(2026, 10, 10, 12, 0)
+
+
+def fila(clave, hits, multi="3.0%"):
+    return [clave, "1.5", "N/A", str(hits), multi, "0", "0:45", "", "inf%", "2.00"]
+
+
+FILAS = [fila("001 MAQ01-10 10:00", 5), fila("002 MAQ02-10 10:30", 7, multi="abc"), fila("003 MAQ03-10 11:30", 3),
+         fila("004 MAQ04-10 05:00", 3), fila("001 MAQ01-10 10:00", 4), fila("006 MAQ06-09 21:30", 4)]
+
+
+@pytest.mark.parametrize("modo", ["upsert", "reemplazo"])
+def test_misma_tabla_que_el_pipeline(base_sqlite, archivo_vision, leer_tabla, monkeypatch, modo):
+    monkeypatch.setattr(db, "MODO_ESCRITURA", modo)
+    archivo_vision(ESTACIONES["pulidos"], FILAS)
+    archivo_vision(ESTACIONES["biselados"], [fila("010 BIS-10 08:15", 12)])
+    resultados = {r.estacion: r for r in asyncio.run(asincrono.ejecutar(["pulidos", "biselados"], now=NOW))}
+    assert {nombre: (r.error, r.filas) for nombre, r in resultados.items()} == {
+        "pulidos": (None, 2), "biselados": (None, 1)}
+    contadores = resultados["pulidos"].metricas.contadores
+    assert (contadores["valores_invalidos"], contadores["duplicadas"]) == (1, 1)
+    # Consultas de preparación, de existentes, lote y resumen: todas cuentan como sentencias.
+    assert contadores["sentencias"] > 3
+    esperado = leer_tabla("pulidos"), leer_tabla("biselados")
+    # El pipeline por hilos, sobre la misma base, no tiene nada nuevo que escribir.
+    assert [r.filas for r in pipeline.ejecutar(["pulidos", "biselados"], now=NOW)] == [0, 0]
+    assert (leer_tabla("pulidos"), leer_tabla("biselados")) == esperado
+    assert [r[:2] for r in esperado[0]] == [("001 MAQ01-10 10:00", "2026-10-10"), ("006 MAQ06-09 21:30", "2026-10-09")]
+
+
+class ErrorDelDriver(Exception):
+    """Error de un driver importado después que asincrono (como mysql.connector con db.conector())."""
+
+
+class CursorSimulado:
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self._filas = []
+
+    async def execute(self, query, params=()):
+        self.conexion.sentencias.append(query.split()[0])
+        if query.lstrip().startswith("INSERT"):
+            raise ErrorDelDriver("Lost connection to MySQL server during query")
+        self._filas = [(4 << 20,)] if "@@max_allowed_packet" in query else []
+
+    async def executemany(self, query, seq_params):
+        await self.execute(query)
+
+    async def fetchall(self):
+        return self._filas
+
+    async def close(self):
+        pass
+
+
+class ConexionSimulada:
+    """Conexión con la interfaz de aiomysql que usa asincrono; los INSERT fallan."""
+
+    def __init__(self):
+        self.sentencias = []
+        self.rollbacks = 0
+        self.commits = 0
+
+    async def cursor(self):
+        return CursorSimulado(self)
+
+    async def ping(self, reconnect=True):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class PoolSimulado:
+    def __init__(self):
+        self.conexion = ConexionSimulada()
+        self.prestadas = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.prestadas += 1
+        try:
+            yield self.conexion
+        finally:
+            self.prestadas -= 1
+
+
+def test_error_del_driver_deshace_y_falla_la_estacion(base_sqlite, archivo_vision, monkeypatch):
+    # db.Error se reemplaza después de importar asincrono: el error debe capturarse igual.
+    monkeypatch.setattr(db, "Error", db.Error + (ErrorDelDriver,))
+    monkeypatch.setattr(db, "MODO_ESCRITURA", "upsert")
+    estacion = ESTACIONES["pulidos"]
+    ruta = archivo_vision(estacion, FILAS)
+    pool = PoolSimulado()
+    resultado = asyncio.run(asincrono.procesar_estacion(pool, estacion, str(ruta), contexto=crear_contexto(NOW)))
+    assert resultado.error == "Error al ejecutar el comando SQL: Lost connection to MySQL server during query"
+    assert (pool.conexion.rollbacks, pool.conexion.commits, pool.prestadas) == (1, 0, 0)
+    assert pool.conexion.sentencias[:3] == ["SHOW", "SHOW", "SELECT"]
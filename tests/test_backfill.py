@@ -0,0 +1,58 @@
+"""backfill.ejecutar_backfill: cada archivo con su referencia y los fallos de los procesos trabajadores por archivo."""
+import os
+
+import pytest
+
+from scantotals import backfill, db
+
+
+def fila(clave, hits):
+    return [clave, "1.5", "N/A", str(hits), "3.0%", "0", "0:45", "", "inf%", "2.00"]
+
+
+@pytest.fixture
+def archivados(tmp_path):
+    """Dos archivos archivados con su momento de referencia en el nombre (10/10/2026 12:00)."""
+    directorio = tmp_path / "archivo"
+    directorio.mkdir()
+    pulidos = [fila("001 MAQ01-10 10:00", 5), fila("003 MAQ03-10 11:30", 3), fila("006 MAQ06-09 21:30", 4)]
+    for nombre, filas in (("scantotals_YVES1.auto.20261010T1200.tab", pulidos),
+                          ("scantotals_YVES5.auto.20261010T1200.tab", [fila("010 BIS-10 08:15", 12)])):
+        with open(directorio / nombre, 'w', newline='') as archivo:
+            archivo.write("Key\tMean\tMedian\tHits\tMulti\tINF Fails\tShortest\tLongest\tTotal\tStdDev\n")
+            archivo.write("".join("\t".join(celdas) + "\n" for celdas in filas))
+    return str(directorio)
+
+
+def _terminar(*args):
+    # Reemplaza a rellenar_archivo en los procesos: simula un trabajador que muere.
+    os._exit(3)
+
+
+def test_backfill_escribe_cada_archivo_con_su_referencia(base_sqlite, archivados, leer_tabla):
+    tareas, omitidos = backfill.planificar(archivados)
+    assert omitidos == []
+    resultados = {r.estacion: r for r in backfill.ejecutar_backfill(tareas, procesos=2)}
+    assert {nombre: (r.error, r.filas) for nombre, r in resultados.items()} == {
+        "pulidos": (None, 2), "biselados": (None, 1)}
+    assert [r[:2] for r in leer_tabla("pulidos")] == [("001 MAQ01-10 10:00", "2026-10-10"),
+                                                      ("006 MAQ06-09 21:30", "2026-10-09")]
+
+
+def test_base_inaccesible_falla_por_archivo(tmp_path, archivados, monkeypatch):
+    # Antes, el error de crear_pool en el inicializador rompía el pool de procesos (BrokenProcessPool).
+    monkeypatch.setattr(db, "SQLITE_PATH", str(tmp_path / "no" / "existe" / "x.sqlite"))
+    tareas, _ = backfill.planificar(archivados)
+    resultados = backfill.ejecutar_backfill(tareas, procesos=2)
+    assert len(resultados) == 2
+    for resultado in resultados:
+        assert resultado.error == "Error al conectar con la base de datos: unable to open database file"
+        assert resultado.metricas.contadores["errores"] == 1
+
+
+def test_trabajador_que_muere_falla_por_archivo(base_sqlite, archivados, monkeypatch):
+    monkeypatch.setattr(backfill, "rellenar_archivo", _terminar)
+    tareas, _ = backfill.planificar(archivados)
+    resultados = backfill.ejecutar_backfill(tareas, procesos=1)
+    assert len(resultados) == 2
+    assert all(r.error.startswith("El proceso trabajador terminó inesperadamente") for r in resultados)
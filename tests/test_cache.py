@@ -0,0 +1,119 @@
+"""cache.CacheExistentes frente a otros escritores, sobre el sustituto SQLite."""
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from scantotals import cache, contexto, db, pipeline
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.parser import Candidato
+
+PULIDOS = ESTACIONES["pulidos"]
+
+
+def candidato(name, hits, mean="1.5", hour="10:00"):
+    row = [name, mean, "N/A", str(hits), "3.0%", "0", "0.5", "2.5", "inf%", "2.00"]
+    return Candidato(row, name, "2026-10-10", hour, name.split()[0], hits)
+
+
+@pytest.fixture
+def cache_local(tmp_path, monkeypatch):
+    """Caché en un directorio temporal, activa en pipeline.CACHE, con la fecha de los candidatos como reciente."""
+    monkeypatch.setattr(contexto, "reloj", lambda: datetime(2026, 10, 10, 12, 0))
+    existentes = cache.CacheExistentes(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(pipeline, "CACHE", existentes)
+    yield existentes
+    existentes.cerrar()
+
+
+def escribir(pool, candidatos):
+    """Escribe y confirma como una estación; devuelve (filas escritas, contadores)."""
+    metricas = MetricasEstacion(PULIDOS.nombre)
+    connection = db.obtener_conexion(pool)
+    try:
+        escritas = pipeline.escribir_candidatos(connection, PULIDOS, candidatos, metricas)
+        connection.commit()
+    finally:
+        connection.close()
+    return escritas, metricas.contadores
+
+
+def otro_escritor(base_sqlite, sentencia, *parametros):
+    """Ejecuta y confirma una sentencia desde otra conexión, fuera del pipeline y de la caché."""
+    conexion = sqlite3.connect(base_sqlite)
+    try:
+        conexion.execute(sentencia, parametros)
+        conexion.commit()
+    finally:
+        conexion.close()
+
+
+def calentar(pool, lote):
+    """Escribe el lote y lo vuelve a leer, para que la caché guarde las filas y la marca."""
+    assert escribir(pool, lote)[0] == len(lote)
+    escritas, contadores = escribir(pool, lote)
+    assert (escritas, contadores['cache_cambios'], contadores['cache_recargas']) == (0, 1, 0)
+
+
+def test_fila_modificada_fuera_de_la_cache(pool, base_sqlite, leer_tabla, cache_local):
+    lote = [candidato("001 MAQ01", 10), candidato("002 MAQ02", 20)]
+    calentar(pool, lote)
+
+    # Otro proceso (sin huella) cambia la fila: el trigger mueve actualizado y vuelve en la consulta de cambios.
+    otro_escritor(base_sqlite, "UPDATE pulidos SET hits = 5, mean = '9.9', huella = NULL WHERE name = '001 MAQ01'")
+    escritas, contadores = escribir(pool, lote)
+    assert (escritas, contadores['cache_cambios'], contadores['cache_recargas']) == (1, 1, 0)
+    assert [(fila[0], fila[2], fila[4]) for fila in leer_tabla("pulidos")] == [
+        ("001 MAQ01", "1.5", 10), ("002 MAQ02", "1.5", 20)]
+
+
+def test_fila_borrada_fuera_de_la_cache(pool, base_sqlite, leer_tabla, cache_local):
+    lote = [candidato("001 MAQ01", 10), candidato("002 MAQ02", 20)]
+    calentar(pool, lote)
+
+    # Un borrado no aparece en la consulta de cambios: lo detecta el total de filas de la fecha.
+    otro_escritor(base_sqlite, "DELETE FROM pulidos WHERE name = '002 MAQ02'")
+    escritas, contadores = escribir(pool, lote)
+    assert (escritas, contadores['cache_recargas']) == (1, 1)
+    assert [fila[0] for fila in leer_tabla("pulidos")] == ["001 MAQ01", "002 MAQ02"]
+
+
+def test_recarga_completa_despues_de_verificacion(pool, base_sqlite, leer_tabla, cache_local):
+    lote = [candidato("001 MAQ01", 10), candidato("002 MAQ02", 20)]
+    calentar(pool, lote)
+
+    # Un cambio confirmado con actualizado anterior a la marca - MARGEN (una transacción larga)
+    # no vuelve en la consulta de cambios ni altera el total de filas.
+    otro_escritor(base_sqlite, "DROP TRIGGER actualizado_pulidos")
+    otro_escritor(base_sqlite, "UPDATE pulidos SET hits = 5, mean = '9.9', huella = NULL, actualizado = '2026-01-01 00:00:00.000' "
+                               "WHERE name = '001 MAQ01'")
+    escritas, contadores = escribir(pool, lote)
+    assert (escritas, contadores['cache_recargas']) == (0, 0)
+
+    # Pasado VERIFICACION desde la última carga completa, la fecha se recarga y la fila se corrige.
+    conexion = sqlite3.connect(cache_local.ruta)
+    conexion.execute("UPDATE fechas SET verificado = verificado - ?", (cache.VERIFICACION,))
+    conexion.commit()
+    conexion.close()
+    escritas, contadores = escribir(pool, lote)
+    assert (escritas, contadores['cache_recargas']) == (1, 1)
+    assert [(fila[0], fila[2], fila[4]) for fila in leer_tabla("pulidos")] == [
+        ("001 MAQ01", "1.5", 10), ("002 MAQ02", "1.5", 20)]
+
+
+def test_la_cache_se_guarda_solo_despues_del_commit(pool, leer_tabla, cache_local, monkeypatch):
+    lote = [candidato("001 MAQ01", 10)]
+
+    def fallar(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    # Con la lectura ya hecha (y la fila propia en el lote), falla la escritura: nada llega a la caché.
+    with monkeypatch.context() as parche:
+        parche.setattr(db.EscritorLotes, "cerrar", fallar)
+        with pytest.raises(sqlite3.OperationalError):
+            escribir(pool, lote)
+    assert cache_local._leer("pulidos", ["2026-10-10"]) == {}
+
+    assert escribir(pool, lote)[0] == 1
+    assert [fila[4] for fila in leer_tabla("pulidos")] == [10]
@@ -0,0 +1,81 @@
+"""Lectura incremental (checkpoint.RegistroCheckpoints): un archivo sin cambios se omite hasta que sus filas diferidas son vigentes."""
+import os
+from datetime import datetime
+
+import pytest
+
+from scantotals import db, pipeline
+from scantotals.checkpoint import RegistroCheckpoints, ruta_estacion
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.parser import FUTURO, ParserClave
+
+PULIDOS = ESTACIONES["pulidos"]
+
+
+def fila(clave, hits):
+    return [clave, "1.5", "N/A", str(hits), "3.0%", "0", "0:45", "", "inf%", "2.00"]
+
+
+@pytest.mark.parametrize("now, clave, elegible", [
+    (datetime(2026, 10, 10, 12, 0), "001 MAQ-10 11:30", datetime(2026, 10, 10, 12, 30)),
+    (datetime(2026, 10, 10, 12, 0), "001 MAQ-11 07:00", datetime(2026, 10, 11, 8, 0)),
+    # La fila de las "23:00" se acepta desde las 23:50, antes de que pase la hora.
+    (datetime(2026, 10, 10, 23, 10), "001 MAQ-10 23:00", datetime(2026, 10, 10, 23, 50)),
+])
+def test_momento_en_que_una_fila_futura_es_vigente(now, clave, elegible):
+    nocturno = now.hour >= 22
+    parser = ParserClave(PULIDOS, nocturno, crear_contexto(now))
+    assert parser.decodificar(fila(clave, 5)) == FUTURO
+    assert parser.elegible == elegible
+    assert not isinstance(ParserClave(PULIDOS, nocturno, crear_contexto(elegible)).decodificar(fila(clave, 5)), str)
+
+
+def test_archivo_sin_cambios_espera_a_sus_filas_diferidas(base_sqlite, archivo_vision, leer_tabla, tmp_path,
+                                                          monkeypatch):
+    archivo_vision(PULIDOS, [fila("001 MAQ01-10 10:00", 5), fila("002 MAQ02-10 11:30", 3),
+                             fila("003 MAQ03-10 11:45", 4)])
+    checkpoints = RegistroCheckpoints(str(tmp_path / "checkpoints.json"))
+    primero, = pipeline.ejecutar(["pulidos"], now=datetime(2026, 10, 10, 12, 0), checkpoints=checkpoints)
+    assert (primero.filas, primero.metricas.contadores[FUTURO]) == (1, 2)
+
+    def sin_base(*args, **kwargs):
+        raise AssertionError("no debería abrir el pool")
+
+    # El checkpoint persiste en disco: una tarea programada nueva lo lee en su arranque.
+    checkpoints = RegistroCheckpoints(checkpoints.ruta)
+    with monkeypatch.context() as parche:
+        parche.setattr(db, "crear_pool", sin_base)
+        segundo, = pipeline.ejecutar(["pulidos"], now=datetime(2026, 10, 10, 12, 29), checkpoints=checkpoints)
+    assert segundo.sin_cambios
+    # A las 12:30 la fila de las 11:30 ya es vigente: se relee el archivo aunque no haya cambiado.
+    tercero, = pipeline.ejecutar(["pulidos"], now=datetime(2026, 10, 10, 12, 30), checkpoints=checkpoints)
+    assert not tercero.sin_cambios
+    assert (tercero.filas, tercero.metricas.contadores[FUTURO]) == (1, 1)
+    assert [r[0] for r in leer_tabla("pulidos")] == ["001 MAQ01-10 10:00", "002 MAQ02-10 11:30"]
+    # Queda la de las 11:45, vigente a las 12:45.
+    assert checkpoints.sin_cambios(tercero.metricas.archivo, datetime(2026, 10, 10, 12, 44))
+    assert not checkpoints.sin_cambios(tercero.metricas.archivo, datetime(2026, 10, 10, 12, 45))
+
+
+def test_cada_estacion_tiene_su_archivo(tmp_path):
+    ruta = str(tmp_path / "checkpoints.json")
+    assert ruta_estacion("pulidos", ruta) == str(tmp_path / "checkpoints_pulidos.json")
+
+
+def test_error_al_guardar_el_checkpoint_no_es_de_lectura(base_sqlite, archivo_vision, leer_tabla, tmp_path,
+                                                         monkeypatch):
+    archivo_vision(PULIDOS, [fila("001 MAQ01-10 10:00", 5)])
+    checkpoints = RegistroCheckpoints(str(tmp_path / "checkpoints.json"))
+
+    def fallar(origen, destino):
+        raise PermissionError(13, "Acceso denegado", destino)
+
+    monkeypatch.setattr(os, "replace", fallar)
+    resultado, = pipeline.ejecutar(["pulidos"], now=datetime(2026, 10, 10, 12, 0), checkpoints=checkpoints)
+    assert resultado.error.startswith("No se pudo guardar el checkpoint: [Errno 13] Acceso denegado")
+    # La escritura ya había terminado bien.
+    assert resultado.filas == 1
+    assert len(leer_tabla("pulidos")) == 1
+    # El temporal no queda en el directorio.
+    assert not list(tmp_path.glob("checkpoints.json*"))
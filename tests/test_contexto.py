@@ -0,0 +1,34 @@
+"""contexto.crear_contexto: turno vigente, archivo seleccionado y límites derivados de "ahora"."""
+from datetime import datetime
+
+import pytest
+
+from scantotals.contexto import ContextoEjecucion, crear_contexto
+from scantotals.estaciones import ESTACIONES, seleccionar_archivo
+
+
+@pytest.mark.parametrize("hora, minuto, nocturno", [
+    (6, 29, True), (6, 30, False), (21, 59, False), (22, 0, True), (0, 0, True), (3, 59, True),
+])
+def test_turno_y_archivo_en_los_cambios_de_turno(hora, minuto, nocturno):
+    now = datetime(2026, 10, 10, hora, minuto)
+    assert crear_contexto(now).nocturno is nocturno
+    estacion = ESTACIONES["pulidos"]
+    esperado = estacion.archivo_noche if nocturno else estacion.archivo_dia
+    assert seleccionar_archivo(estacion, now).endswith("/" + esperado)
+
+
+def test_ventanas_incluyen_sus_extremos():
+    assert [ContextoEjecucion.en_turno(m, True) for m in (1319, 1320, 0, 300, 301)] == [False, True, True, True, False]
+    assert [ContextoEjecucion.en_turno(m, False) for m in (389, 390, 1290, 1291)] == [False, True, True, False]
+
+
+def test_limites_derivados():
+    contexto = crear_contexto(datetime(2026, 12, 31, 23, 50))
+    assert contexto.limite == datetime(2026, 12, 31, 22, 50)
+    assert contexto.acepta_23 and not contexto.temprano
+    assert contexto.mes == (2026, 12, 31)
+    assert contexto.mes_siguiente == (2027, 1, 31)
+    temprano = crear_contexto(datetime(2026, 2, 1, 3, 59))
+    assert temprano.temprano and not temprano.acepta_23
+    assert temprano.mes == (2026, 2, 28)
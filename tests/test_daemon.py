@@ -0,0 +1,51 @@
+"""daemon.ejecutar_daemon: varios ciclos con el mismo pool sobre el sustituto SQLite."""
+from datetime import datetime
+
+import pytest
+
+from scantotals import contexto, daemon, db, pipeline
+from scantotals.checkpoint import RegistroCheckpoints
+from scantotals.estaciones import ESTACIONES
+from scantotals.sqlite_local import SQLitePool
+
+NOW = datetime(2026, 10, 10, 12, 0)
+
+
+def fila(clave, hits):
+    return [clave, "1.5", "N/A", str(hits), "3.0%", "0", "0:45", "", "inf%", "2.00"]
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_dos_ciclos_reutilizan_el_pool_y_leen_el_archivo_modificado(
+        base_sqlite, archivo_vision, leer_tabla, monkeypatch, tmp_path, incremental):
+    monkeypatch.setattr(contexto, "reloj", lambda: NOW)
+    pulidos = ESTACIONES["pulidos"]
+    archivo_vision(pulidos, [fila("001 MAQ01-10 10:00", 5), fila("002 MAQ02-10 10:00", 5)])
+
+    pools = []
+
+    def crear_pool(pool_size):
+        pools.append(SQLitePool(base_sqlite, pool_size))
+        return pools[-1]
+
+    ciclos = []
+
+    def ejecutar(nombres, **kwargs):
+        resultados = pipeline.ejecutar(nombres, **kwargs)
+        ciclos.append((kwargs["pool"], [(r.filas, r.error, r.sin_cambios) for r in resultados]))
+        if len(ciclos) == 1:
+            # Entre ciclos crecen los hits de una máquina.
+            archivo_vision(pulidos, [fila("001 MAQ01-10 10:00", 12), fila("002 MAQ02-10 10:00", 5)])
+        return resultados
+
+    monkeypatch.setattr(db, "crear_pool", crear_pool)
+    monkeypatch.setattr(daemon, "ejecutar", ejecutar)
+    checkpoints = RegistroCheckpoints(str(tmp_path / "checkpoints.json")) if incremental else None
+    daemon.ejecutar_daemon(["pulidos"], intervalo=0, conexiones=2, ciclos=2, checkpoints=checkpoints)
+
+    assert len(pools) == 1
+    assert [pool for pool, _ in ciclos] == [pools[0], pools[0]]
+    assert [resultados for _, resultados in ciclos] == [[(2, None, False)], [(1, None, False)]]
+    # Cada ciclo devuelve sus conexiones al pool: el siguiente las vuelve a usar.
+    assert len(pools[0]._libres) == 2
+    assert [r[4] for r in leer_tabla("pulidos")] == [12, 5]
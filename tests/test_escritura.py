@@ -0,0 +1,108 @@
+"""Modos de escritura (db.MODO_ESCRITURA) sobre el sustituto SQLite: upsert y reemplazo dejan la misma tabla."""
+import pytest
+
+from scantotals import db
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.parser import Candidato
+from scantotals.pipeline import escribir_candidatos
+
+PULIDOS = ESTACIONES["pulidos"]
+
+
+def candidato(name, hits, mean="1.5", fecha="2026-10-10", hour="10:00"):
+    row = [name, mean, "N/A", str(hits), "3.0%", "0", "0:45", "", "inf%", "2.00"]
+    return Candidato(row, name, fecha, hour, name.split()[0], hits)
+
+
+def escribir(pool, candidatos):
+    metricas = MetricasEstacion(PULIDOS.nombre)
+    connection = db.obtener_conexion(pool)
+    try:
+        escritas = escribir_candidatos(connection, PULIDOS, candidatos, metricas)
+    finally:
+        connection.close()
+    return escritas, {nombre: metricas.contadores[nombre] for nombre in ("nuevas", "actualizadas", "sin_cambio")}
+
+
+def dos_archivos(pool):
+    """Escribe un archivo y luego otro con hits mayores, menores, iguales (con mean corregida) y una fila nueva."""
+    primero = escribir(pool, [candidato("001 MAQ01", 10), candidato("002 MAQ02", 20), candidato("003 MAQ03", 30)])
+    segundo = escribir(pool, [candidato("001 MAQ01", 15, mean="9.9"), candidato("002 MAQ02", 5, mean="9.9"),
+                              candidato("003 MAQ03", 30, mean="9.9"), candidato("004 MAQ04", 1)])
+    return primero, segundo
+
+
+@pytest.mark.parametrize("modo", ["upsert", "reemplazo", "auto"])
+def test_modos_dejan_la_misma_tabla(pool, leer_tabla, monkeypatch, modo):
+    monkeypatch.setattr(db, "MODO_ESCRITURA", modo)
+    primero, segundo = dos_archivos(pool)
+    assert primero == (3, {"nuevas": 3, "actualizadas": 0, "sin_cambio": 0})
+    # Con la columna huella, la fila de hits iguales y mean distinta también se reescribe.
+    assert segundo == (3, {"nuevas": 1, "actualizadas": 2, "sin_cambio": 1})
+    filas = {fila[0]: fila for fila in leer_tabla("pulidos")}
+    assert filas["001 MAQ01"][2:5] == ("9.9", None, 15)
+    assert filas["002 MAQ02"][2:5] == ("1.5", None, 20)
+    assert filas["003 MAQ03"][2:5] == ("9.9", None, 30)
+    assert filas["004 MAQ04"] == ("004 MAQ04", "2026-10-10", "1.5", None, 1, 0.03, "0", "0:45", "", None, "2.00",
+                                  "10:00", "004")
+
+
+@pytest.mark.parametrize("modo", ["upsert", "reemplazo"])
+def test_modos_sin_huella_solo_escriben_hits_mayores(pool, leer_tabla, monkeypatch, modo):
+    monkeypatch.setattr(db, "MODO_ESCRITURA", modo)
+    # Tabla anterior a la migración 002.
+    db._columnas["pulidos", "huella"] = False
+    _, segundo = dos_archivos(pool)
+    assert segundo == (2, {"nuevas": 1, "actualizadas": 1, "sin_cambio": 2})
+    filas = {fila[0]: fila[2:5] for fila in leer_tabla("pulidos")}
+    assert filas == {"001 MAQ01": ("9.9", None, 15), "002 MAQ02": ("1.5", None, 20),
+                     "003 MAQ03": ("1.5", None, 30), "004 MAQ04": ("1.5", None, 1)}
+
+
+def test_auto_usa_upsert_solo_con_la_clave_unica(pool, monkeypatch):
+    monkeypatch.setattr(db, "MODO_ESCRITURA", "auto")
+    connection = pool.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DROP INDEX uq_name_fecha_hour_biselados")
+        sentencias = pool.estadisticas["sentencias"]
+        assert db.resolve_write_mode(cursor, "pulidos") is True
+        assert db.resolve_write_mode(cursor, "biselados") is False
+        # Se consulta una vez por tabla y proceso.
+        assert db.resolve_write_mode(cursor, "pulidos") is True
+        assert pool.estadisticas["sentencias"] - sentencias == 2
+        monkeypatch.setattr(db, "MODO_ESCRITURA", "upsert")
+        assert db.resolve_write_mode(cursor, "pulidos") is True
+        monkeypatch.setattr(db, "MODO_ESCRITURA", "reemplazo")
+        assert db.resolve_write_mode(cursor, "pulidos") is False
+    finally:
+        connection.close()
+
+
+def test_lotes_por_tamano(pool, leer_tabla, monkeypatch):
+    monkeypatch.setattr(db, "TAMANO_LOTE", 4)
+    candidatos = [candidato(f"{i:03d} MAQ", i) for i in range(10)]
+    metricas = MetricasEstacion(PULIDOS.nombre)
+    connection = db.obtener_conexion(pool)
+    try:
+        assert escribir_candidatos(connection, PULIDOS, candidatos, metricas) == 10
+    finally:
+        connection.close()
+    assert metricas.contadores["lotes"] == 3
+    assert len(leer_tabla("pulidos")) == 10
+
+
+def test_consulta_de_existentes_usa_la_clave_unica(pool):
+    # Sin los índices por fecha de las migraciones 003 y 004, la clave única (fecha, hour, name) sirve igual.
+    connection = pool.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DROP INDEX ix_fecha_hour_pulidos")
+        cursor.execute("DROP INDEX ix_fecha_actualizado_pulidos")
+        query, parametros = db.sql_existentes("pulidos", {"2026-10-10", "2026-10-11"})
+        cursor.execute("EXPLAIN QUERY PLAN " + query, parametros)
+        plan = " ".join(str(fila[-1]) for fila in cursor.fetchall())
+    finally:
+        connection.close()
+    assert "uq_name_fecha_hour_pulidos (fecha=?)" in plan
@@ -0,0 +1,272 @@
+"""
+extraccion.py contra las reglas de los app.py originales (commit baseline).
+
+Las funciones _original_* copian las variantes de los scripts; solo cambia que reciben `now`
+en lugar de llamar a datetime.now(). Donde un script original abortaba (int() de un día que
+no es un número, un día que no existe en el mes) extraccion.py devuelve None.
+"""
+import calendar
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from scantotals import extraccion
+from scantotals.contexto import VENTANA_DIURNA, VENTANA_NOCTURNA
+
+MOMENTOS = (
+    datetime(2026, 10, 10, 23, 55),
+    datetime(2026, 10, 10, 23, 49),
+    datetime(2026, 10, 1, 3, 30),
+    datetime(2026, 10, 31, 12, 0),
+    datetime(2026, 9, 30, 2, 0),
+    datetime(2026, 12, 31, 23, 50),
+    datetime(2026, 2, 28, 4, 0),
+)
+HORAS = [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 15, 29, 30, 45, 59)] + ["7:05", "0:30", "24:10"]
+
+
+def _original_hour_cruda(field_name):
+    # Pulido, Biselado, Manuales, BloqueoDeTerminado, Engraver.
+    hour_match = re.search(r"(\d{1,2}):(\d{2})", field_name)
+    if hour_match:
+        return f"{hour_match.group(1)}:{hour_match.group(2)}"
+    return ""
+
+
+def _original_hour_redondeo_23(field_name):
+    # Generadores.
+    hour_match = re.search(r"(\d{1,2}):(\d{2})", field_name)
+    if hour_match:
+        hour = int(hour_match.group(1))
+        minute = int(hour_match.group(2))
+        if hour >= 22 and hour > 22:
+            if minute >= 30:
+                hour += 1
+            return f"{hour:02d}:00"
+        else:
+            return f"{hour:02d}:{minute:02d}"
+    return ""
+
+
+def _original_hour_redondeo_nocturno(field_name):
+    # BloqueoDeTallado.
+    hour_match = re.search(r"(\d{1,2}):(\d{2})", field_name)
+    if hour_match:
+        hour = int(hour_match.group(1))
+        minute = int(hour_match.group(2))
+        if hour >= 22 or hour < 6:
+            if minute >= 30:
+                hour += 1
+            return f"{hour:02d}:00"
+        else:
+            return f"{hour:02d}:{minute:02d}"
+    return ""
+
+
+def _original_date_simple(field_name, extracted_hour, now):
+    # Pulido, Biselado.
+    parts = field_name.split('-')
+    if len(parts) >= 2:
+        day = int(parts[1])
+        if now.hour < 4 and day > now.day:
+            extracted_date = datetime(now.year, now.month, day) - timedelta(days=1)
+        else:
+            extracted_date = datetime(now.year, now.month, day)
+        if extracted_hour == "23:30":
+            extracted_date -= timedelta(days=1)
+        return extracted_date.strftime("%Y-%m-%d")
+    return None
+
+
+def _original_date_mes_siguiente(field_name, extracted_hour, now):
+    # Generadores, BloqueoDeTallado, BloqueoDeTerminado, Engraver.
+    parts = field_name.split('-')
+    if len(parts) >= 2:
+        day = int(parts[1])
+        current_year = now.year
+        current_month = now.month
+        max_day = calendar.monthrange(current_year, current_month)[1]
+        if day > max_day:
+            if current_month == 12:
+                current_year += 1
+                current_month = 1
+            else:
+                current_month += 1
+            max_day = calendar.monthrange(current_year, current_month)[1]
+            if day > max_day:
+                day = max_day
+        if now.hour < 4 and day > now.day:
+            extracted_date = datetime(current_year, current_month, day) - timedelta(days=1)
+        else:
+            extracted_date = datetime(current_year, current_month, day)
+        if extracted_hour == "23:30":
+            extracted_date -= timedelta(days=1)
+        return extracted_date.strftime("%Y-%m-%d")
+    return None
+
+
+def _original_date_mes_texto(field_name, extracted_hour, now):
+    # Manuales (sin el print del error).
+    parts = field_name.split('-')
+    if len(parts) >= 3:
+        if parts[1].isalpha():
+            day_part = parts[2][:2]
+        else:
+            day_part = parts[1]
+    elif len(parts) == 2:
+        day_part = parts[1]
+    else:
+        return None
+    try:
+        day = int(day_part)
+        if day == 0:
+            raise ValueError("Day part is '00'")
+        extracted_date = datetime(now.year, now.month, day)
+        if now.hour < 4 and day > now.day:
+            extracted_date -= timedelta(days=1)
+        if extracted_hour == "23:30":
+            extracted_date -= timedelta(days=1)
+        return extracted_date.strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _original_clean_value_manuales(value):
+    if value in ['N/A', 'inf%']:
+        return None
+    time_match = re.match(r"^\d{1,2}:\d{2}$", value)
+    if time_match:
+        try:
+            hours, minutes = map(int, value.split(':'))
+            if hours < 0 or minutes < 0 or minutes >= 60:
+                return None
+            return value
+        except ValueError:
+            return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _original_clean_percentage(value):
+    if value in ['N/A', 'inf%']:
+        return None
+    if value.endswith('%'):
+        return float(value.strip('%')) / 100
+    return float(value)
+
+
+def _original_is_valid(extracted_hour, extracted_date, now):
+    try:
+        extracted_datetime = datetime.strptime(f"{extracted_date} {extracted_hour}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return False
+    if extracted_hour == "23:00":
+        if now.time() >= datetime.strptime("23:50", "%H:%M").time():
+            return True
+    limit_time = now - timedelta(hours=1)
+    return extracted_datetime <= limit_time
+
+
+def _original_en_turno(extracted_hour, nocturno):
+    try:
+        h, m = map(int, extracted_hour.split(':'))
+    except ValueError:
+        return False
+    total_minutes = h * 60 + m
+    if nocturno:
+        return total_minutes >= 1320 or total_minutes <= 300
+    return total_minutes >= 390 and total_minutes <= 1290
+
+
+def _esperado(original, *args):
+    """Resultado del script original; None donde el original abortaba con ValueError."""
+    try:
+        return original(*args)
+    except ValueError:
+        return None
+
+
+@pytest.mark.parametrize("regla, original", [
+    ("cruda", _original_hour_cruda),
+    ("redondeo_23", _original_hour_redondeo_23),
+    ("redondeo_nocturno", _original_hour_redondeo_nocturno),
+])
+def test_extract_hour_igual_al_original(regla, original):
+    for hora in HORAS:
+        for clave in (f"001 MAQ01-05 {hora}", f"MAQ-Oct-05 {hora}x", f"12 {hora} 99:99"):
+            assert extraccion.extract_hour(clave, regla) == original(clave), clave
+    assert extraccion.extract_hour("001 MAQ01-05 sin hora", regla) == ""
+
+
+def test_extract_num_igual_al_original():
+    for clave in ("001 MAQ01-05 10:00", "MAQ01-05 10:00", " 7 MAQ", "42", ""):
+        num_match = re.search(r"^(\d+)", clave)
+        assert extraccion.extract_num(clave) == (num_match.group(1) if num_match else None)
+
+
+@pytest.mark.parametrize("regla, original", [
+    ("simple", _original_date_simple),
+    ("mes_siguiente", _original_date_mes_siguiente),
+    ("mes_texto", _original_date_mes_texto),
+])
+def test_extract_date_igual_al_original(regla, original):
+    claves = [f"001 MAQ01-{dia:02d}-" for dia in range(1, 32)] + [f"MAQ-{dia}" for dia in (1, 9, 30, 31)]
+    if regla == "mes_texto":
+        claves += [f"OTR-Oct-{dia:02d} 10:00" for dia in range(1, 32)] + ["OTR-Oct-xx 10:00", "OTR-00"]
+    claves += ["sin guion", "MAQ-xx", "MAQ- 7 "]
+    for now in MOMENTOS:
+        for clave in claves:
+            for hora in ("10:00", "23:30", "23:00"):
+                esperado = _esperado(original, clave, hora, now)
+                assert extraccion.extract_date(clave, hora, regla, now) == esperado, (clave, hora, now)
+
+
+def test_extract_date_acepta_el_dia_seguido_de_la_hora():
+    # Los originales abortaban con int("05 10:00"); ahora se toma el número inicial.
+    now = datetime(2026, 10, 10, 12, 0)
+    assert extraccion.extract_date("001 MAQ01-05 10:00", "10:00", "simple", now) == "2026-10-05"
+    assert extraccion.extract_date("001 MAQ01-xx 10:00", "10:00", "simple", now) is None
+
+
+def test_limpieza_igual_al_original():
+    valores = ["N/A", "inf%", "", "1.5", " 42 ", "7:05", "23:59", "1:60", "abc", "-3", "1e3", "12%"]
+    for valor in valores:
+        assert extraccion.clean_value(valor) == (None if valor in ("N/A", "inf%") else valor)
+        assert extraccion.clean_numeric_value(valor) == _original_clean_value_manuales(valor), valor
+    for valor in ("N/A", "inf%", "12%", "3.5%", "0.25", " 1 ", "100%"):
+        assert extraccion.clean_percentage(valor) == _original_clean_percentage(valor), valor
+    with pytest.raises(ValueError):
+        extraccion.clean_percentage("abc")
+
+
+def test_ventanas_de_turno_igual_al_original():
+    assert VENTANA_NOCTURNA == (1320, 300)
+    assert VENTANA_DIURNA == (390, 1290)
+    for hora in HORAS + ["", "sin hora", "5:00", "5:01", "6:29", "6:30", "21:30", "21:31", "21:59"]:
+        for nocturno in (False, True):
+            assert extraccion.in_shift_window(hora, nocturno) == _original_en_turno(hora, nocturno), (hora, nocturno)
+
+
+def test_corte_de_una_hora_igual_al_original():
+    for now in MOMENTOS:
+        for delta in range(-150, 30, 5):
+            momento = now + timedelta(minutes=delta)
+            fecha, hora = momento.strftime("%Y-%m-%d"), momento.strftime("%H:%M")
+            assert (extraccion.is_valid_time_for_processing(hora, fecha, now)
+                    == _original_is_valid(hora, fecha, now)), (now, momento)
+        for hora in ("23:00", "23:30", "24:00", "xx"):
+            fecha = now.strftime("%Y-%m-%d")
+            assert (extraccion.is_valid_time_for_processing(hora, fecha, now)
+                    == _original_is_valid(hora, fecha, now)), (now, hora)
+
+
+def test_corte_de_una_hora_en_el_limite():
+    now = datetime(2026, 10, 10, 12, 0)
+    assert extraccion.is_valid_time_for_processing("11:00", "2026-10-10", now)
+    assert not extraccion.is_valid_time_for_processing("11:01", "2026-10-10", now)
+    # La fila de las 23:00 se acepta desde las 23:50, aunque no haya pasado una hora.
+    assert not extraccion.is_valid_time_for_processing("23:00", "2026-10-10", datetime(2026, 10, 10, 23, 49))
+    assert extraccion.is_valid_time_for_processing("23:00", "2026-10-10", datetime(2026, 10, 10, 23, 50))
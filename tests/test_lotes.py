@@ -0,0 +1,61 @@
+"""Escritura por lotes (db.EscritorLotes): un error a mitad del archivo deshace la transacción abierta."""
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from scantotals import db, pipeline
+from scantotals.estaciones import ESTACIONES
+
+NOW = datetime(2026, 10, 10, 12, 0)
+
+
+def filas(cantidad):
+    return [[f"{i:03d} MAQ-10 10:00", "1.5", "N/A", "5", "3.0%", "0", "", "", "", ""] for i in range(cantidad)]
+
+
+@pytest.fixture
+def transaccion(monkeypatch):
+    """Un commit al final y lotes de 4 filas: el primer lote queda escrito pero sin confirmar."""
+    monkeypatch.setattr(db, "POLITICA_COMMIT", "transaccion")
+    monkeypatch.setattr(db, "TAMANO_LOTE", 4)
+    monkeypatch.setattr(pipeline, "LIMITE_LECTURA_COMPLETA", 0)
+
+
+def sin_transacciones_abiertas(pool):
+    return not any(conexion.in_transaction for conexion in pool._conexiones)
+
+
+def test_error_de_base_de_datos_deshace_el_lote(pool, archivo_vision, leer_tabla, transaccion, monkeypatch):
+    archivo_vision(ESTACIONES["pulidos"], filas(10))
+    enviar_lote = db.EscritorLotes._enviar_lote
+
+    def fallar_en_el_segundo(escritor, registros, borrar):
+        if escritor.lotes:
+            raise sqlite3.OperationalError("database is locked")
+        enviar_lote(escritor, registros, borrar)
+
+    monkeypatch.setattr(db.EscritorLotes, "_enviar_lote", fallar_en_el_segundo)
+    resultado, = pipeline.ejecutar(["pulidos"], now=NOW, pool=pool)
+    assert resultado.error == "Error al ejecutar el comando SQL: database is locked"
+    assert pool.estadisticas["rollbacks"] == 1
+    assert sin_transacciones_abiertas(pool)
+    assert leer_tabla("pulidos") == []
+
+
+def test_error_de_lectura_en_streaming_deshace_el_lote(pool, archivo_vision, leer_tabla, transaccion, monkeypatch):
+    archivo_vision(ESTACIONES["pulidos"], filas(10))
+    iterar = pipeline.iterar_candidatos
+
+    def cortar(*args, **kwargs):
+        for posicion, candidato in enumerate(iterar(*args, **kwargs)):
+            if posicion == 6:
+                raise OSError("recurso de red desconectado")
+            yield candidato
+
+    monkeypatch.setattr(pipeline, "iterar_candidatos", cortar)
+    resultado, = pipeline.ejecutar(["pulidos"], now=NOW, pool=pool)
+    assert resultado.error == "No se pudo leer el archivo: recurso de red desconectado"
+    assert pool.estadisticas["rollbacks"] == 1
+    assert sin_transacciones_abiertas(pool)
+    assert leer_tabla("pulidos") == []
@@ -0,0 +1,87 @@
+"""Motores de lectura (pipeline.MOTOR) contra el motor por filas: mismos registros, contadores y checkpoint."""
+from datetime import datetime
+
+import pytest
+
+from benchmarks.sintetico import CONTADORES, MOMENTOS, archivo_prueba
+from scantotals import pipeline
+from scantotals.checkpoint import CheckpointArchivo
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+
+MOTORES = ["vectorizado", "mmap"]
+
+
+def correr(iterar, ruta, estacion, nocturno, now, checkpoint=None):
+    metricas = MetricasEstacion(estacion.nombre, ruta)
+    registros = [c.registro(estacion) for c in iterar(ruta, estacion, nocturno, checkpoint,
+                                                       crear_contexto(now), metricas)]
+    return registros, {nombre: metricas.contadores[nombre] for nombre in CONTADORES + ("lineas_sin_cambio",)}
+
+
+def iterar_con(motor, monkeypatch):
+    monkeypatch.setattr(pipeline, "MOTOR", motor)
+    return pipeline.motor_lectura()
+
+
+@pytest.mark.parametrize("motor", MOTORES)
+@pytest.mark.parametrize("nombre", list(ESTACIONES))
+def test_mismos_registros_que_el_motor_por_filas(tmp_path, monkeypatch, motor, nombre):
+    estacion = ESTACIONES[nombre]
+    iterar = iterar_con(motor, monkeypatch)
+    ruta = str(tmp_path / f"scantotals_{nombre}.auto.tab")
+    aceptadas = 0
+    for now in MOMENTOS:
+        archivo_prueba(ruta, estacion, now)
+        for nocturno in (False, True):
+            esperado = correr(pipeline.iterar_candidatos, ruta, estacion, nocturno, now)
+            assert correr(iterar, ruta, estacion, nocturno, now) == esperado, (now, nocturno)
+            aceptadas += len(esperado[0])
+    assert aceptadas > 0
+
+
+@pytest.mark.parametrize("motor", MOTORES)
+@pytest.mark.parametrize("variante", ["crlf", "comillas", "sin cabecera", "vacío"])
+def test_variantes_del_archivo(tmp_path, monkeypatch, motor, variante):
+    estacion = ESTACIONES["pulidos"]
+    now = datetime(2026, 10, 10, 23, 55)
+    ruta = str(tmp_path / "scantotals_pulidos.auto.tab")
+    archivo_prueba(ruta, estacion, now)
+    with open(ruta, newline='') as archivo:
+        texto = archivo.read()
+    texto = {"crlf": texto.replace("\n", "\r\n"), "comillas": texto.replace("\tN/A\t", '\t"N/A"\t', 3),
+             "sin cabecera": texto.replace("Key\t", "Clave\t"), "vacío": ""}[variante]
+    with open(ruta, 'w', newline='') as archivo:
+        archivo.write(texto)
+    iterar = iterar_con(motor, monkeypatch)
+    for nocturno in (False, True):
+        assert correr(iterar, ruta, estacion, nocturno, now) == correr(pipeline.iterar_candidatos, ruta, estacion,
+                                                                      nocturno, now)
+
+
+@pytest.mark.parametrize("motor", MOTORES)
+def test_mismo_checkpoint_en_la_segunda_lectura(tmp_path, monkeypatch, motor):
+    estacion = ESTACIONES["pulidos"]
+    now = MOMENTOS[0]
+    ruta = str(tmp_path / "scantotals_pulidos.auto.tab")
+    resultados = []
+    for iterar in (pipeline.iterar_candidatos, iterar_con(motor, monkeypatch)):
+        archivo_prueba(ruta, estacion, now)
+        primero = CheckpointArchivo(ruta, None, {})
+        leido = correr(iterar, ruta, estacion, False, now, primero)
+        with open(ruta, newline='') as archivo:
+            lineas = archivo.readlines()
+        # Cambian los hits de algunas filas: solo esas se vuelven a entregar.
+        for i in range(5, len(lineas), 7):
+            celdas = lineas[i].split("\t")
+            if len(celdas) > 3:
+                celdas[3] += "1"
+                lineas[i] = "\t".join(celdas)
+        with open(ruta, 'w', newline='') as archivo:
+            archivo.writelines(lineas)
+        segundo = CheckpointArchivo(ruta, None, dict(primero.lineas))
+        releido = correr(iterar, ruta, estacion, False, now, segundo)
+        resultados.append((leido, releido, primero.lineas, segundo.lineas, segundo.diferidas, segundo.proxima))
+    assert resultados[0] == resultados[1]
+    assert resultados[0][1][1]["lineas_sin_cambio"] > 0
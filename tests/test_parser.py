@@ -0,0 +1,94 @@
+"""ParserClave.decodificar contra el recorrido por fila con las funciones de extraccion.py."""
+from datetime import datetime
+
+import pytest
+
+from scantotals import extraccion
+from scantotals.contexto import crear_contexto
+from scantotals.estaciones import ESTACIONES
+from scantotals.parser import FUERA_DE_TURNO, FUTURO, HITS_INVALIDOS, HORA_INVALIDA, SIN_FECHA, ParserClave
+
+MOMENTOS = (
+    datetime(2026, 10, 10, 23, 55),
+    datetime(2026, 10, 10, 23, 49),
+    datetime(2026, 10, 1, 3, 30),
+    datetime(2026, 10, 31, 12, 0),
+    datetime(2026, 9, 30, 2, 0),
+    datetime(2026, 12, 31, 23, 50),
+    datetime(2026, 2, 28, 5, 0),
+)
+HORAS = [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30, 59)] + ["7:05", "5:01", "6:29", "21:31", "24:10"]
+
+
+def _claves(now):
+    mes = f"{now:%b}"
+    for hora in HORAS:
+        for dia in (1, now.day, now.day + 1, 31):
+            yield f"{dia:03d} MAQ-{dia:02d} {hora}"
+            yield f"MAQ-{mes}-{dia:02d} {hora}"
+        yield f"007 MAQ-xx {hora}"
+        yield f"007 MAQ {hora}"
+    yield "008 MAQ-10 sin hora"
+
+
+def _filas(now):
+    for clave in _claves(now):
+        for hits, inf_fails in (("5", "2"), ("x", "0"), (" 7 ", "N/A")):
+            yield [clave, "1.5", "N/A", hits, "3.0%", inf_fails, "0:45", "", "inf%", "2.00"]
+
+
+def _por_extraccion(row, estacion, nocturno, now):
+    """Registro o motivo de descarte siguiendo el orden de los scripts originales."""
+    name_field = row[0]
+    extracted_hour = extraccion.extract_hour(name_field, estacion.regla_hora)
+    if not extraccion.in_shift_window(extracted_hour, nocturno):
+        return FUERA_DE_TURNO
+    extracted_date = extraccion.extract_date(name_field, extracted_hour, estacion.regla_fecha, now)
+    if not extracted_date:
+        return SIN_FECHA
+    if not extraccion.is_valid_time_for_processing(extracted_hour, extracted_date, now):
+        return FUTURO
+    current_hits = extraccion.extract_hits(row, estacion)
+    if current_hits is None:
+        return HITS_INVALIDOS
+    return extraccion.build_record(row, estacion, extracted_date, extracted_hour,
+                                   extraccion.extract_num(name_field), current_hits)
+
+
+@pytest.mark.parametrize("nombre", list(ESTACIONES))
+def test_decodificar_igual_a_extraccion(nombre):
+    estacion = ESTACIONES[nombre]
+    aceptadas = 0
+    motivos = set()
+    for now in MOMENTOS:
+        for nocturno in (False, True):
+            parser = ParserClave(estacion, nocturno, crear_contexto(now))
+            for row in _filas(now):
+                esperado = _por_extraccion(row, estacion, nocturno, now)
+                obtenido = parser.decodificar(row)
+                if obtenido.__class__ is str:
+                    motivos.add(obtenido)
+                    if obtenido == HORA_INVALIDA:
+                        # "24:00" (redondeo de 23:30 o más) no es una hora válida: los scripts la
+                        # descartaban por fecha o por el corte de una hora.
+                        assert esperado in (SIN_FECHA, FUTURO), (row, now, nocturno)
+                    else:
+                        assert obtenido == esperado, (row, now, nocturno)
+                else:
+                    assert obtenido.registro(estacion) == esperado, (row, now, nocturno)
+                    aceptadas += 1
+    # Que la comparación cubra filas aceptadas y descartadas por cada motivo.
+    assert aceptadas > 100
+    assert motivos >= {FUERA_DE_TURNO, SIN_FECHA, FUTURO, HITS_INVALIDOS}
+
+
+def test_corte_de_una_hora():
+    estacion = ESTACIONES["pulidos"]
+    parser = ParserClave(estacion, False, crear_contexto(datetime(2026, 10, 10, 12, 0)))
+    fila = ["001 MAQ-10 {}", "1", "1", "5", "1%", "0", "", "", "", ""]
+    assert parser.decodificar([fila[0].format("11:00")] + fila[1:]).hour == "11:00"
+    assert parser.decodificar([fila[0].format("11:01")] + fila[1:]) == FUTURO
+    assert parser.decodificar(["001 MAQ-11 10:00"] + fila[1:]) == FUTURO
+    nocturno = ParserClave(estacion, True, crear_contexto(datetime(2026, 10, 10, 23, 50)))
+    assert nocturno.decodificar(["001 MAQ-10 23:00"] + fila[1:]).fecha == "2026-10-10"
+    assert nocturno.decodificar(["001 MAQ-10 22:51"] + fila[1:]) == FUTURO
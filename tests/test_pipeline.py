@@ -0,0 +1,89 @@
+"""pipeline.ejecutar de punta a punta sobre un directorio VISION temporal y el sustituto SQLite."""
+from datetime import datetime
+
+import pytest
+
+from scantotals import pipeline
+from scantotals.estaciones import ESTACIONES
+
+# Turno diurno: se lee el archivo YVES* de cada estación; el corte de una hora queda en las 11:00.
+NOW = datetime(2026, 10, 10, 12, 0)
+
+
+def fila(clave, hits, multi="3.0%", mean="1.5"):
+    return [clave, mean, "N/A", str(hits), multi, "0", "0:45", "", "inf%", "2.00"]
+
+
+FILAS_PULIDOS = [
+    fila("001 MAQ01-10 10:00", 5),
+    fila("002 MAQ02-10 10:30", 7, multi="abc"),
+    fila("003 MAQ03-10 11:30", 3),
+    fila("004 MAQ04-10 05:00", 3),
+    fila("005 MAQ05-10 09:00", "x"),
+    fila("001 MAQ01-10 10:00", 4, mean="2.5"),
+    fila("006 MAQ06-09 21:30", 4),
+]
+
+
+@pytest.fixture(params=["completa", "streaming", "etapas"])
+def lectura(request, monkeypatch):
+    """Archivo leído completo antes de escribir, escrito mientras se lee, o en hilos separados (ETAPAS)."""
+    if request.param != "completa":
+        monkeypatch.setattr(pipeline, "LIMITE_LECTURA_COMPLETA", 0)
+    monkeypatch.setattr(pipeline, "ETAPAS", request.param == "etapas")
+    return request.param
+
+
+def test_ejecutar_escribe_las_filas_aceptadas(base_sqlite, archivo_vision, leer_tabla, lectura):
+    archivo_vision(ESTACIONES["pulidos"], FILAS_PULIDOS)
+    archivo_vision(ESTACIONES["biselados"], [fila("010 BIS-10 08:15", 12)])
+    resultados = {r.estacion: r for r in pipeline.ejecutar(["pulidos", "biselados"], now=NOW)}
+    pulidos = resultados["pulidos"]
+    assert pulidos.error is None
+    assert pulidos.filas == 2
+    contadores = pulidos.metricas.contadores
+    assert {nombre: contadores[nombre] for nombre in (
+        "filas", "aceptadas", "futuro", "fuera_de_turno", "hits_invalidos", "valores_invalidos", "duplicadas",
+        "nuevas")} == {"filas": 7, "aceptadas": 4, "futuro": 1, "fuera_de_turno": 1, "hits_invalidos": 1,
+                       "valores_invalidos": 1, "duplicadas": 1, "nuevas": 2}
+    assert leer_tabla("pulidos") == [
+        ("001 MAQ01-10 10:00", "2026-10-10", "1.5", None, 5, 0.03, "0", "0:45", "", None, "2.00", "10:00", "001"),
+        ("006 MAQ06-09 21:30", "2026-10-09", "1.5", None, 4, 0.03, "0", "0:45", "", None, "2.00", "21:30", "006"),
+    ]
+    assert resultados["biselados"].error is None
+    assert [r[:5] for r in leer_tabla("biselados")] == [("010 BIS-10 08:15", "2026-10-10", "1.5", None, 12)]
+
+
+def test_valores_invalidos_no_detienen_la_ejecucion(base_sqlite, archivo_vision, leer_tabla, lectura):
+    # Antes, un Multi que no es número ni porcentaje llegaba como ValueError a futuro.result().
+    archivo_vision(ESTACIONES["pulidos"], [fila("001 MAQ01-10 10:00", 5, multi="abc"),
+                                           fila("002 MAQ02-10 10:00", 5, multi="12,5%")])
+    archivo_vision(ESTACIONES["manuales"], [fila("001 OTR-Oct-10 10:00", 5, multi="7%", mean="abc")])
+    resultados = {r.estacion: r for r in pipeline.ejecutar(["pulidos", "manuales"], now=NOW)}
+    assert resultados["pulidos"].error is None
+    assert resultados["pulidos"].filas == 0
+    assert resultados["pulidos"].metricas.contadores["valores_invalidos"] == 2
+    assert leer_tabla("pulidos") == []
+    # En Manuales, mean se convierte a número y un texto queda en NULL, como en el script original.
+    assert resultados["manuales"].filas == 1
+    assert leer_tabla("manuales")[0][2:6] == (None, None, 5, 0.07)
+
+
+def test_error_de_lectura_solo_afecta_a_su_estacion(base_sqlite, archivo_vision, leer_tabla):
+    archivo_vision(ESTACIONES["pulidos"], [fila("001 MAQ01-10 10:00", 5)])
+    resultados = {r.estacion: r for r in pipeline.ejecutar(["pulidos", "engravers"], now=NOW)}
+    assert resultados["engravers"].error.startswith("No se pudo leer el archivo")
+    assert resultados["pulidos"].error is None
+    assert len(leer_tabla("pulidos")) == 1
+
+
+def test_segunda_ejecucion_solo_escribe_lo_que_crecio(base_sqlite, archivo_vision, leer_tabla):
+    estacion = ESTACIONES["pulidos"]
+    archivo_vision(estacion, [fila("001 MAQ01-10 10:00", 5), fila("002 MAQ02-10 10:00", 5)])
+    pipeline.ejecutar(["pulidos"], now=NOW)
+    archivo_vision(estacion, [fila("001 MAQ01-10 10:00", 8), fila("002 MAQ02-10 10:00", 5)])
+    resultado, = pipeline.ejecutar(["pulidos"], now=NOW)
+    assert resultado.filas == 1
+    assert resultado.metricas.contadores["actualizadas"] == 1
+    assert resultado.metricas.contadores["sin_cambio"] == 1
+    assert [r[4] for r in leer_tabla("pulidos")] == [8, 5]
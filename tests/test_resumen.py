@@ -0,0 +1,54 @@
+"""resumen_turnos recalculado en cada lote (resumen.sentencias) sobre el sustituto SQLite."""
+import pytest
+
+from scantotals import db
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.parser import Candidato
+from scantotals.pipeline import escribir_candidatos
+
+
+def candidato(name, hits, mean="1.5", shortest="0:45", longest="", hour="10:00"):
+    row = [name, mean, "N/A", str(hits), "3.0%", "0", shortest, longest, "inf%", "2.00"]
+    return Candidato(row, name, "2026-10-10", hour, name.split()[0], hits)
+
+
+def escribir(pool, estacion, candidatos):
+    connection = db.obtener_conexion(pool)
+    try:
+        escribir_candidatos(connection, estacion, candidatos, MetricasEstacion(estacion.nombre))
+    finally:
+        connection.close()
+
+
+def resumen(pool):
+    connection = pool.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT estacion, fecha, turno, hour, filas, hits, mean_ponderada, shortest_min, longest_max "
+                       "FROM resumen_turnos ORDER BY estacion, hour")
+        return cursor.fetchall()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("modo", ["upsert", "reemplazo"])
+def test_resumen_despues_de_insertar_y_de_actualizar(pool, monkeypatch, modo):
+    monkeypatch.setattr(db, "MODO_ESCRITURA", modo)
+    pulidos = ESTACIONES["pulidos"]
+    escribir(pool, pulidos, [candidato("001 MAQ01", 10, mean="2", shortest="9.5", longest="9.9"),
+                             candidato("002 MAQ02", 30, mean="4", shortest="10.2", longest="100.4"),
+                             candidato("003 MAQ03", 5, mean="N/A", shortest="N/A", longest="", hour="22:30")])
+    # Como texto, MIN daba '10.2' y MAX '9.9'.
+    assert resumen(pool) == [("pulidos", "2026-10-10", "DIA", "10:00", 2, 40, 3.5, 9.5, 100.4),
+                             ("pulidos", "2026-10-10", "NVO", "22:30", 1, 5, None, None, None)]
+    # Segundo lote: crecen los hits de MAQ01 con otros valores; la hora se recalcula completa.
+    escribir(pool, pulidos, [candidato("001 MAQ01", 50, mean="1", shortest="8", longest="120")])
+    assert resumen(pool)[0] == ("pulidos", "2026-10-10", "DIA", "10:00", 2, 80, 2.125, 8.0, 120.0)
+
+
+def test_horas_de_manuales_en_segundos(pool):
+    manuales = ESTACIONES["manuales"]
+    escribir(pool, manuales, [candidato("001 OTR", 1, shortest="0:45", longest="1:05"),
+                              candidato("002 OTR", 1, shortest="10:30", longest="9:59")])
+    assert resumen(pool)[0][7:] == (45 * 60, 9 * 3600 + 59 * 60)
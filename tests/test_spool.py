@@ -0,0 +1,53 @@
+"""spool.Spool y Drenador: una fila por clave con los hits mayores o los valores más recientes."""
+import pytest
+
+from scantotals import spool
+from scantotals.estaciones import ESTACIONES
+from scantotals.metricas import MetricasEstacion
+from scantotals.parser import Candidato
+
+PULIDOS = ESTACIONES["pulidos"]
+
+
+def candidato(name, hits, mean="1.5", multi="3.0%"):
+    row = [name, mean, "N/A", str(hits), multi, "0", "0:45", "", "inf%", "2.00"]
+    return Candidato(row, name, "2026-10-10", "10:00", name.split()[0], hits)
+
+
+@pytest.fixture
+def cola(tmp_path):
+    cola = spool.Spool(str(tmp_path / "spool.db"))
+    yield cola
+    cola.cerrar()
+
+
+def pendientes(cola):
+    return {clave[1]: (clave[4], listo.hits, listo.fila[2]) for clave, listo in cola.tomar("pulidos")}
+
+
+def test_se_queda_con_hits_mayores_o_valores_nuevos(cola):
+    cola.encolar(PULIDOS, [candidato("001 MAQ01", 10), candidato("002 MAQ02", 10), candidato("003 MAQ03", 10)])
+    cola.encolar(PULIDOS, [candidato("001 MAQ01", 12), candidato("002 MAQ02", 9, mean="9.9"),
+                           candidato("003 MAQ03", 10, mean="9.9")])
+    # Antes, con hits iguales la fila corregida se perdía (WHERE excluded.hits > hits).
+    assert pendientes(cola) == {"001 MAQ01": (1, 12, "1.5"), "002 MAQ02": (0, 10, "1.5"),
+                                "003 MAQ03": (1, 10, "9.9")}
+    # La misma fila otra vez no cambia la versión: el Drenador puede descartarla.
+    cola.encolar(PULIDOS, [candidato("003 MAQ03", 10, mean="9.9")])
+    assert pendientes(cola)["003 MAQ03"][0] == 1
+
+
+def test_valores_invalidos_se_omiten(cola):
+    metricas = MetricasEstacion(PULIDOS.nombre)
+    assert cola.encolar(PULIDOS, [candidato("001 MAQ01", 10, multi="abc"), candidato("002 MAQ02", 10)], metricas) == 1
+    assert metricas.contadores["valores_invalidos"] == 1
+    assert metricas.contadores["en_spool"] == 1
+    assert list(pendientes(cola)) == ["002 MAQ02"]
+
+
+def test_drenar_escribe_y_vacia_el_spool(cola, pool, leer_tabla):
+    cola.encolar(PULIDOS, [candidato("001 MAQ01", 10), candidato("002 MAQ02", 7)])
+    assert spool.Drenador(cola, pool=pool).drenar() == 2
+    assert cola.pendientes() == 0
+    assert [fila[:5] for fila in leer_tabla("pulidos")] == [("001 MAQ01", "2026-10-10", "1.5", None, 10),
+                                                            ("002 MAQ02", "2026-10-10", "1.5", None, 7)]
@@ -0,0 +1,36 @@
+"""vigilancia.ejecutar_vigilancia con un observador simulado: un cambio del archivo vigente dispara su estación."""
+from datetime import datetime
+
+from scantotals import contexto, vigilancia
+from scantotals.estaciones import ESTACIONES, rutas_estacion, seleccionar_archivo
+
+
+class ObservadorSimulado:
+    """Entrega una tanda de cambios por llamada a esperar(); al terminarlas, detiene la vigilancia."""
+
+    def __init__(self, tandas):
+        self.tandas = list(tandas)
+        self.cerrado = False
+
+    def esperar(self, timeout):
+        if not self.tandas:
+            raise KeyboardInterrupt
+        return self.tandas.pop(0)
+
+    def cerrar(self):
+        self.cerrado = True
+
+
+def test_cambio_del_archivo_vigente_dispara_su_estacion(base_sqlite, vision, monkeypatch):
+    now = datetime(2026, 10, 10, 12, 0)
+    monkeypatch.setattr(contexto, "reloj", lambda: now)
+    pulidos, biselados = ESTACIONES["pulidos"], ESTACIONES["biselados"]
+    # El archivo nocturno de biselados no es el vigente a mediodía: su cambio se ignora.
+    observador = ObservadorSimulado([[seleccionar_archivo(pulidos, now), rutas_estacion(biselados)[0]], []])
+    monkeypatch.setattr(vigilancia, "crear_observador", lambda rutas, intervalo: observador)
+    llamadas = []
+    monkeypatch.setattr(vigilancia, "ejecutar", lambda nombres, **opciones: llamadas.append(nombres))
+    vigilancia.ejecutar_vigilancia(["pulidos", "biselados"], debounce=0)
+    # Primero el barrido completo, luego solo la estación cuyo archivo cambió.
+    assert llamadas == [["pulidos", "biselados"], ["pulidos"]]
+    assert observador.cerrado